@@ -1,228 +1,235 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-from collections import defaultdict
 import json
 import csv
 import os
 from io import StringIO
 import atexit  # added
 
+from basketball_model import Player, SUMMARY_FIELDS, summary_row
+from basketball_model import get_team_possessions as _team_possessions, calc_team_percentage as _team_percentage
+from play_by_play import PlayByPlay, event_lines, flatten_counters, format_clock, parse_event_lines
+from lineups import LineupIndex, lineup_report
+from trends import PlayerTrend, TREND_METRICS
+from rollups import RollupStore, ROLLUP_FIELDS, default_season
+from leaderboards import LeaderboardService, RANKED_METRICS, RANK_FIELDS
+from name_index import NameIndex
+import simulator
+from uncertainty import IntervalCache, INTERVAL_FIELDS, INTERVAL_METRICS, format_interval
+from similarity import SimilarityIndex, season_counters, season_entries, stat_vector
+from compact_format import dumps as compact_dumps, loads as compact_loads
+from columnar_export import export_season
+from shared_data import POLL_MS, SharedFiles, merge_appends, merge_by_name, merge_players, prefer_changed
+from shot_chart import COURT_WIDTH, HALF_COURT, ShotCharts, classify_shot, court_lines, heat_color, bin_scale
+
 # Use a persistent per-user data directory (works with PyInstaller too)
 DATA_DIR = os.path.join(os.path.expanduser("~"), ".basketball_analytics_programjs")
 os.makedirs(DATA_DIR, exist_ok=True)
-DATA_FILE = os.path.join(DATA_DIR, "basketball_data.json")
-
-
-class Player:
-    def __init__(self, name):
-        self.name = name
-        self.shots = defaultdict(lambda: {"made": 0, "missed": 0, "contested_made": 0, "contested_missed": 0})
-        self.assists = 0
-        self.turnovers = 0
-        self.rebounds = 0
-        self.points = 0
-        # --- new tracking fields ---
-        self.strike_zone = {"balls": 0, "strikes": 0, "ball_made": 0, "ball_missed": 0, "strike_made": 0, "strike_missed": 0}
-        self.cuts = {"total": 0, "pass_to_cutter": 0, "made_shot": 0, "missed_shot": 0}
-        self.paint_touches = {"total": 0, "made_shot": 0, "missed_shot": 0, "kick_out": 0}
-        self.defense = {"contested_made": 0, "contested_missed": 0, "uncontested_made": 0, "uncontested_missed": 0}
-
-    def record_shot(self, shot_type, made, contested=False):
-        shot = self.shots[shot_type]
-        if made:
-            shot["made"] += 1
-            if shot_type == "3pt":
-                self.points += 3
-            else:
-                self.points += 2
-            if contested:
-                shot["contested_made"] += 1
-        else:
-            shot["missed"] += 1
-            if contested:
-                shot["contested_missed"] += 1
-
-    # --- new recorders for requested tracking ---
-    def record_strike_pass(self, kind, result):
-        # kind in {"ball","strike"}; result in {"made","missed"}
-        if kind == "ball":
-            self.strike_zone["balls"] += 1
-            if result == "made":
-                self.strike_zone["ball_made"] += 1
-            elif result == "missed":
-                self.strike_zone["ball_missed"] += 1
-        elif kind == "strike":
-            self.strike_zone["strikes"] += 1
-            if result == "made":
-                self.strike_zone["strike_made"] += 1
-            elif result == "missed":
-                self.strike_zone["strike_missed"] += 1
-
-    def record_cut(self, result):
-        # result in {"pass","made","missed"}
-        self.cuts["total"] += 1
-        if result == "pass":
-            self.cuts["pass_to_cutter"] += 1
-        elif result == "made":
-            self.cuts["made_shot"] += 1
-        elif result == "missed":
-            self.cuts["missed_shot"] += 1
-
-    def record_paint_touch(self, result):
-        # result in {"made","missed","kick"}
-        self.paint_touches["total"] += 1
-        if result == "made":
-            self.paint_touches["made_shot"] += 1
-        elif result == "missed":
-            self.paint_touches["missed_shot"] += 1
-        elif result == "kick":
-            self.paint_touches["kick_out"] += 1
-
-    def record_defense(self, contested, made):
-        # contested bool, made bool
-        if contested and made:
-            self.defense["contested_made"] += 1
-        elif contested and not made:
-            self.defense["contested_missed"] += 1
-        elif not contested and made:
-            self.defense["uncontested_made"] += 1
-        else:
-            self.defense["uncontested_missed"] += 1
-
-    def total_shots(self):
-        return sum(v["made"] + v["missed"] for v in self.shots.values())
-
-    def shots_made(self):
-        return sum(v["made"] for v in self.shots.values())
-
-    def shots_missed(self):
-        return sum(v["missed"] for v in self.shots.values())
-
-    def calc_per(self):
-        denom = max(1, self.total_shots() + self.turnovers)
-        value = (self.points + self.rebounds + self.assists - self.turnovers) / denom * 15
-        return round(value, 2)
-
-    def calc_ts(self):
-        fga = self.total_shots()
-        if fga == 0:
-            return 0.0
-        return round(self.points / (2 * fga), 3)
-
-    def calc_ast_to_tov(self):
-        if self.turnovers == 0:
-            return float(self.assists) if self.assists else 0.0
-        return round(self.assists / self.turnovers, 2)
-
-    def calc_usage(self, team_possessions):
-        used = self.total_shots() + self.assists + self.turnovers
-        if team_possessions <= 0:
-            return 0.0
-        return round(100 * used / team_possessions, 2)
-
-    def calc_bpm(self):
-        possessions = max(1, self.total_shots() + self.turnovers)
-        return round((self.points + self.rebounds + self.assists) / possessions * 10, 2)
-
-    def to_dict(self):
-        return {
-            "name": self.name,
-            "shots": {k: dict(v) for k, v in self.shots.items()},
-            "assists": self.assists,
-            "turnovers": self.turnovers,
-            "rebounds": self.rebounds,
-            "points": self.points,
-            # include new fields
-            "strike_zone": dict(self.strike_zone),
-            "cuts": dict(self.cuts),
-            "paint_touches": dict(self.paint_touches),
-            "defense": dict(self.defense),
-        }
+COMPACT_FILE = os.path.join(DATA_DIR, "basketball_data.bbd")  # players and rollups, see compact_format.py
+DATA_FILE = os.path.join(DATA_DIR, "basketball_data.json")  # read once to upgrade to COMPACT_FILE
+PLAYS_FILE = os.path.join(DATA_DIR, "basketball_plays.jsonl")  # one event per line, appended to on save
+LEGACY_PLAYS_FILE = os.path.join(DATA_DIR, "basketball_plays.json")  # read once, like DATA_FILE
+TRENDS_FILE = os.path.join(DATA_DIR, "basketball_trends.json")
+ROLLUPS_FILE = os.path.join(DATA_DIR, "basketball_rollups.json")  # read once, like DATA_FILE
+# other windows (or scripts) may share DATA_DIR: saves lock and merge, see shared_data.py
+SHARED = SharedFiles(DATA_DIR, [COMPACT_FILE, PLAYS_FILE, TRENDS_FILE], logs=[PLAYS_FILE])
 
-    @staticmethod
-    def from_dict(name, data):
-        player = Player(name)
-        # Merge loaded shots with default keys so missing contested_* keys are filled with 0
-        for shot_type, values in (data.get("shots") or {}).items():
-            player.shots[shot_type].update(values or {})
-        player.assists = data.get("assists", 0)
-        player.turnovers = data.get("turnovers", 0)
-        player.rebounds = data.get("rebounds", 0)
-        player.points = data.get("points", 0)
-        # restore new fields with safe defaults
-        sz = data.get("strike_zone") or {}
-        player.strike_zone.update({
-            "balls": sz.get("balls", 0),
-            "strikes": sz.get("strikes", 0),
-            "ball_made": sz.get("ball_made", 0),
-            "ball_missed": sz.get("ball_missed", 0),
-            "strike_made": sz.get("strike_made", 0),
-            "strike_missed": sz.get("strike_missed", 0),
-        })
-        cuts = data.get("cuts") or {}
-        player.cuts.update({
-            "total": cuts.get("total", 0),
-            "pass_to_cutter": cuts.get("pass_to_cutter", 0),
-            "made_shot": cuts.get("made_shot", 0),
-            "missed_shot": cuts.get("missed_shot", 0),
-        })
-        pt = data.get("paint_touches") or {}
-        player.paint_touches.update({
-            "total": pt.get("total", 0),
-            "made_shot": pt.get("made_shot", 0),
-            "missed_shot": pt.get("missed_shot", 0),
-            "kick_out": pt.get("kick_out", 0),
-        })
-        df = data.get("defense") or {}
-        player.defense.update({
-            "contested_made": df.get("contested_made", 0),
-            "contested_missed": df.get("contested_missed", 0),
-            "uncontested_made": df.get("uncontested_made", 0),
-            "uncontested_missed": df.get("uncontested_missed", 0),
-        })
-        return player
+COURT_SCALE = 10  # canvas pixels per foot on the shot chart
 
 
 TEAM = {}
+PLAYS = PlayByPlay()
+# the events PLAYS_FILE holds (the plays merge base), and the PLAYS.version at which
+# PLAYS.events starts with them: saves append the rest, otherwise the file is rewritten
+PLAYS_SAVED = {"events": [], "version": None}
+LINEUPS = LineupIndex(PLAYS)
+TRENDS = {}  # name -> PlayerTrend, updated when a game is closed
+ROLLUPS = RollupStore()  # game -> season -> career totals, folded in when a game is closed
+LEADERS = LeaderboardService()  # kept in step with TEAM on every change
+CHARTS = ShotCharts()  # shot-location heatmaps, updated with each located shot
+INTERVALS = IntervalCache()  # bootstrap intervals, recomputed when a player's counters change
+SIMILAR = SimilarityIndex()  # player-season stat vectors, updated when a game is closed
+NAMES = NameIndex()  # roster search and duplicate-name checks, kept in step with TEAM
 
 
 def get_team_possessions():
-    return max(1, sum(p.total_shots() + p.assists + p.turnovers for p in TEAM.values()))
+    return _team_possessions(TEAM.values())
 
 
 def calc_team_percentage():
-    if not TEAM:
-        return 0.0
-    team_pos = get_team_possessions()
-    scores = []
-    for p in TEAM.values():
-        per = min(max(p.calc_per(), 0.0), 30.0) / 30.0
-        ts = min(max(p.calc_ts(), 0.0), 1.0)
-        at = min(max(p.calc_ast_to_tov(), 0.0), 3.0) / 3.0
-        usage = min(max(p.calc_usage(team_pos), 0.0), 40.0) / 40.0
-        bpm = (min(max(p.calc_bpm(), -10.0), 10.0) + 10.0) / 20.0
-        scores.append((per + ts + at + usage + bpm) / 5.0)
-    return round(sum(scores) / len(scores) * 100, 1)
+    return _team_percentage(TEAM.values())
+
+
+def court_px(x, y):
+    """Canvas pixel of a court point in feet (baseline along the top)."""
+    return (x + COURT_WIDTH / 2) * COURT_SCALE, y * COURT_SCALE
+
+
+def draw_court_lines(canvas):
+    for line in court_lines():
+        canvas.create_line(*[c for point in line for c in court_px(*point)], fill="#5a4a3a", width=2)
+
+
+def _event_key(event):
+    return event.game_id, event.period, event.clock, event.player, event.kind, tuple(sorted(event.delta.items()))
+
+
+def _line_key(line):
+    return line.season, line.game_id, line.name, tuple(sorted(line.counters.items()))
+
+
+def _trends_bytes():
+    return json.dumps({name: trend.to_dict() for name, trend in TRENDS.items()}).encode("utf-8")
+
+
+def _merge_team(base, theirs):
+    base_players, base_rollups = compact_loads(base) if base else ([], RollupStore())
+    their_players, their_rollups = compact_loads(theirs)
+    merged = merge_players({p.name: p for p in base_players}, TEAM, {p.name: p for p in their_players})
+    TEAM.clear()
+    TEAM.update(merged)
+    ROLLUPS.games = merge_appends(base_rollups.games, ROLLUPS.games, their_rollups.games, _line_key)
+    ROLLUPS.rebuild()
+
+
+def _read_plays():
+    """The events in PLAYS_FILE now: the merge base plus what other windows appended, or the whole file if it was replaced."""
+    tail = SHARED.read_tail(PLAYS_FILE)
+    if tail is not None:
+        return PLAYS_SAVED["events"] + parse_event_lines(tail)
+    data = SHARED.read(PLAYS_FILE)
+    return None if data is None else parse_event_lines(data)
+
+
+def _plays_on_disk(events):
+    """PLAYS_FILE holds ``events``; saves can append while PLAYS.events starts with them."""
+    in_step = len(PLAYS.events) >= len(events) and all(a is b for a, b in zip(PLAYS.events, events))
+    PLAYS_SAVED["events"] = events
+    PLAYS_SAVED["version"] = PLAYS.version if in_step else None
+
+
+def _save_plays():
+    """Append the events logged since the last save; the file is only rewritten after an undo, a rename, or a merge that took events out."""
+    saved = PLAYS_SAVED["events"]
+    if PLAYS_SAVED["version"] == PLAYS.version:
+        new = PLAYS.events[len(saved):]
+        SHARED.append(PLAYS_FILE, event_lines(new))
+        saved.extend(new)
+    else:
+        SHARED.write(PLAYS_FILE, event_lines(PLAYS.events))
+        PLAYS_SAVED["events"] = list(PLAYS.events)
+        PLAYS_SAVED["version"] = PLAYS.version
+
+
+def _merge_plays(base, theirs):
+    # theirs comes first in the merge, so unless ours took events out the file is still a prefix of PLAYS
+    PLAYS.restore(merge_appends(base, PLAYS.events, theirs, _event_key))
+    _plays_on_disk(theirs)
+
+
+def _merge_trends(base, theirs):
+    ours = json.loads(_trends_bytes())
+    merged = merge_by_name(json.loads(base) if base else {}, ours, json.loads(theirs), prefer_changed)
+    TRENDS.clear()
+    TRENDS.update((name, PlayerTrend.from_dict(payload)) for name, payload in merged.items())
+
+
+MERGERS = {COMPACT_FILE: _merge_team, PLAYS_FILE: _merge_plays, TRENDS_FILE: _merge_trends}
+MERGE_LISTENERS = []  # called after other windows' saves were merged in
+
+
+def merge_saved(paths):
+    """Fold what other windows saved to ``paths`` since we last read or wrote them into memory."""
+    merged = False
+    for path in paths:
+        try:
+            if path == PLAYS_FILE:  # a log: only what was appended since is read
+                base, theirs = PLAYS_SAVED["events"], _read_plays()
+            else:
+                base, theirs = SHARED.base.get(path), SHARED.read(path)
+            if theirs is not None:
+                MERGERS[path](base, theirs)
+        except (json.JSONDecodeError, ValueError, IndexError, KeyError):
+            theirs = None
+        if theirs is None:  # removed or unreadable: ours replaces it on the next save
+            if path == PLAYS_FILE:
+                PLAYS_SAVED["version"] = None
+            continue
+        merged = True
+    if merged:
+        NAMES.sync(TEAM)
+        LEADERS.rebuild(TEAM.values())
+        CHARTS.rebuild(TEAM.values())
+        SIMILAR.rebuild(season_entries(ROLLUPS.seasons))
+        for listener in MERGE_LISTENERS:
+            listener()
+    return merged
 
 
 def save_data():
-    with open(DATA_FILE, "w", encoding="utf-8") as handle:
-        json.dump({name: player.to_dict() for name, player in TEAM.items()}, handle, indent=2)
+    with SHARED.lock():
+        merge_saved(SHARED.changed())
+        SHARED.write(COMPACT_FILE, compact_dumps(TEAM.values(), ROLLUPS))
+        _save_plays()
+        SHARED.write(TRENDS_FILE, _trends_bytes())
 # Ensure we also save on normal interpreter exit (extra safety)
 atexit.register(save_data)
 
 
 def load_data():
-    if not os.path.exists(DATA_FILE):
+    # upgrading the old JSON files writes the compact file, so that needs the exclusive lock
+    with SHARED.lock(shared=os.path.exists(COMPACT_FILE)):
+        _load_data()
+
+
+def _load_data():
+    data = SHARED.read(COMPACT_FILE)
+    compact = data is not None
+    if not compact and not os.path.exists(DATA_FILE):
         return
+    TEAM.clear()
     try:
-        with open(DATA_FILE, "r", encoding="utf-8") as handle:
-            data = json.load(handle)
+        if compact:
+            players, _ = compact_loads(data, ROLLUPS)
+        else:  # saved before the compact file; upgraded below
+            with open(DATA_FILE, "r", encoding="utf-8") as handle:
+                players = [Player.from_dict(name, payload) for name, payload in json.load(handle).items()]
+        TEAM.update((player.name, player) for player in players)
+    except (json.JSONDecodeError, OSError, ValueError, IndexError, KeyError):
         TEAM.clear()
-        for name, payload in data.items():
-            TEAM[name] = Player.from_dict(name, payload)
+        ROLLUPS.restore({})
+    NAMES.rebuild(TEAM)
+    LEADERS.rebuild(TEAM.values())
+    CHARTS.rebuild(TEAM.values())
+    try:
+        data = SHARED.read(PLAYS_FILE)
+        if data is not None:
+            PLAYS.restore(parse_event_lines(data))
+            _plays_on_disk(list(PLAYS.events))
+        else:  # saved before the log was JSON lines; written out on the next save
+            PLAYS.restore(PlayByPlay.load(LEGACY_PLAYS_FILE).events)
+            PLAYS_SAVED.update(events=[], version=None)
+    except (json.JSONDecodeError, OSError, KeyError, ValueError):
+        PLAYS.restore([])
+        PLAYS_SAVED.update(events=[], version=None)
+    TRENDS.clear()
+    try:
+        data = SHARED.read(TRENDS_FILE)
+        for name, payload in json.loads(data or b"{}").items():
+            TRENDS[name] = PlayerTrend.from_dict(payload)
     except (json.JSONDecodeError, OSError):
-        TEAM.clear()
+        TRENDS.clear()
+    if not compact:
+        ROLLUPS.restore({})
+        if os.path.exists(ROLLUPS_FILE):
+            try:
+                with open(ROLLUPS_FILE, "r", encoding="utf-8") as handle:
+                    ROLLUPS.restore(json.load(handle))
+            except (json.JSONDecodeError, OSError, KeyError, ValueError):
+                ROLLUPS.restore({})
+    SIMILAR.rebuild(season_entries(ROLLUPS.seasons))
+    if not compact:
+        save_data()
 
 
 class BasketballApp:
@@ -232,10 +239,15 @@ class BasketballApp:
         self.root.geometry("1100x800")  # was 900x650
         self.root.minsize(1000, 700)    # ensure the window stays larger
         self.last_state = None
+        self.last_plays = None
+        self.last_trends = None
+        self.last_rollups = None
 
         load_data()
         self.build_layout()
         self.refresh_views()
+        MERGE_LISTENERS.append(self.forget_undo)
+        self.root.after(POLL_MS, self.poll_shared)
         # Save on window close
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
@@ -256,8 +268,14 @@ class BasketballApp:
         left.rowconfigure(1, weight=1)
 
         ttk.Label(left, text="Players", font=("Helvetica", 16, "bold")).grid(row=0, column=0, pady=(0, 8))
-        self.player_list = tk.Listbox(left, height=20, exportselection=False)
-        self.player_list.grid(row=1, column=0, sticky="nsew")
+        roster = ttk.Frame(left)
+        roster.grid(row=1, column=0, sticky="nsew")
+        # type to filter the roster (see name_index.py)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *_: self.refresh_views())
+        ttk.Entry(roster, textvariable=self.filter_var).pack(fill=tk.X, pady=(0, 4))
+        self.player_list = tk.Listbox(roster, height=20, exportselection=False)
+        self.player_list.pack(fill=tk.BOTH, expand=True)
         self.player_list.bind("<<ListboxSelect>>", lambda _: self.refresh_views())
 
         btn_frame = ttk.Frame(left)
@@ -267,6 +285,7 @@ class BasketballApp:
             ("Remove Player", self.remove_player),
             ("Rename Player", self.rename_player),
             ("Export CSV", self.export_csv),
+            ("Export Columnar", self.export_columnar),
             ("Report", self.show_report),
             ("Save Now", lambda: save_data() or messagebox.showinfo("Saved", "Data saved.")),
         ):
@@ -275,6 +294,22 @@ class BasketballApp:
         self.team_score = ttk.Label(left, text="Team Score: 0.0%", font=("Helvetica", 18, "bold"), foreground="#1a73e8")
         self.team_score.grid(row=3, column=0, pady=(20, 0))
 
+        # Game clock: when a game is filled in, every event is also logged play-by-play
+        clock_frame = ttk.LabelFrame(left, text="Game Clock", padding=6)
+        clock_frame.grid(row=4, column=0, pady=(16, 0), sticky="ew")
+        self.game_var = tk.StringVar()
+        self.period_var = tk.StringVar(value="1")
+        self.clock_var = tk.StringVar(value="10:00")
+        self.season_var = tk.StringVar(value=default_season())
+        for idx, (label, widget) in enumerate((
+            ("Season", ttk.Entry(clock_frame, textvariable=self.season_var, width=12)),
+            ("Game", ttk.Entry(clock_frame, textvariable=self.game_var, width=12)),
+            ("Period", ttk.Spinbox(clock_frame, from_=1, to=9, textvariable=self.period_var, width=4)),
+            ("Clock", ttk.Entry(clock_frame, textvariable=self.clock_var, width=8)),
+        )):
+            ttk.Label(clock_frame, text=label).grid(row=idx, column=0, sticky="e", padx=(0, 6), pady=2)
+            widget.grid(row=idx, column=1, sticky="w", pady=2)
+
     def build_right_panel(self, parent):
         right = ttk.Frame(parent)
         right.grid(row=0, column=1, sticky="nsew")
@@ -300,10 +335,12 @@ class BasketballApp:
         offense_tab = ttk.Frame(actions_nb)
         defense_tab = ttk.Frame(actions_nb)
         general_tab = ttk.Frame(actions_nb)
+        game_tab = ttk.Frame(actions_nb)
 
         actions_nb.add(offense_tab, text="Offense")
         actions_nb.add(defense_tab, text="Defense")
         actions_nb.add(general_tab, text="General")
+        actions_nb.add(game_tab, text="Game")
 
         # Helper to add buttons in a compact 2-column grid
         def add_buttons_grid(parent, buttons, cols=2):
@@ -318,6 +355,8 @@ class BasketballApp:
             offense_tab,
             [
                 ("Record Shot", self.record_shot_flow),
+                ("Shot at Location", self.record_located_shot_flow),
+                ("Shot Chart", self.show_shot_chart),
                 ("Strike Pass", self.record_strike_flow),
                 ("Record Cut", self.record_cut_flow),
             ],
@@ -345,6 +384,22 @@ class BasketballApp:
             ],
             cols=2,
         )
+        # Game buttons (need the Game Clock filled in)
+        add_buttons_grid(
+            game_tab,
+            [
+                ("Set Lineup", self.set_lineup_flow),
+                ("Opponent Possession", self.opponent_flow),
+                ("Lineup Report", self.show_lineup_report),
+                ("Close Game", self.close_game),
+                ("Trends", self.show_trends),
+                ("Season Report", self.show_season_report),
+                ("Project Points", self.show_projection),
+                ("Similar Players", self.show_similar),
+            ],
+            cols=2,
+        )
+
         # Put Undo as a full-width button at the bottom of General tab
         general_tab.rowconfigure(99, weight=1)
         self.undo_btn = ttk.Button(general_tab, text="Undo Last", command=self.undo_last, state=tk.DISABLED)
@@ -356,10 +411,41 @@ class BasketballApp:
             return None
         return self.player_list.get(selection[0])
 
+    def game_stamp(self):
+        """Stamp for the current game clock, or None when no game is entered."""
+        game = self.game_var.get().strip()
+        if not game:
+            return None
+        try:
+            return PLAYS.stamp(game, int(self.period_var.get()), self.clock_var.get())
+        except ValueError:
+            messagebox.showerror("Game Clock", "Use a whole period number and a clock like 7:32.")
+            return None
+
+    def period_splits(self, name):
+        if name not in PLAYS.players():
+            return ""
+        lines = ["BY PERIOD (play-by-play)"]
+        for period in range(1, max(PLAYS.max_period, PLAYS.regulation_periods) + 1):
+            window = PLAYS.as_player(name, PLAYS.period_totals(name, period))
+            label = f"Q{period}" if period <= PLAYS.regulation_periods else f"OT{period - PLAYS.regulation_periods}"
+            lines.append(
+                f"  {label:<4} Pts {window.points:>3} | FG {window.shots_made()}/{window.total_shots()} | "
+                f"TS% {window.calc_ts()} | Ast {window.assists} | TO {window.turnovers}"
+            )
+        last = PLAYS.regulation_periods
+        clutch = PLAYS.as_player(name, PLAYS.clock_range(name, last, 300))
+        lines.append(
+            f"  Last {format_clock(300)} of Q{last}: Pts {clutch.points} | "
+            f"FG {clutch.shots_made()}/{clutch.total_shots()} | TS% {clutch.calc_ts()}"
+        )
+        return "\n".join(lines) + "\n"
+
     def refresh_views(self):
         selected_name = self.current_player_name()
         self.player_list.delete(0, tk.END)
-        names = sorted(TEAM.keys())
+        query = self.filter_var.get()
+        names = NAMES.search(query, limit=None) if query.strip() else sorted(TEAM.keys())
         for name in names:
             self.player_list.insert(tk.END, name)
         if selected_name in names:
@@ -412,7 +498,17 @@ class BasketballApp:
                 f"ADVANCED METRICS\n"
                 f"  PER: {player.calc_per()} | TS%: {player.calc_ts()} | A/T: {player.calc_ast_to_tov()} | "
                 f"Usage%: {player.calc_usage(team_pos)} | BPM: {player.calc_bpm()}\n"
+                f"  Rank of {len(TEAM)}: " + " | ".join(
+                    f"{metric} #{LEADERS.rank(metric, player.name)} (p{LEADERS.percentile(metric, player.name):.0f})"
+                    for metric in RANKED_METRICS
+                ) + "\n"
             )
+            splits = self.period_splits(player.name)
+            if splits:
+                summary += "\n" + splits
+        elif TEAM:
+            summary = f"No player matches '{query.strip()}'."
+            self.player_title.configure(text="Select a Player")
         else:
             summary = "No players yet.\nUse 'Add Player' to begin."
             self.player_title.configure(text="Select a Player")
@@ -466,10 +562,79 @@ class BasketballApp:
         if contested is None:
             return
         self.store_state()
-        TEAM[name].record_shot(shot_type, made, contested)
+        TEAM[name].record_shot(shot_type, made, contested, when=self.game_stamp())
+        LEADERS.update(TEAM[name])
         save_data()
         self.refresh_views()
 
+    def court_canvas(self, parent):
+        return tk.Canvas(
+            parent, width=COURT_WIDTH * COURT_SCALE, height=HALF_COURT * COURT_SCALE, bg="#f4ead8", highlightthickness=0
+        )
+
+    def ask_court_point(self):
+        """Let the user click a spot on the half court; (x, y) in feet or None."""
+        point = {"value": None}
+        dlg = tk.Toplevel(self.root)
+        dlg.title("Shot Location")
+        dlg.transient(self.root)
+        dlg.grab_set()
+        ttk.Label(dlg, text="Click where the shot was taken (basket at the top).").pack(padx=8, pady=6)
+        canvas = self.court_canvas(dlg)
+        canvas.pack(padx=8, pady=4)
+        draw_court_lines(canvas)
+
+        def click(event):
+            point["value"] = (event.x / COURT_SCALE - COURT_WIDTH / 2, event.y / COURT_SCALE)
+            dlg.destroy()
+
+        canvas.bind("<Button-1>", click)
+        ttk.Button(dlg, text="Cancel", command=dlg.destroy).pack(pady=6)
+        dlg.wait_window()
+        return point["value"]
+
+    def record_located_shot_flow(self):
+        name = self.current_player_name()
+        if not name:
+            messagebox.showinfo("Info", "Select a player first.")
+            return
+        point = self.ask_court_point()
+        if point is None:
+            return
+        x, y = point
+        shot_type = classify_shot(x, y)
+        made = self.choice_dialog("Shot Result", f"{shot_type} - was the shot made?", [("Made", True), ("Missed", False)])
+        if made is None:
+            return
+        contested = self.choice_dialog("Shot Contest", "Was it contested?", [("Contested", True), ("Uncontested", False)])
+        if contested is None:
+            return
+        self.store_state()
+        TEAM[name].record_shot(shot_type, made, contested, x=x, y=y, when=self.game_stamp())
+        CHARTS.add(name, x, y, made)
+        LEADERS.update(TEAM[name])
+        save_data()
+        self.refresh_views()
+
+    def show_shot_chart(self):
+        # selected player's chart, or the team's when nobody is selected
+        name = self.current_player_name()
+        chart = CHARTS.chart(name)
+        win = tk.Toplevel(self.root)
+        win.title(f"Shot Chart: {name or 'Team'}")
+        ttk.Label(
+            win, text=f"{name or 'Team'}: {chart.made}/{chart.attempts} located shots (colour = make rate, size = volume)"
+        ).pack(padx=8, pady=6)
+        canvas = self.court_canvas(win)
+        canvas.pack(padx=8, pady=8)
+        most = chart.max_attempts()
+        for key, (made, attempts) in chart.counts.items():
+            outline = chart.bins.outline(key, bin_scale(attempts, most))
+            canvas.create_polygon(
+                *[c for point in outline for c in court_px(*point)], fill=heat_color(made / attempts), outline=""
+            )
+        draw_court_lines(canvas)
+
     def record_strike_flow(self):
         name = self.current_player_name()
         if not name:
@@ -482,7 +647,8 @@ class BasketballApp:
         if result is None:
             return
         self.store_state()
-        TEAM[name].record_strike_pass(kind, result)
+        TEAM[name].record_strike_pass(kind, result, when=self.game_stamp())
+        LEADERS.update(TEAM[name])
         save_data()
         self.refresh_views()
 
@@ -499,7 +665,8 @@ class BasketballApp:
         if result is None:
             return
         self.store_state()
-        TEAM[name].record_cut(result)
+        TEAM[name].record_cut(result, when=self.game_stamp())
+        LEADERS.update(TEAM[name])
         save_data()
         self.refresh_views()
 
@@ -516,7 +683,8 @@ class BasketballApp:
         if result is None:
             return
         self.store_state()
-        TEAM[name].record_paint_touch(result)
+        TEAM[name].record_paint_touch(result, when=self.game_stamp())
+        LEADERS.update(TEAM[name])
         save_data()
         self.refresh_views()
 
@@ -532,10 +700,180 @@ class BasketballApp:
         if made is None:
             return
         self.store_state()
-        TEAM[name].record_defense(bool(contested), bool(made))
+        TEAM[name].record_defense(bool(contested), bool(made), when=self.game_stamp())
+        LEADERS.update(TEAM[name])
+        save_data()
+        self.refresh_views()
+
+    def set_lineup_flow(self):
+        when = self.game_stamp()
+        if when is None:
+            messagebox.showinfo("Info", "Enter the game in the Game Clock box first.")
+            return
+        on_floor = set(LINEUPS.on_floor(when.game_id))
+        dlg = tk.Toplevel(self.root)
+        dlg.title("Set Lineup")
+        dlg.transient(self.root)
+        dlg.grab_set()
+        ttk.Label(dlg, text=f"On the floor at {format_clock(when.clock)} of period {when.period}:").pack(padx=12, pady=10)
+        checks = {}
+        for name in sorted(TEAM.keys()):
+            checks[name] = tk.BooleanVar(value=name in on_floor)
+            ttk.Checkbutton(dlg, text=name, variable=checks[name]).pack(anchor=tk.W, padx=12)
+
+        def ok():
+            chosen = {name for name, var in checks.items() if var.get()}
+            if len(chosen) > 5:
+                messagebox.showerror("Lineup", "Pick at most five players.", parent=dlg)
+                return
+            self.store_state()
+            PLAYS.substitute(when, sorted(chosen - on_floor), sorted(on_floor - chosen))
+            save_data()
+            dlg.destroy()
+            self.refresh_views()
+
+        ttk.Button(dlg, text="OK", command=ok).pack(pady=10)
+        dlg.wait_window()
+
+    def opponent_flow(self):
+        when = self.game_stamp()
+        if when is None:
+            messagebox.showinfo("Info", "Enter the game in the Game Clock box first.")
+            return
+        points = self.choice_dialog("Opponent", "Opponent possession result:", [("No score", 0), ("1 pt", 1), ("2 pts", 2), ("3 pts", 3)])
+        if points is None:
+            return
+        self.store_state()
+        PLAYS.opponent_possession(when, int(points))
+        save_data()
+        self.refresh_views()
+
+    def show_lineup_report(self):
+        win = tk.Toplevel(self.root)
+        win.title("Lineups")
+        win.geometry("900x500")
+        txt = tk.Text(win, wrap=tk.NONE, font=("Courier New", 11))
+        txt.pack(fill=tk.BOTH, expand=True)
+        txt.insert(tk.END, lineup_report(LINEUPS))
+        txt.config(state=tk.DISABLED)
+
+    def close_game(self):
+        if not TEAM:
+            messagebox.showinfo("Info", "No players.")
+            return
+        game = self.game_var.get().strip() or f"Game {1 + max((t.closed for t in TRENDS.values()), default=0)}"
+        season = self.season_var.get().strip() or default_season()
+        if ROLLUPS.has_game(season, game):
+            messagebox.showerror("Close Game", f"{game} is already closed for season {season}.")
+            return
+        if not messagebox.askyesno("Close Game", f"Close {game} ({season})? Each player's stats since the last close become one game in their trends and season totals."):
+            return
+        self.store_state()
+        for name, player in TEAM.items():
+            TRENDS.setdefault(name, PlayerTrend()).close_game(game, player)
+        for line in ROLLUPS.close_game(season, game, TEAM.values()):
+            key = (line.season, line.name)
+            SIMILAR.update(key, season_counters(ROLLUPS.seasons[key]))
         save_data()
         self.refresh_views()
 
+    def show_season_report(self):
+        seasons = ROLLUPS.season_names()
+        if not seasons:
+            messagebox.showinfo("Season Report", "No closed games yet. Use Close Game after each game.")
+            return
+        fields = ROLLUP_FIELDS[1:]
+        header = f"{'':<20}" + "".join(f"{f:>9}" for f in fields)
+
+        def row(values):
+            return f"{values['name'][:19]:<20}" + "".join(f"{values[f]:>9}" for f in fields)
+
+        lines = []
+        for season in seasons:
+            lines += [f"SEASON {season}", header] + [row(r) for r in ROLLUPS.report("season", season)] + [""]
+        lines += ["CAREER", header] + [row(r) for r in ROLLUPS.report("career")]
+
+        win = tk.Toplevel(self.root)
+        win.title("Season Report")
+        win.geometry("1000x520")
+        txt = tk.Text(win, wrap=tk.NONE, font=("Courier New", 11))
+        txt.pack(fill=tk.BOTH, expand=True)
+        txt.insert(tk.END, "\n".join(lines))
+        txt.config(state=tk.DISABLED)
+
+    def show_trends(self):
+        name = self.current_player_name()
+        if not name:
+            messagebox.showinfo("Info", "Select a player first.")
+            return
+        trend = TRENDS.get(name)
+        if trend is None or not trend.games:
+            messagebox.showinfo("Trends", f"No closed games for {name} yet. Use Close Game after each game.")
+            return
+        summary = trend.summary(name)
+        header = f"{'':<14}" + "".join(f"{m:>9}" for m in TREND_METRICS)
+
+        def row(label, values):
+            return f"{label:<14}" + "".join(f"{values[m]:>9}" for m in TREND_METRICS)
+
+        lines = [f"{name}: last {summary['window']} of {summary['games_closed']} games", "", header]
+        lines.append(row(f"Last {summary['window']}", summary["rolling"]))
+        lines.append(row("EWMA", summary["ewma"]))
+        lines.append("")
+        lines.extend(row(str(game["game"])[:13], game) for game in reversed(summary["games"]))
+
+        win = tk.Toplevel(self.root)
+        win.title(f"Trends: {name}")
+        win.geometry("640x360")
+        txt = tk.Text(win, wrap=tk.NONE, font=("Courier New", 11))
+        txt.pack(fill=tk.BOTH, expand=True)
+        txt.insert(tk.END, "\n".join(lines))
+        txt.config(state=tk.DISABLED)
+
+    def show_similar(self):
+        name = self.current_player_name()
+        if not name:
+            messagebox.showinfo("Info", "Select a player first.")
+            return
+        seasons = SIMILAR.seasons_of(name)
+        if seasons:
+            label = f"{name} ({seasons[-1]})"
+            found = SIMILAR.similar(name, seasons[-1], k=10)
+        else:
+            # nothing closed yet: compare the running totals
+            vector = stat_vector(flatten_counters(TEAM[name]))
+            label = f"{name} (current totals)"
+            found = SIMILAR.similar(name, k=10, vector=vector) if vector else []
+        if not found:
+            messagebox.showinfo("Similar Players", "No other player-seasons to compare yet. Use Close Game after each game.")
+            return
+        lines = [f"Most like {label}", "", f"{'Player':<20}{'Season':<12}{'Distance':>9}"]
+        lines += [f"{other[:19]:<20}{season[:11]:<12}{distance:>9}" for (season, other), distance in found]
+
+        win = tk.Toplevel(self.root)
+        win.title(f"Similar: {name}")
+        win.geometry("480x320")
+        txt = tk.Text(win, wrap=tk.NONE, font=("Courier New", 11))
+        txt.pack(fill=tk.BOTH, expand=True)
+        txt.insert(tk.END, "\n".join(lines))
+        txt.config(state=tk.DISABLED)
+
+    def show_projection(self):
+        # 100k games is instant with numpy; the pure-Python fallback gets fewer
+        games = 100_000 if simulator.np is not None else 10_000
+        try:
+            result = simulator.simulate(TEAM.values(), games=games)
+        except ValueError:
+            messagebox.showinfo("Project Points", "Record some shots first.")
+            return
+        win = tk.Toplevel(self.root)
+        win.title("Projected Points")
+        win.geometry("720x420")
+        txt = tk.Text(win, wrap=tk.NONE, font=("Courier New", 11))
+        txt.pack(fill=tk.BOTH, expand=True)
+        txt.insert(tk.END, simulator.format_summary(result.summary()))
+        txt.config(state=tk.DISABLED)
+
     def add_player(self):
         name = simpledialog.askstring("Add Player", "Player name:", parent=self.root)
         if not name:
@@ -547,11 +885,24 @@ class BasketballApp:
         if name in TEAM:
             messagebox.showerror("Duplicate", "Player already exists.")
             return
+        if not self.confirm_new_name(name):
+            return
         self.store_state()
         TEAM[name] = Player(name)
+        NAMES.add(name)
+        LEADERS.update(TEAM[name])
         save_data()
         self.refresh_views()
 
+    def confirm_new_name(self, name, ignore=()):
+        """Ask before adding a name that looks like one on the roster ("Jon Smith" / "John Smith")."""
+        similar = NAMES.duplicates(name, ignore=ignore)
+        if not similar:
+            return True
+        return messagebox.askyesno(
+            "Possible Duplicate", f"{name} looks like {', '.join(similar[:3])}.\nUse it anyway?", parent=self.root
+        )
+
     def remove_player(self):
         name = self.current_player_name()
         if not name:
@@ -560,6 +911,13 @@ class BasketballApp:
             return
         self.store_state()
         del TEAM[name]
+        NAMES.remove(name)
+        LEADERS.remove(name)
+        CHARTS.remove(name)
+        INTERVALS.discard(name)
+        TRENDS.pop(name, None)
+        ROLLUPS.remove_player(name)
+        SIMILAR.rebuild(season_entries(ROLLUPS.seasons))
         save_data()
         self.refresh_views()
 
@@ -577,11 +935,21 @@ class BasketballApp:
         if new_name in TEAM and new_name != name:
             messagebox.showerror("Duplicate", "Player already exists.")
             return
-        if new_name == name:
+        if new_name == name or not self.confirm_new_name(new_name, ignore=name):
             return
         self.store_state()
         TEAM[new_name] = TEAM.pop(name)
         TEAM[new_name].name = new_name
+        NAMES.rename(name, new_name)
+        LEADERS.remove(name)
+        LEADERS.update(TEAM[new_name])
+        PLAYS.rename_player(name, new_name)
+        CHARTS.rename(name, new_name)
+        INTERVALS.discard(name)
+        if name in TRENDS:
+            TRENDS[new_name] = TRENDS.pop(name)
+        ROLLUPS.rename_player(name, new_name)
+        SIMILAR.rebuild(season_entries(ROLLUPS.seasons))
         save_data()
         self.refresh_views()
 
@@ -591,8 +959,8 @@ class BasketballApp:
             messagebox.showinfo("Info", "Select a player first.")
             return
         self.store_state()
-        player = TEAM[name]
-        setattr(player, attr, getattr(player, attr) + 1)
+        TEAM[name].record_stat(attr, when=self.game_stamp())
+        LEADERS.update(TEAM[name])
         save_data()
         self.refresh_views()
 
@@ -632,6 +1000,7 @@ class BasketballApp:
             player.assists = max(0, new_assists)
             player.rebounds = max(0, new_rebounds)
             player.turnovers = max(0, new_turnovers)
+            LEADERS.update(player)
             save_data()
             self.refresh_views()
             popup.destroy()
@@ -641,7 +1010,8 @@ class BasketballApp:
 
     def apply_shot(self, name, shot_type, made, contested):
         self.store_state()
-        TEAM[name].record_shot(shot_type, made, contested)
+        TEAM[name].record_shot(shot_type, made, contested, when=self.game_stamp())
+        LEADERS.update(TEAM[name])
         save_data()
         self.refresh_views()
 
@@ -651,24 +1021,13 @@ class BasketballApp:
             return
         team_pos = get_team_possessions()
         output = StringIO()
-        headers = ["name", "points", "assists", "rebounds", "turnovers", "PER", "TS%", "A/T", "Usage%", "BPM"]
-        writer = csv.DictWriter(output, fieldnames=headers)
+        writer = csv.DictWriter(output, fieldnames=SUMMARY_FIELDS + INTERVAL_FIELDS + RANK_FIELDS)
         writer.writeheader()
         for player in sorted(TEAM.values(), key=lambda p: p.name):
-            writer.writerow(
-                {
-                    "name": player.name,
-                    "points": player.points,
-                    "assists": player.assists,
-                    "rebounds": player.rebounds,
-                    "turnovers": player.turnovers,
-                    "PER": player.calc_per(),
-                    "TS%": player.calc_ts(),
-                    "A/T": player.calc_ast_to_tov(),
-                    "Usage%": player.calc_usage(team_pos),
-                    "BPM": player.calc_bpm(),
-                }
-            )
+            row = summary_row(player, team_pos)
+            row.update(INTERVALS.row(player))
+            row.update(LEADERS.rank_row(player.name))
+            writer.writerow(row)
         try:
             with open("team_report.csv", "w", newline="", encoding="utf-8") as handle:
                 handle.write(output.getvalue())
@@ -676,17 +1035,60 @@ class BasketballApp:
         except OSError as error:
             messagebox.showerror("Error", f"Could not write CSV:\n{error}")
 
+    def export_columnar(self):
+        if not TEAM:
+            messagebox.showinfo("Info", "No players to export.")
+            return
+        try:
+            paths = export_season(TEAM.values(), PLAYS.events, "team")
+        except (OSError, RuntimeError) as error:
+            messagebox.showerror("Error", f"Could not write export:\n{error}")
+            return
+        messagebox.showinfo("Exported", "Saved to\n" + "\n".join(os.path.abspath(p) for p in paths))
+
     def store_state(self):
         self.last_state = {name: data.to_dict() for name, data in TEAM.items()}
+        self.last_plays = PLAYS.snapshot()
+        self.last_trends = {name: trend.to_dict() for name, trend in TRENDS.items()}
+        self.last_rollups = ROLLUPS.to_dict()
         self.undo_btn.configure(state=tk.NORMAL)
 
+    def forget_undo(self):
+        # the snapshot predates what another window saved; restoring it would drop their changes
+        self.last_state = None
+        self.last_plays = None
+        self.last_trends = None
+        self.last_rollups = None
+        self.undo_btn.configure(state=tk.DISABLED)
+
+    def poll_shared(self):
+        """Pick up what other windows saved to the data directory."""
+        if SHARED.changed():
+            with SHARED.lock(shared=True):
+                merged = merge_saved(SHARED.changed())
+            if merged:
+                self.refresh_views()
+        self.root.after(POLL_MS, self.poll_shared)
+
     def undo_last(self):
         if not self.last_state:
             return
         TEAM.clear()
         for name, payload in self.last_state.items():
             TEAM[name] = Player.from_dict(name, payload)
+        NAMES.rebuild(TEAM)
+        LEADERS.rebuild(TEAM.values())
+        CHARTS.rebuild(TEAM.values())
+        PLAYS.restore(self.last_plays)
+        TRENDS.clear()
+        for name, payload in self.last_trends.items():
+            TRENDS[name] = PlayerTrend.from_dict(payload)
+        ROLLUPS.restore(self.last_rollups)
+        SIMILAR.rebuild(season_entries(ROLLUPS.seasons))
         self.last_state = None
+        self.last_plays = None
+        self.last_trends = None
+        self.last_rollups = None
         self.undo_btn.configure(state=tk.DISABLED)
         save_data()
         self.refresh_views()
@@ -750,6 +1152,18 @@ class BasketballApp:
             f"Paint {team['pt_total']} (M {team['pt_m']}, X {team['pt_x']}, K {team['pt_k']})\n"
             f"Defense C(M {team['def_cm']}, X {team['def_cx']}), U(M {team['def_um']}, X {team['def_ux']})\n"
         )
+        team_pos = get_team_possessions()
+        interval_lines = []
+        for p in sorted(TEAM.values(), key=lambda x: x.name):
+            row, intervals = summary_row(p, team_pos), INTERVALS.intervals(p)
+            interval_lines.append(f"{p.name}: " + ", ".join(
+                f"{metric} {format_interval(row[metric], intervals[metric])}" for metric in INTERVAL_METRICS
+            ))
+        report += "\nMETRICS (95% bootstrap intervals)\n" + "\n".join(interval_lines) + "\n"
+        report += "\nLEADERS\n" + "\n".join(
+            f"{metric:<8}" + ", ".join(f"{i}. {name} {value}" for i, (name, value) in enumerate(LEADERS.top(metric, 3, team_pos), 1))
+            for metric in RANKED_METRICS
+        ) + "\n"
 
         win = tk.Toplevel(self.root)
         win.title("Team Report")
@@ -770,4 +1184,6 @@ class BasketballApp:
 if __name__ == "__main__":
     root = tk.Tk()
     BasketballApp(root)
+    if os.environ.get("BASKETBALL_EXIT_AFTER_START"):  # startup_bench.py: quit once the window is up
+        root.after_idle(root.destroy)
     root.mainloop()
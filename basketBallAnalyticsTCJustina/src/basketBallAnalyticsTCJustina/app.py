@@ -1,25 +1,128 @@
 """
 This Python application is a Basketball Analytics Tracker built with the tkinter library, designed to record and analyze a team's and individual players' statistics. It allows users to add, remove, and track various on-court events for players, including basic stats (points, assists, rebounds, turnovers, and different shot types), advanced metrics (PER, TS%, A/T ratio, Usage%, and BPM), and specific basketball actions like strike zone passing, cuts, paint touches allowed, and defensive outcomes. All data is persisted to a JSON file, and the application includes features for undoing the last action, editing totals, generating a full team report, and exporting data to a CSV file.
+
+The Toga client: buttons queue events on a Scorekeeper (pipeline.py),
+which applies them, recomputes metrics and saves off the UI loop; the
+table only receives the cells that changed.
 """
+import asyncio
+import re
 
 import toga
-from toga.style.pack import COLUMN, ROW
+from toga.style.pack import COLUMN, ROW, Pack
+
+from basketball_model import SUMMARY_FIELDS
+
+from .pipeline import Scorekeeper, load_players, save_payload
+
+DATA_NAME = "basketball_data.json"
+# (label, Player method, args)
+EVENT_BUTTONS = [
+    ("Layup ✓", "record_shot", ("layup", True)),
+    ("Layup ✗", "record_shot", ("layup", False)),
+    ("Mid ✓", "record_shot", ("midrange", True)),
+    ("Mid ✗", "record_shot", ("midrange", False)),
+    ("3PT ✓", "record_shot", ("3pt", True)),
+    ("3PT ✗", "record_shot", ("3pt", False)),
+    ("AST", "record_stat", ("assists",)),
+    ("REB", "record_stat", ("rebounds",)),
+    ("TO", "record_stat", ("turnovers",)),
+]
+BUTTONS_PER_ROW = 3
+
+
+def accessor(field):
+    """Table accessor for a summary field: "TS%" -> "ts", "A/T" -> "a_t"."""
+    return re.sub(r"\W+", "_", field.lower()).strip("_")
+
+
+ACCESSORS = [accessor(field) for field in SUMMARY_FIELDS]
 
 
 class BasketballAnalyticsTCJustinaSolomon(toga.App):
     def startup(self):
-        """Construct and show the Toga application.
+        """Build the window; the data is loaded once the app is running."""
+        self.keeper = None
+        self.table_rows = {}  # name -> table row
 
-        Usually, you would add your application to a main content box.
-        We then create a main window (with a name matching the app), and
-        show the main window.
-        """
-        main_box = toga.Box()
+        self.name_input = toga.TextInput(placeholder="Player name", style=Pack(flex=1))
+        add_row = toga.Box(
+            children=[self.name_input, toga.Button("Add", on_press=self.add_player), toga.Button("Remove", on_press=self.remove_player)],
+            style=Pack(direction=ROW, margin=4),
+        )
+        self.player_select = toga.Selection(items=[], style=Pack(margin=4))
+        buttons = toga.Box(style=Pack(direction=COLUMN))
+        for start in range(0, len(EVENT_BUTTONS), BUTTONS_PER_ROW):
+            row = toga.Box(style=Pack(direction=ROW))
+            for label, method, args in EVENT_BUTTONS[start:start + BUTTONS_PER_ROW]:
+                row.add(toga.Button(label, on_press=self.recorder(method, args), style=Pack(flex=1, margin=2)))
+            buttons.add(row)
+        self.table = toga.Table(headings=SUMMARY_FIELDS, accessors=ACCESSORS, data=[], style=Pack(flex=1))
 
+        main_box = toga.Box(children=[add_row, self.player_select, buttons, self.table], style=Pack(direction=COLUMN))
         self.main_window = toga.MainWindow(title=self.formal_name)
         self.main_window.content = main_box
         self.main_window.show()
 
+    async def on_running(self):
+        self.paths.data.mkdir(parents=True, exist_ok=True)
+        path = str(self.paths.data / DATA_NAME)
+        try:
+            players = await asyncio.to_thread(load_players, path)
+        except (ValueError, KeyError, OSError):  # unreadable: start with an empty team
+            players = []
+        self.keeper = Scorekeeper(players, save=lambda payload: save_payload(path, payload), publish=self.apply_diff)
+        self.keeper.start()
+
+    def on_exit(self):
+        if self.keeper is not None:
+            self.keeper.save_now()
+        return True
+
+    # --- handlers: queue and return ---
+
+    def recorder(self, method, args):
+        def handler(widget):
+            name = self.player_select.value
+            if self.keeper is not None and name:
+                self.keeper.record(name, method, *args)
+        return handler
+
+    def add_player(self, widget):
+        name = self.name_input.value.strip()
+        if self.keeper is not None and name:
+            self.keeper.add_player(name)
+            self.name_input.value = ""
+
+    def remove_player(self, widget):
+        name = self.player_select.value
+        if self.keeper is not None and name:
+            self.keeper.remove_player(name)
+
+    # --- widgets, from the pipeline's diffs ---
+
+    def apply_diff(self, diff):
+        names_changed = False
+        for name, cells in diff.items():
+            row = self.table_rows.get(name)
+            if cells is None:
+                if row is not None:
+                    self.table.data.remove(row)
+                    del self.table_rows[name]
+                    names_changed = True
+            elif row is None:
+                self.table_rows[name] = self.table.data.append({accessor(f): v for f, v in cells.items()})
+                names_changed = True
+            else:
+                for field, value in cells.items():
+                    setattr(row, accessor(field), value)
+        if names_changed:
+            selected = self.player_select.value
+            names = sorted(self.table_rows)
+            self.player_select.items = names
+            if selected in names:
+                self.player_select.value = selected
+
 
 def main():
     return BasketballAnalyticsTCJustinaSolomon()
@@ -0,0 +1,161 @@
+"""Scorekeeping that keeps the UI loop free.
+
+Button handlers only put an event on an ``asyncio.Queue`` and return.
+One background task takes everything queued, applies it to the players
+in one batch, then:
+
+- recomputes the summary rows in a worker thread (every row: Usage%
+  depends on the whole team's possessions) and hands the UI only the
+  cells that changed since its last update, at most once per FRAME, so a
+  burst of taps is one widget update;
+- asks for a save; a second task writes the latest state in a worker
+  thread at most once per SAVE_DELAY.
+
+    keeper = Scorekeeper(players, save=write_file, publish=apply_diff)
+    keeper.start()
+    keeper.record("Ann", "record_shot", "3pt", True)   # from a button
+    await keeper.stop()                                # flushes and saves
+"""
+import asyncio
+import json
+import os
+import threading
+
+from basketball_model import Player, get_team_possessions, summary_row
+
+FRAME = 1 / 60
+SAVE_DELAY = 1.0
+RECORD_METHODS = {"record_shot", "record_stat", "record_strike_pass", "record_cut", "record_paint_touch", "record_defense"}
+
+
+def load_players(path):
+    """Players from a desktop-style ``basketball_data.json`` (none if it doesn't exist)."""
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except FileNotFoundError:
+        return []
+    return [Player.from_dict(name, payload) for name, payload in data.items()]
+
+
+def save_payload(path, payload):
+    """Write ``{name: player dict}`` atomically."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle)
+    os.replace(tmp, path)
+
+
+def summary_rows(players):
+    team_pos = get_team_possessions(players)
+    return {player.name: summary_row(player, team_pos) for player in players}
+
+
+def row_diff(old, new):
+    """``{name: {field: value}}`` of the cells that differ; a removed name maps to None."""
+    diff = {name: None for name in old if name not in new}
+    for name, row in new.items():
+        before = old.get(name)
+        if before is None:
+            diff[name] = dict(row)
+            continue
+        changed = {field: value for field, value in row.items() if before.get(field) != value}
+        if changed:
+            diff[name] = changed
+    return diff
+
+
+class Scorekeeper:
+    def __init__(self, players=(), save=None, publish=None, frame=FRAME, save_delay=SAVE_DELAY):
+        self.players = {player.name: player for player in players}
+        self.rows = {}  # summary rows as last published
+        self.queue = asyncio.Queue()
+        self._save = save
+        self._publish = publish
+        self.frame = frame
+        self.save_delay = save_delay
+        self._save_wanted = asyncio.Event()
+        self._write_lock = threading.Lock()  # a cancelled save's thread may still be writing
+        self._tasks = []
+
+    # --- called from UI handlers: queue and return ---
+
+    def record(self, name, method, *args):
+        if method not in RECORD_METHODS:
+            raise ValueError(f"not a record method: {method}")
+        self.queue.put_nowait(("record", name, method, args))
+
+    def add_player(self, name):
+        self.queue.put_nowait(("add", name, None, ()))
+
+    def remove_player(self, name):
+        self.queue.put_nowait(("remove", name, None, ()))
+
+    # --- background tasks ---
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._apply_loop()), asyncio.create_task(self._save_loop())]
+        self.queue.put_nowait(("refresh", None, None, ()))  # first publish: every row
+
+    async def stop(self):
+        """Apply what is queued, cancel the tasks and save once more."""
+        await self.queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.to_thread(self._write, self.snapshot())
+
+    def save_now(self):
+        """Apply what is queued and save, blocking; for when the app is closing and the loop won't run again."""
+        while not self.queue.empty():
+            self._apply(*self.queue.get_nowait())
+            self.queue.task_done()
+        self._write(self.snapshot())
+
+    def snapshot(self):
+        """What to save; taken on the loop so the worker thread never sees players mid-update."""
+        return {name: player.to_dict() for name, player in self.players.items()}
+
+    def _write(self, payload):
+        if self._save is not None:
+            with self._write_lock:
+                self._save(payload)
+
+    def _apply(self, action, name, method, args):
+        if action == "add":
+            self.players.setdefault(name, Player(name))
+        elif action == "remove":
+            self.players.pop(name, None)
+        elif action == "record" and name in self.players:
+            try:
+                getattr(self.players[name], method)(*args)
+            except (TypeError, ValueError, KeyError):  # a bad event mustn't stop scorekeeping
+                return False
+        return action != "refresh"
+
+    async def _apply_loop(self):
+        while True:
+            batch = [await self.queue.get()]
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                changed = [self._apply(*event) for event in batch]
+                rows = await asyncio.to_thread(summary_rows, list(self.players.values()))
+                diff = row_diff(self.rows, rows)
+                self.rows = rows
+                if diff and self._publish is not None:
+                    self._publish(diff)
+                if any(changed):
+                    self._save_wanted.set()
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            await asyncio.sleep(self.frame)  # taps during this frame land in the next batch
+
+    async def _save_loop(self):
+        while True:
+            await self._save_wanted.wait()
+            await asyncio.sleep(self.save_delay)
+            self._save_wanted.clear()
+            await asyncio.to_thread(self._write, self.snapshot())
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# run from the repo (pytest or briefcase dev --test): the app package and the shared model
+for path in (Path(__file__).parents[1] / "src", Path(__file__).parents[2]):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
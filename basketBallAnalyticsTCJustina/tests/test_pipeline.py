@@ -0,0 +1,43 @@
+import asyncio
+import json
+
+from basketball_model import Player
+from basketBallAnalyticsTCJustina.pipeline import Scorekeeper, load_players, row_diff, save_payload
+
+
+def test_row_diff_sends_only_changed_cells():
+    old = {"Ann": {"name": "Ann", "points": 2, "PER": 1.0}, "Ben": {"name": "Ben", "points": 0, "PER": 0}}
+    new = {"Ann": {"name": "Ann", "points": 5, "PER": 1.0}, "Cal": {"name": "Cal", "points": 0, "PER": 0}}
+    assert row_diff(old, new) == {"Ben": None, "Ann": {"points": 5}, "Cal": {"name": "Cal", "points": 0, "PER": 0}}
+    assert row_diff(new, new) == {}
+
+
+def test_burst_of_events_is_one_update_and_one_save(tmp_path):
+    path = str(tmp_path / "basketball_data.json")
+    save_payload(path, {"Ann": Player.from_dict("Ann", {"points": 10}).to_dict()})
+    diffs, saves = [], []
+
+    def save(payload):
+        saves.append(payload)
+        save_payload(path, payload)
+
+    async def run():
+        keeper = Scorekeeper(load_players(path), save=save, publish=diffs.append, frame=0.01, save_delay=0.05)
+        keeper.start()
+        await asyncio.sleep(0.05)
+        keeper.add_player("Ben")
+        for _ in range(20):
+            keeper.record("Ann", "record_shot", "3pt", True)
+        keeper.record("Ben", "record_stat", "rebounds")
+        keeper.record("Ben", "record_shot", "hook", "bad", "args", "here")  # skipped, doesn't stop the loop
+        await asyncio.sleep(0.2)
+        keeper.record("Ben", "record_stat", "assists")
+        await keeper.stop()
+
+    asyncio.run(run())
+    assert diffs[0] == {"Ann": diffs[0]["Ann"]} and diffs[0]["Ann"]["points"] == 10
+    assert diffs[1]["Ann"]["points"] == 70 and diffs[1]["Ben"]["rebounds"] == 1
+    assert diffs[-1]["Ben"]["assists"] == 1 and set(diffs[-1]["Ann"]) == {"Usage%"}  # team possessions moved
+    assert len(saves) <= 3
+    saved = json.load(open(path))
+    assert saved["Ann"]["points"] == 70 and saved["Ben"]["assists"] == 1
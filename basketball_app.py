@@ -4,6 +4,13 @@ import json
 import os
 import csv
 
+from play_by_play import flatten_counters, format_clock, play_logged
+from replay import CheckpointFile, Replay, set_counters
+from event_history import SpilledHistory, SpilledLog
+
+EVENTS_FILE = 'basketball_events.jsonl'  # the play-by-play log every stat is replayed from, one event per line
+HISTORY_DIR = 'basketball_history'  # older event_history entries, one segment file per player
+
 class Player:
     def __init__(self, name):
         self.name = name
@@ -36,6 +43,7 @@ class Player:
         self.event_history = []
         self.games_played = 1  # Add this line
 
+    @play_logged
     def add_shot(self, shot_type, made, contested=False):
         if made:
             self.shots[shot_type]['made'] += 1
@@ -47,6 +55,7 @@ class Player:
             if contested:
                 self.shots[shot_type]['contested_missed'] += 1
 
+    @play_logged
     def add_strike_zone_pass(self, made):
         self.strike_zone['balls']['total'] += 1
         if made:
@@ -55,6 +64,7 @@ class Player:
         else:
             self.strike_zone['balls']['missed'] += 1
 
+    @play_logged
     def add_cut(self, pass_to_cutter, shot_made):
         self.cuts['total'] += 1
         if pass_to_cutter:
@@ -65,6 +75,7 @@ class Player:
         else:
             self.cuts['missed_shot'] += 1
 
+    @play_logged
     def add_paint_touch(self, made, kick=False):
         self.paint_touches['total'] += 1
         if made:
@@ -75,6 +86,7 @@ class Player:
         if kick:
             self.paint_touches['kick'] += 1
 
+    @play_logged
     def add_defense(self, contested, made):
         if contested:
             self.defense['contested']['made' if made else 'missed'] += 1
@@ -86,6 +98,8 @@ class BasketballApp:
         self.root = root
         self.root.title("Basketball Analytics")
         self.players = {}
+        self.plays = SpilledLog(EVENTS_FILE)  # only the latest events in memory; the rest are read back from the file
+        self.replay = Replay(self.plays, checkpoints=CheckpointFile)
         self.load_data()
         self.create_ui()
 
@@ -111,11 +125,24 @@ class BasketballApp:
         ttk.Button(btn_frame, text="Delete", command=self.delete_player).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="Export CSV", command=self.export_csv).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="Undo", command=self.undo_last).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="Replay", command=self.show_replay).pack(side=tk.LEFT, padx=2)
 
         # Event recording
         ttk.Button(left_frame, text="Record Event", 
                   command=self.show_event_dialog).grid(row=3, column=0, columnspan=2, sticky="ew", pady=5)
 
+        # Game clock: every event is logged at this game / period / time left
+        clock_frame = ttk.LabelFrame(left_frame, text="Game Clock", padding="5")
+        clock_frame.grid(row=4, column=0, columnspan=2, sticky="ew", pady=5)
+        self.game_var = tk.StringVar(value="1")
+        self.period_var = tk.StringVar(value="1")
+        self.clock_var = tk.StringVar(value="10:00")
+        for column, (label, var, width) in enumerate(
+            [("Game", self.game_var, 8), ("Period", self.period_var, 3), ("Clock", self.clock_var, 6)]
+        ):
+            ttk.Label(clock_frame, text=label).grid(row=0, column=2 * column, padx=2)
+            ttk.Entry(clock_frame, textvariable=var, width=width).grid(row=0, column=2 * column + 1, padx=2)
+
         # Right side: Stats display
         self.stats_text = tk.Text(right_frame, width=50, height=30)
         self.stats_text.grid(row=0, column=0, sticky="nsew")
@@ -218,10 +245,23 @@ class BasketballApp:
         ttk.Button(dialog, text="Uncontested Missed", 
                  command=lambda: self.record_defense(dialog, False, contested=False)).pack(fill='x', padx=20, pady=2)
 
+    def stamp(self):
+        """When an event happened, from the Game Clock boxes."""
+        game = self.game_var.get().strip() or "1"
+        try:
+            return self.plays.stamp(game, int(self.period_var.get()), self.clock_var.get())
+        except ValueError:
+            messagebox.showwarning("Warning", "Period must be a number and clock M:SS; logging at the start of the game")
+            return self.plays.stamp(game, 1, self.plays.period_seconds)
+
+    def log_history(self, player, event, detail, made):
+        player.event_history.append({'Event': event, 'Detail': detail, 'Result': 'Made' if made else 'Missed'})
+
     def record_strike_zone_pass(self, dialog, made):
         player = self.get_selected_player()
         if player:
-            player.add_strike_zone_pass(made)
+            player.add_strike_zone_pass(made, when=self.stamp())
+            self.log_history(player, 'Strike Zone Pass', 'Ball', made)
             self.save_data()
             dialog.master.destroy()  # Close both dialogs
             messagebox.showinfo("Success", f"Strike zone pass recorded for {player.name}")
@@ -229,7 +269,8 @@ class BasketballApp:
     def record_cut(self, dialog, pass_to_cutter):
         player = self.get_selected_player()
         if player:
-            player.add_cut(pass_to_cutter, False)  # Shot made is False by default
+            player.add_cut(pass_to_cutter, False, when=self.stamp())  # Shot made is False by default
+            self.log_history(player, 'Cut', 'Pass to cutter' if pass_to_cutter else 'No pass', False)
             self.save_data()
             dialog.master.destroy()
             messagebox.showinfo("Success", f"Cut recorded for {player.name}")
@@ -237,14 +278,16 @@ class BasketballApp:
     def record_shot(self, dialog, shot_type, made):
         player = self.get_selected_player()
         if player:
-            player.add_shot(shot_type, made)
+            player.add_shot(shot_type, made, when=self.stamp())
+            self.log_history(player, 'Shot', shot_type, made)
             dialog.master.destroy()  # Close both dialogs
             messagebox.showinfo("Success", f"Shot recorded for {player.name}")
 
     def record_paint_touch_defense(self, dialog, made):
         player = self.get_selected_player()
         if player:
-            player.add_paint_touch(made)
+            player.add_paint_touch(made, when=self.stamp())
+            self.log_history(player, 'Paint Touch', '', made)
             self.save_data()
             dialog.master.destroy()
             messagebox.showinfo("Success", f"Paint touch defense recorded for {player.name}")
@@ -252,7 +295,8 @@ class BasketballApp:
     def record_defense(self, dialog, made, contested):
         player = self.get_selected_player()
         if player:
-            player.add_defense(contested, made)
+            player.add_defense(contested, made, when=self.stamp())
+            self.log_history(player, 'Defense', 'Contested' if contested else 'Uncontested', made)
             self.save_data()
             dialog.master.destroy()
             messagebox.showinfo("Success", f"Defense recorded for {player.name}")
@@ -332,9 +376,13 @@ Uncontested: {player.defense['uncontested']['made'] + player.defense['unconteste
 
     def save_data(self):
         try:
-            data = {name: vars(player) for name, player in self.players.items()}
+            data = {
+                name: dict(vars(player), event_history=player.event_history.to_dict())
+                for name, player in self.players.items()
+            }
             with open('basketball_data.json', 'w') as f:
                 json.dump(data, f)
+            self.plays.flush()
         except Exception as e:
             messagebox.showerror("Error", f"Could not save data: {e}")
 
@@ -347,9 +395,14 @@ Uncontested: {player.defense['uncontested']['made'] + player.defense['unconteste
                         player = Player(name)
                         for key, value in attrs.items():
                             setattr(player, key, value)
+                        player.event_history = SpilledHistory.restore(attrs.get('event_history'), HISTORY_DIR, name)
                         self.players[name] = player
+            self.plays.load()
         except Exception as e:
             messagebox.showerror("Error", f"Could not load data: {e}")
+        # counters recorded before the log was kept become the replay's starting point
+        totals = {name: flatten_counters(player) for name, player in self.players.items()}
+        self.replay = Replay.from_totals(self.plays, totals, checkpoints=CheckpointFile)
 
     def export_csv(self):
         player = self.get_selected_player()
@@ -376,13 +429,68 @@ Uncontested: {player.defense['uncontested']['made'] + player.defense['unconteste
 
     def undo_last(self):
         player = self.get_selected_player()
-        if player and player.event_history:
-            last_event = player.event_history.pop()
-            self.save_data()
-            self.update_stats_display()
-            messagebox.showinfo("Success", "Last event undone")
-        else:
+        last = self.plays.last_index(player.name) if player else None
+        if last is None:
             messagebox.showwarning("Warning", "No event to undo")
+            return
+        # drop the event from the log and replay the player's counters without it
+        self.plays.delete(last)
+        set_counters(player, self.replay.state_at(len(self.plays)).get(player.name, {}))
+        if player.event_history:
+            player.event_history.pop()
+        self.save_data()
+        self.update_stats_display()
+        messagebox.showinfo("Success", "Last event undone")
+
+    def show_replay(self):
+        total = len(self.replay)
+        if not total:
+            messagebox.showinfo("Replay", "No events logged yet")
+            return
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Replay")
+        label = ttk.Label(dialog)
+        label.pack(fill='x', padx=5, pady=5)
+        text = tk.Text(dialog, width=50, height=15)
+
+        def show(index):
+            index = int(float(index))
+            state = self.replay.state_at(index)
+            if index:
+                event = next(self.plays.iter_events(index - 1, index))
+                label.configure(text=f"Event {index} of {total}: {event.player} {event.kind}, "
+                                     f"game {event.game_id} Q{event.period} {format_clock(event.clock)}")
+            else:
+                label.configure(text=f"Before the first of {total} events")
+            lines = []
+            for name in sorted(self.players):
+                counters = state.get(name, {})
+                made = sum(v for k, v in counters.items() if k.startswith('shots.') and k.endswith('.made'))
+                missed = sum(v for k, v in counters.items() if k.startswith('shots.') and k.endswith('.missed'))
+                lines.append(f"{name}: {counters.get('points', 0)} pts, {made}/{made + missed} shots")
+            text.delete('1.0', tk.END)
+            text.insert('1.0', "\n".join(lines))
+
+        scale = ttk.Scale(dialog, from_=0, to=total, orient=tk.HORIZONTAL, length=400, command=show)
+        scale.pack(fill='x', padx=5)
+        text.pack(fill='both', expand=True, padx=5, pady=5)
+
+        jump = ttk.Frame(dialog)
+        jump.pack(fill='x', padx=5, pady=5)
+        game, period, clock = tk.StringVar(value=self.game_var.get()), tk.StringVar(value="4"), tk.StringVar(value="0:00")
+        for label_text, var, width in [("Game", game, 8), ("Period", period, 3), ("Clock", clock, 6)]:
+            ttk.Label(jump, text=label_text).pack(side=tk.LEFT, padx=2)
+            ttk.Entry(jump, textvariable=var, width=width).pack(side=tk.LEFT, padx=2)
+
+        def go():
+            try:
+                scale.set(self.replay.index_at(game.get().strip(), int(period.get()), clock.get()))
+            except ValueError:
+                messagebox.showwarning("Warning", "Period must be a number and clock M:SS")
+
+        ttk.Button(jump, text="Go", command=go).pack(side=tk.LEFT, padx=2)
+        scale.set(total)
+        show(total)
 
     def on_player_select(self, event):
         """Update the stats display when a player is selected"""
@@ -405,7 +513,9 @@ Uncontested: {player.defense['uncontested']['made'] + player.defense['unconteste
             if name in self.players:
                 messagebox.showwarning("Warning", "Player already exists")
                 return
-            self.players[name] = Player(name)
+            player = Player(name)
+            player.event_history = SpilledHistory(HISTORY_DIR, name)
+            self.players[name] = player
             self.save_data()
             self.update_player_list()
             dialog.destroy()
@@ -420,6 +530,9 @@ Uncontested: {player.defense['uncontested']['made'] + player.defense['unconteste
         
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete {player.name}?"):
             del self.players[player.name]
+            player.event_history.discard()
+            self.replay.base.pop(player.name, None)
+            self.plays.remove_player(player.name)
             self.save_data()
             self.update_player_list()
             self.update_stats_display()
@@ -0,0 +1,139 @@
+"""Reports from the command line: no window, nothing imports tkinter.
+
+    python -m basketball_cli report basketball_data.bbd
+    python -m basketball_cli report seasons/ --player Ann --player Ben --stat points --stat TS% --format csv --out nightly.csv
+    python -m basketball_cli report seasons/*.json --sort PER --top 5 --format json
+    python -m basketball_cli teams seasons/ archive/*.db --parallel --profile
+
+Reads every data file batch_metrics.py reads: the desktop app's
+``basketball_data.bbd``, a ``basketball_data.json`` from any of the apps,
+or the web app's sqlite ``data.db``; directories and globs are expanded.
+``report`` prints one row per player (PER, TS%, A/T, Usage%, BPM and the
+counting stats; ``--stat`` picks columns, tracking counters included),
+``teams`` one row per file. Output is an aligned text table, CSV or JSON,
+to stdout or ``--out``. ``--parallel`` spreads the files over worker
+processes; ``--profile`` prints where the time went to stderr. The exit
+status is 1 if a file couldn't be read (it is reported and skipped), so
+a cron job notices.
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+
+from basketball_model import SUMMARY_FIELDS, TRACKING_FIELDS
+from batch_metrics import TEAM_FIELDS, expand_paths, run_batch
+
+FORMATS = ("text", "csv", "json")
+PLAYER_STATS = SUMMARY_FIELDS[1:] + TRACKING_FIELDS
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) else float("-inf")
+
+
+def select_rows(rows, players=None, sort=None, top=None):
+    """Rows of the named players (any case), highest ``sort`` first, at most ``top``."""
+    if players:
+        wanted = {name.casefold() for name in players}
+        rows = [row for row in rows if row["name"].casefold() in wanted]
+    if sort:
+        rows = sorted(rows, key=lambda row: _number(row.get(sort)), reverse=True)
+    return rows[:top] if top else rows
+
+
+def format_rows(rows, fields, fmt):
+    if fmt == "json":
+        return json.dumps([{field: row.get(field) for field in fields} for row in rows], indent=2) + "\n"
+    if fmt == "csv":
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=fields, extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+        return output.getvalue()
+    cells = [fields] + [["" if row.get(field) is None else str(row.get(field)) for field in fields] for row in rows]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(fields))]
+    lines = []
+    for line in cells:
+        # text columns left, numbers right
+        lines.append("  ".join(
+            cell.ljust(width) if field in ("name", "source") else cell.rjust(width)
+            for field, cell, width in zip(fields, line, widths)
+        ).rstrip())
+    return "\n".join(lines) + "\n"
+
+
+def format_profile(timings, teams, players):
+    lines = [f"profile: {len(teams)} files, {players} players"]
+    for phase, seconds in timings.items():
+        lines.append(f"  {phase:<8}{seconds:>9.3f}s")
+    if teams:
+        slowest = max(teams, key=lambda team: team["seconds"])
+        mean = sum(team["seconds"] for team in teams) / len(teams)
+        lines.append(f"  per file: mean {mean:.3f}s, slowest {slowest['seconds']:.3f}s ({slowest['source']})")
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m basketball_cli", description="Player and team reports from data files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report = commands.add_parser("report", help="one row per player")
+    teams = commands.add_parser("teams", help="one row per data file")
+    for sub in (report, teams):
+        sub.add_argument("inputs", nargs="+", help="data files (.bbd, .json or sqlite .db), globs or directories")
+        sub.add_argument("--format", choices=FORMATS, default="text")
+        sub.add_argument("--out", help="write here instead of stdout")
+        sub.add_argument("--parallel", type=int, nargs="?", const=0, metavar="N",
+                         help="read files on N worker processes (default: one per CPU)")
+        sub.add_argument("--profile", action="store_true", help="print timings to stderr")
+    report.add_argument("--player", action="append", help="only this player (repeatable)")
+    report.add_argument("--stat", action="append", help=f"only these columns (repeatable): {', '.join(SUMMARY_FIELDS[1:])} or a tracking counter")
+    report.add_argument("--sort", help="highest first by this stat")
+    report.add_argument("--top", type=int, help="at most this many rows")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    is_report = args.command == "report"
+    stats = (args.stat or []) + ([args.sort] if args.sort else []) if is_report else []
+    unknown = [stat for stat in stats if stat not in PLAYER_STATS]
+    if unknown:
+        parser.error(f"unknown stat {', '.join(unknown)} (choose from {', '.join(PLAYER_STATS)})")
+
+    timings = {}
+    started = time.perf_counter()
+    paths = expand_paths(args.inputs)
+    timings["expand"] = time.perf_counter() - started
+    full = any(stat in TRACKING_FIELDS for stat in stats)
+    workers = 1 if args.parallel is None else (args.parallel or None)
+    teams, players, errors, timings["compute"] = run_batch(paths, workers=workers, full=full)
+
+    mark = time.perf_counter()
+    if is_report:
+        rows = select_rows(players, args.player, args.sort, args.top)
+        fields = ["source"] if len(paths) > 1 else []
+        fields += ["name"] + (args.stat or (SUMMARY_FIELDS[1:] + (TRACKING_FIELDS if full else [])))
+    else:
+        rows, fields = teams, TEAM_FIELDS
+    text = format_rows(rows, fields, args.format)
+    if args.out:
+        with open(args.out, "w", newline="", encoding="utf-8") as handle:
+            handle.write(text)
+    else:
+        sys.stdout.write(text)
+    timings["output"] = time.perf_counter() - mark
+    timings["total"] = time.perf_counter() - started
+
+    for path, error in errors:
+        print(f"skipped {path}: {error}", file=sys.stderr)
+    if args.profile:
+        print(format_profile(timings, teams, len(players)), file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""Player model and metric math shared by the desktop and web apps.
+
+Nothing in here imports tkinter or Flask so it can be used headless
+(web workers, exports, scripts).
+"""
+from array import array
+from collections import defaultdict
+
+from play_by_play import play_logged
+from shot_chart import decode_locations, encode_locations, pack_shot
+
+SHOT_TYPES = ("layup", "midrange", "3pt")
+
+# Fixed-point scale for base_score_units()
+SCORE_UNITS = 10**9
+
+SUMMARY_FIELDS = ["name", "points", "assists", "rebounds", "turnovers", "PER", "TS%", "A/T", "Usage%", "BPM"]
+
+# Flattened tracking counters, e.g. "layup_contested_made", "strike_zone_balls", "defense_uncontested_missed"
+TRACKING_FIELDS = (
+    [f"{t}_{k}" for t in SHOT_TYPES for k in ("made", "missed", "contested_made", "contested_missed")]
+    + [f"strike_zone_{k}" for k in ("balls", "strikes", "ball_made", "ball_missed", "strike_made", "strike_missed")]
+    + [f"cuts_{k}" for k in ("total", "pass_to_cutter", "made_shot", "missed_shot")]
+    + [f"paint_touches_{k}" for k in ("total", "made_shot", "missed_shot", "kick_out")]
+    + [f"defense_{k}" for k in ("contested_made", "contested_missed", "uncontested_made", "uncontested_missed")]
+)
+
+
+class Player:
+    def __init__(self, name):
+        self.name = name
+        self.shots = defaultdict(lambda: {"made": 0, "missed": 0, "contested_made": 0, "contested_missed": 0})
+        self.assists = 0
+        self.turnovers = 0
+        self.rebounds = 0
+        self.points = 0
+        # --- new tracking fields ---
+        self.strike_zone = {"balls": 0, "strikes": 0, "ball_made": 0, "ball_missed": 0, "strike_made": 0, "strike_missed": 0}
+        self.cuts = {"total": 0, "pass_to_cutter": 0, "made_shot": 0, "missed_shot": 0}
+        self.paint_touches = {"total": 0, "made_shot": 0, "missed_shot": 0, "kick_out": 0}
+        self.defense = {"contested_made": 0, "contested_missed": 0, "uncontested_made": 0, "uncontested_missed": 0}
+        # packed court locations of the shots recorded with x/y (see shot_chart.py)
+        self.shot_locations = array("I")
+
+    @play_logged
+    def record_shot(self, shot_type, made, contested=False, x=None, y=None):
+        if x is not None and y is not None:
+            self.shot_locations.append(pack_shot(x, y, made, contested))
+        shot = self.shots[shot_type]
+        if made:
+            shot["made"] += 1
+            if shot_type == "3pt":
+                self.points += 3
+            else:
+                self.points += 2
+            if contested:
+                shot["contested_made"] += 1
+        else:
+            shot["missed"] += 1
+            if contested:
+                shot["contested_missed"] += 1
+
+    # --- new recorders for requested tracking ---
+    @play_logged
+    def record_strike_pass(self, kind, result):
+        # kind in {"ball","strike"}; result in {"made","missed"}
+        if kind == "ball":
+            self.strike_zone["balls"] += 1
+            if result == "made":
+                self.strike_zone["ball_made"] += 1
+            elif result == "missed":
+                self.strike_zone["ball_missed"] += 1
+        elif kind == "strike":
+            self.strike_zone["strikes"] += 1
+            if result == "made":
+                self.strike_zone["strike_made"] += 1
+            elif result == "missed":
+                self.strike_zone["strike_missed"] += 1
+
+    @play_logged
+    def record_cut(self, result):
+        # result in {"pass","made","missed"}
+        self.cuts["total"] += 1
+        if result == "pass":
+            self.cuts["pass_to_cutter"] += 1
+        elif result == "made":
+            self.cuts["made_shot"] += 1
+        elif result == "missed":
+            self.cuts["missed_shot"] += 1
+
+    @play_logged
+    def record_paint_touch(self, result):
+        # result in {"made","missed","kick"}
+        self.paint_touches["total"] += 1
+        if result == "made":
+            self.paint_touches["made_shot"] += 1
+        elif result == "missed":
+            self.paint_touches["missed_shot"] += 1
+        elif result == "kick":
+            self.paint_touches["kick_out"] += 1
+
+    @play_logged
+    def record_defense(self, contested, made):
+        # contested bool, made bool
+        if contested and made:
+            self.defense["contested_made"] += 1
+        elif contested and not made:
+            self.defense["contested_missed"] += 1
+        elif not contested and made:
+            self.defense["uncontested_made"] += 1
+        else:
+            self.defense["uncontested_missed"] += 1
+
+    @play_logged
+    def record_stat(self, attr):
+        # attr in {"assists","turnovers","rebounds"}
+        setattr(self, attr, getattr(self, attr) + 1)
+
+    def total_shots(self):
+        return sum(v["made"] + v["missed"] for v in self.shots.values())
+
+    def shots_made(self):
+        return sum(v["made"] for v in self.shots.values())
+
+    def shots_missed(self):
+        return sum(v["missed"] for v in self.shots.values())
+
+    def calc_per(self):
+        denom = max(1, self.total_shots() + self.turnovers)
+        value = (self.points + self.rebounds + self.assists - self.turnovers) / denom * 15
+        return round(value, 2)
+
+    def calc_ts(self):
+        fga = self.total_shots()
+        if fga == 0:
+            return 0.0
+        return round(self.points / (2 * fga), 3)
+
+    def calc_ast_to_tov(self):
+        if self.turnovers == 0:
+            return float(self.assists) if self.assists else 0.0
+        return round(self.assists / self.turnovers, 2)
+
+    def calc_usage(self, team_possessions):
+        used = self.total_shots() + self.assists + self.turnovers
+        if team_possessions <= 0:
+            return 0.0
+        return round(100 * used / team_possessions, 2)
+
+    def calc_bpm(self):
+        possessions = max(1, self.total_shots() + self.turnovers)
+        return round((self.points + self.rebounds + self.assists) / possessions * 10, 2)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "shots": {k: dict(v) for k, v in self.shots.items()},
+            "assists": self.assists,
+            "turnovers": self.turnovers,
+            "rebounds": self.rebounds,
+            "points": self.points,
+            # include new fields
+            "strike_zone": dict(self.strike_zone),
+            "cuts": dict(self.cuts),
+            "paint_touches": dict(self.paint_touches),
+            "defense": dict(self.defense),
+            "shot_locations": encode_locations(self.shot_locations),
+        }
+
+    @staticmethod
+    def from_dict(name, data):
+        player = Player(name)
+        # Merge loaded shots with default keys so missing contested_* keys are filled with 0
+        for shot_type, values in (data.get("shots") or {}).items():
+            player.shots[shot_type].update(values or {})
+        player.assists = data.get("assists", 0)
+        player.turnovers = data.get("turnovers", 0)
+        player.rebounds = data.get("rebounds", 0)
+        player.points = data.get("points", 0)
+        # restore new fields with safe defaults
+        sz = data.get("strike_zone") or {}
+        player.strike_zone.update({
+            "balls": sz.get("balls", 0),
+            "strikes": sz.get("strikes", 0),
+            "ball_made": sz.get("ball_made", 0),
+            "ball_missed": sz.get("ball_missed", 0),
+            "strike_made": sz.get("strike_made", 0),
+            "strike_missed": sz.get("strike_missed", 0),
+        })
+        cuts = data.get("cuts") or {}
+        player.cuts.update({
+            "total": cuts.get("total", 0),
+            "pass_to_cutter": cuts.get("pass_to_cutter", 0),
+            "made_shot": cuts.get("made_shot", 0),
+            "missed_shot": cuts.get("missed_shot", 0),
+        })
+        pt = data.get("paint_touches") or {}
+        player.paint_touches.update({
+            "total": pt.get("total", 0),
+            "made_shot": pt.get("made_shot", 0),
+            "missed_shot": pt.get("missed_shot", 0),
+            "kick_out": pt.get("kick_out", 0),
+        })
+        df = data.get("defense") or {}
+        player.defense.update({
+            "contested_made": df.get("contested_made", 0),
+            "contested_missed": df.get("contested_missed", 0),
+            "uncontested_made": df.get("uncontested_made", 0),
+            "uncontested_missed": df.get("uncontested_missed", 0),
+        })
+        player.shot_locations = decode_locations(data.get("shot_locations"))
+        return player
+
+
+def get_team_possessions(players):
+    return max(1, sum(used_possessions(p) for p in players))
+
+
+def used_possessions(player):
+    return player.total_shots() + player.assists + player.turnovers
+
+
+def base_score(player):
+    """Sum of the normalized PER, TS%, A/T and BPM terms of the team score.
+
+    Usage is left out because it is the only term that depends on the rest
+    of the team, which lets callers keep a running team total of this part.
+    """
+    per = min(max(player.calc_per(), 0.0), 30.0) / 30.0
+    ts = min(max(player.calc_ts(), 0.0), 1.0)
+    at = min(max(player.calc_ast_to_tov(), 0.0), 3.0) / 3.0
+    bpm = (min(max(player.calc_bpm(), -10.0), 10.0) + 10.0) / 20.0
+    return per + ts + at + bpm
+
+
+def base_score_units(player):
+    # Integer units so running totals add up exactly, whatever the order
+    return round(base_score(player) * SCORE_UNITS)
+
+
+def calc_team_percentage(players):
+    players = list(players)
+    leaders = []
+    for p in players:
+        leaders = bump_usage_leaders(leaders, p.name, used_possessions(p))
+    return team_percentage_from_totals(
+        len(players),
+        sum(used_possessions(p) for p in players),
+        sum(base_score_units(p) for p in players),
+        [used for _, used in leaders],
+    )
+
+
+def bump_usage_leaders(leaders, name, used, keep=2):
+    """Return the top ``keep`` [name, used] pairs after ``name`` reached ``used``.
+
+    Only valid while a player's used possessions never go down, which holds
+    for recorded events; anything else should rebuild from scratch.
+    """
+    ranked = [entry for entry in leaders if entry[0] != name]
+    ranked.append([name, used])
+    ranked.sort(key=lambda entry: entry[1], reverse=True)
+    return ranked[:keep]
+
+
+def team_percentage_from_totals(player_count, possessions, base_units_sum, leader_used):
+    """Team score (0-100) from running totals instead of every player.
+
+    Each player scores the mean of five 0..1 terms; four of them are summed
+    in ``base_units_sum``. The fifth, Usage% clamped at 40, only caps a
+    player holding more than 40% of the team's possessions and at most two
+    players can, so it needs just the total and the two largest
+    ``leader_used``.
+    """
+    if player_count <= 0:
+        return 0.0
+    team_pos = max(1, possessions)
+    capped = [used for used in leader_used if 100 * used / team_pos > 40.0]
+    usage_sum = len(capped) + (possessions - sum(capped)) * 100 / team_pos / 40.0
+    return round((base_units_sum / SCORE_UNITS + usage_sum) / 5.0 / player_count * 100, 1)
+
+
+def summary_row(player, team_pos):
+    return {
+        "name": player.name,
+        "points": player.points,
+        "assists": player.assists,
+        "rebounds": player.rebounds,
+        "turnovers": player.turnovers,
+        "PER": player.calc_per(),
+        "TS%": player.calc_ts(),
+        "A/T": player.calc_ast_to_tov(),
+        "Usage%": player.calc_usage(team_pos),
+        "BPM": player.calc_bpm(),
+    }
+
+
+def tracking_row(player):
+    row = {}
+    for shot_type in SHOT_TYPES:
+        shot = player.shots.get(shot_type) or {}
+        for key in ("made", "missed", "contested_made", "contested_missed"):
+            row[f"{shot_type}_{key}"] = shot.get(key, 0)
+    for group in ("strike_zone", "cuts", "paint_touches", "defense"):
+        for key, value in getattr(player, group).items():
+            row[f"{group}_{key}"] = value
+    return row
@@ -0,0 +1,734 @@
+"""Flask front end for the tally sheets (templates/ + static/).
+
+Data lives in the database named by DATABASE_URL (Postgres on Render /
+Supabase) and falls back to the local sqlite file data.db.
+
+This module holds the models, the derived-table upkeep and create_app();
+the routes are blueprints in web_players.py, web_stats.py and web_files.py.
+Tables are created and older databases migrated by ``flask --app
+basketball_web init-db`` or, unless BASKETBALL_INIT_DB=0, on the first
+request, never on import.
+"""
+import os
+import threading
+import time
+
+import click
+from flask import Flask, current_app
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, delete, func, insert, inspect, select, text, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+from basketball_model import (
+    Player,
+    base_score_units,
+    bump_usage_leaders,
+    team_percentage_from_totals,
+    used_possessions,
+)
+from leaderboards import LEADERBOARD_METRICS, metric_values
+from name_index import NameIndex
+from play_by_play import flatten_counters
+import restore_jobs
+from rollups import GameLine, TEAM_ROLLUP, add_counters, default_season, game_line, rebuild_rollups, rollup_row
+from shot_chart import BINNINGS, DEFAULT_BINNING, ShotChart
+from similarity import SimilarityIndex, season_counters, stat_vector
+from trends import PlayerTrend
+from uncertainty import IntervalCache
+from web_profiling import install_profiling
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Rows fetched per round trip when streaming exports; decoded JSON rows
+# cost a few KB each so this also bounds export memory
+EXPORT_BATCH_SIZE = 500
+
+db = SQLAlchemy()
+# app.extensions flag set once init_db() has run for that app
+DB_READY = "basketball.db_ready"
+
+# bootstrap intervals for the report, per worker process; the report
+# shows them for its first REPORT_INTERVAL_PLAYERS players, and the cache
+# holds a few reports' worth so memory doesn't grow with the roster
+REPORT_INTERVAL_PLAYERS = 100
+INTERVALS = IntervalCache(max_entries=4 * REPORT_INTERVAL_PLAYERS)
+
+# player-season similarity index, per worker process; synced from the rollups table
+SIMILAR = SimilarityIndex()
+_similar_lock = threading.Lock()
+_similar_state = {"fingerprint": None}
+
+# roster search index, per worker process; synced from the players table when the roster changes
+NAMES = NameIndex()
+_names_lock = threading.Lock()
+_names_state = {"fingerprint": None}
+
+
+class PlayerRecord(db.Model):
+    __tablename__ = "players"
+
+    name = db.Column(db.String, primary_key=True)
+    shots = db.Column(db.JSON)
+    assists = db.Column(db.Integer)
+    turnovers = db.Column(db.Integer)
+    rebounds = db.Column(db.Integer)
+    points = db.Column(db.Integer)
+    strike_zone = db.Column(db.JSON)
+    cuts = db.Column(db.JSON)
+    paint_touches = db.Column(db.JSON)
+    defense = db.Column(db.JSON)
+    shot_locations = db.Column(db.Text)  # base64 packed court locations, see shot_chart.py
+
+    def to_player(self):
+        return Player.from_dict(self.name, {c.name: getattr(self, c.name) for c in self.__table__.columns})
+
+    def update_from(self, player):
+        # Assign fresh dicts so SQLAlchemy notices the JSON columns changed
+        for key, value in player.to_dict().items():
+            setattr(self, key, value)
+
+
+class TeamAggregate(db.Model):
+    """Single materialized row behind the Team Progress badge.
+
+    Kept in step with ``players`` in the same transaction as every write,
+    rebuilt by ``flask rebuild-team-stats`` (and after a restore).
+    """
+
+    __tablename__ = "team_stats"
+
+    id = db.Column(db.Integer, primary_key=True)
+    players = db.Column(db.Integer, nullable=False, default=0)
+    possessions = db.Column(db.BigInteger, nullable=False, default=0)
+    base_score_units = db.Column(db.BigInteger, nullable=False, default=0)
+    usage_leaders = db.Column(db.JSON)  # [[name, used possessions], ...] top two
+    roster_version = db.Column(db.Integer, nullable=False, default=0)  # bumped when players are added or replaced
+
+    def team_possessions(self):
+        return max(1, self.possessions)
+
+    def team_percentage(self):
+        return team_percentage_from_totals(
+            self.players, self.possessions, self.base_score_units, [used for _, used in self.usage_leaders or []]
+        )
+
+
+class LeaderboardEntry(db.Model):
+    """One player's value for one metric.
+
+    The (metric, value) index keeps each metric's players in sorted order,
+    so top-k, rank and percentile are index range reads instead of
+    sorting every player. Usage% stores used possessions (same order).
+    """
+
+    __tablename__ = "leaderboard"
+    __table_args__ = (db.Index("ix_leaderboard_metric_value", "metric", "value"),)
+
+    metric = db.Column(db.String, primary_key=True)
+    name = db.Column(db.String, primary_key=True)
+    value = db.Column(db.Float, nullable=False)
+
+
+class ShotChartBin(db.Model):
+    """Made/attempted shots in one bin of a player's (or the team's) shot chart.
+
+    Updated with each located shot, so chart pages read a player's bins
+    instead of every shot they took. ``name`` is TEAM_CHART for the team.
+    """
+
+    __tablename__ = "shot_chart_bins"
+
+    name = db.Column(db.String, primary_key=True)
+    binning = db.Column(db.String, primary_key=True)
+    col = db.Column(db.Integer, primary_key=True)
+    row = db.Column(db.Integer, primary_key=True)
+    made = db.Column(db.Integer, nullable=False, default=0)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+
+TEAM_CHART = ""
+
+
+class GameLineRecord(db.Model):
+    """Raw counters one player changed in one closed game (see rollups.py)."""
+
+    __tablename__ = "game_lines"
+
+    season = db.Column(db.String, primary_key=True)
+    game = db.Column(db.String, primary_key=True)
+    name = db.Column(db.String, primary_key=True)
+    counters = db.Column(db.JSON)
+
+    def to_line(self):
+        return GameLine(self.season, self.game, self.name, self.counters or {})
+
+
+class RollupRecord(db.Model):
+    """Season or career totals for a player (or the team, name TEAM_ROLLUP).
+
+    Folded into when a game is closed; ``flask rebuild-rollups`` recomputes
+    them from game_lines. Career rows have an empty season.
+    """
+
+    __tablename__ = "rollups"
+
+    level = db.Column(db.String, primary_key=True)
+    season = db.Column(db.String, primary_key=True)
+    name = db.Column(db.String, primary_key=True)
+    counters = db.Column(db.JSON)
+
+
+class RestoreJobRecord(db.Model):
+    """Last published state of a restore job, so any worker can answer a progress poll."""
+
+    __tablename__ = "restore_jobs"
+
+    id = db.Column(db.String, primary_key=True)
+    status = db.Column(db.String, nullable=False)
+    data = db.Column(db.JSON)  # RestoreJob.to_dict()
+    updated_at = db.Column(db.Float, nullable=False)  # time.time()
+
+
+class PlayerTrendRecord(db.Model):
+    """Ring buffer of a player's recent games (see trends.py), one row per player."""
+
+    __tablename__ = "player_trends"
+
+    name = db.Column(db.String, primary_key=True)
+    data = db.Column(db.JSON)
+
+    def to_trend(self):
+        return PlayerTrend.from_dict(self.data or {})
+
+
+def database_url():
+    url = os.environ.get("DATABASE_URL") or "sqlite:///" + os.path.join(BASE_DIR, "data.db")
+    # Render and Heroku hand out postgres:// URLs, SQLAlchemy only accepts postgresql://
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def load_players():
+    return [record.to_player() for record in PlayerRecord.query.order_by(PlayerRecord.name)]
+
+
+def iter_players(batch_size=EXPORT_BATCH_SIZE):
+    """Stream players out of the database without loading the whole table.
+
+    Uses a server-side cursor where the driver supports one (psycopg2) and
+    fetches ``batch_size`` rows per round trip.
+    """
+    stmt = (
+        select(PlayerRecord.__table__)
+        .order_by(PlayerRecord.name)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    for row in db.session.execute(stmt):
+        yield Player.from_dict(row.name, row._mapping)
+
+
+def rebuild_team_aggregate():
+    """Recompute the team_stats row from the players table. Caller commits."""
+    count = possessions = units = 0
+    leaders = []
+    for player in iter_players():
+        used = used_possessions(player)
+        count += 1
+        possessions += used
+        units += base_score_units(player)
+        leaders = bump_usage_leaders(leaders, player.name, used)
+    aggregate = db.session.get(TeamAggregate, 1) or TeamAggregate(id=1)
+    aggregate.players = count
+    aggregate.possessions = possessions
+    aggregate.base_score_units = units
+    aggregate.usage_leaders = leaders
+    aggregate.roster_version = (aggregate.roster_version or 0) + 1
+    db.session.add(aggregate)
+    db.session.flush()
+    return aggregate
+
+
+def team_aggregate():
+    """The team_stats row, built on first use for databases that predate it."""
+    aggregate = db.session.get(TeamAggregate, 1)
+    if aggregate is None:
+        try:
+            aggregate = rebuild_team_aggregate()
+            db.session.commit()
+        except IntegrityError:
+            # Another request or worker built it first
+            db.session.rollback()
+            aggregate = db.session.get(TeamAggregate, 1)
+    return aggregate
+
+
+def apply_team_change(before, after):
+    """Fold one player's change into team_stats. ``before`` is None for a new player.
+
+    Call after the player row has been updated in the session.
+    """
+    stmt = select(TeamAggregate).where(TeamAggregate.id == 1).with_for_update()
+    aggregate = db.session.execute(stmt).scalar_one_or_none()
+    if aggregate is None:
+        # First write since the table appeared; the rebuild already sees this change
+        rebuild_team_aggregate()
+        return
+    used_before = used_possessions(before) if before else 0
+    used_after = used_possessions(after)
+    if before is None:
+        aggregate.players += 1
+        aggregate.roster_version += 1
+    aggregate.possessions += used_after - used_before
+    aggregate.base_score_units += base_score_units(after) - (base_score_units(before) if before else 0)
+    if used_after != used_before:
+        aggregate.usage_leaders = bump_usage_leaders(aggregate.usage_leaders or [], after.name, used_after)
+
+
+def fold_rollups(records, level, season, name, counters, games=1):
+    record = records.get(name)
+    if record is None:
+        record = records[name] = RollupRecord(level=level, season=season, name=name, counters={})
+        db.session.add(record)
+    # a fresh dict so SQLAlchemy notices the JSON change
+    total = add_counters(dict(record.counters or {}), counters)
+    total["games"] = total.get("games", 0) + games
+    record.counters = total
+
+
+def close_game(game_id, season=None):
+    """Close a game for every player: one more game in their trend, folded into their rollups.
+
+    Caller commits.
+    """
+    season = season or default_season()
+    trends = {record.name: record for record in PlayerTrendRecord.query}
+    careers = {r.name: r for r in RollupRecord.query.filter_by(level="career", season="")}
+    seasons = {r.name: r for r in RollupRecord.query.filter_by(level="season", season=season)}
+    team_line = {}
+    count = 0
+    for player in iter_players():
+        career = careers.get(player.name)
+        line = game_line(player, career.counters if career else None)
+        if line:
+            db.session.add(GameLineRecord(season=season, game=game_id, name=player.name, counters=line))
+            fold_rollups(seasons, "season", season, player.name, line)
+            fold_rollups(careers, "career", "", player.name, line)
+            add_counters(team_line, line)
+        record = trends.get(player.name)
+        if record is None:
+            record = PlayerTrendRecord(name=player.name)
+            db.session.add(record)
+        trend = record.to_trend()
+        trend.close_game(game_id, player)
+        record.data = trend.to_dict()
+        count += 1
+    if team_line:
+        fold_rollups(seasons, "season", season, TEAM_ROLLUP, team_line)
+        fold_rollups(careers, "career", "", TEAM_ROLLUP, team_line)
+    return count
+
+
+def game_closed(season, game_id):
+    stmt = select(GameLineRecord.name).where(GameLineRecord.season == season, GameLineRecord.game == game_id).limit(1)
+    return db.session.scalar(stmt) is not None
+
+
+def rebuild_rollup_table(workers=1, mode="process"):
+    """Recompute every season and career row from game_lines. Caller commits."""
+    lines = [record.to_line() for record in GameLineRecord.query.yield_per(EXPORT_BATCH_SIZE)]
+    seasons, careers = rebuild_rollups(lines, workers, mode)
+    table = RollupRecord.__table__
+    db.session.execute(delete(table))
+    rows = [{"level": "season", "season": s, "name": n, "counters": c} for (s, n), c in seasons.items()]
+    rows += [{"level": "career", "season": "", "name": n, "counters": c} for n, c in careers.items()]
+    if rows:
+        db.session.execute(insert(table), rows)
+    return len(lines)
+
+
+def rollup_rows(level, season="", name=None):
+    """Report rows read from the rollups table (team row last)."""
+    stmt = select(RollupRecord.name, RollupRecord.counters).where(
+        RollupRecord.level == level, RollupRecord.season == ("" if level == "career" else season)
+    )
+    if name is not None:
+        stmt = stmt.where(RollupRecord.name == name)
+    rows, team = [], []
+    for rollup_name, counters in db.session.execute(stmt.order_by(RollupRecord.name)):
+        (team if rollup_name == TEAM_ROLLUP else rows).append(rollup_row(rollup_name, counters or {}))
+    return rows + team
+
+
+def season_names():
+    stmt = select(RollupRecord.season).where(RollupRecord.level == "season").distinct().order_by(RollupRecord.season)
+    return db.session.scalars(stmt).all()
+
+
+def player_rollups(name):
+    """``[(season, row), ...]`` plus the career row (None before any closed game) for one player or TEAM_ROLLUP."""
+    stmt = (
+        select(RollupRecord.season, RollupRecord.counters)
+        .where(RollupRecord.level == "season", RollupRecord.name == name)
+        .order_by(RollupRecord.season)
+    )
+    seasons = [(season, rollup_row(name, counters or {})) for season, counters in db.session.execute(stmt)]
+    career = rollup_rows("career", name=name)
+    return seasons, career[0] if career else None
+
+
+def sync_similarity_index():
+    """Bring SIMILAR up to date with the season rollups if any game has been closed since the last sync.
+
+    Closing a game adds game_lines rows, so their count (with the number of
+    season rows) tells whether anything changed, including in another worker.
+    Only changed player-seasons are re-indexed.
+    """
+    fingerprint = (
+        str(db.engine.url),
+        db.session.scalar(select(func.count()).select_from(GameLineRecord)),
+        db.session.scalar(select(func.count()).select_from(RollupRecord).where(RollupRecord.level == "season")),
+    )
+    if fingerprint == _similar_state["fingerprint"]:
+        return 0
+    stmt = select(RollupRecord.season, RollupRecord.name, RollupRecord.counters).where(
+        RollupRecord.level == "season", RollupRecord.name != TEAM_ROLLUP
+    )
+    rows = db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    changed = SIMILAR.sync(((season, name), season_counters(counters or {})) for season, name, counters in rows)
+    _similar_state["fingerprint"] = fingerprint
+    return changed
+
+
+def sync_name_index():
+    """Bring NAMES up to date with the players table if the roster has changed since the last sync.
+
+    Adding a player and a restore bump team_stats.roster_version in the
+    same transaction, so that one row tells whether any worker changed the
+    roster; only then are the names read. Call with _names_lock held.
+    """
+    aggregate = team_aggregate()
+    fingerprint = (str(db.engine.url), aggregate.players, aggregate.roster_version)
+    if fingerprint == _names_state["fingerprint"]:
+        return 0
+    changed = NAMES.sync(db.session.scalars(select(PlayerRecord.name)).all())
+    _names_state["fingerprint"] = fingerprint
+    return changed
+
+
+def search_players(query="", limit=None):
+    """Every player name, or with a ``query`` the type-to-filter matches (see name_index.py)."""
+    with _names_lock:
+        sync_name_index()
+        return NAMES.search(query, limit)
+
+
+def similar_names(name):
+    """Players already on the roster whose names look like ``name``."""
+    with _names_lock:
+        sync_name_index()
+        return NAMES.duplicates(name)
+
+
+def similar_players(player, season=None, k=5):
+    """``(season queried, [{"name", "season", "distance"}])``; the current totals when no season is indexed."""
+    with _similar_lock:
+        sync_similarity_index()
+        seasons = SIMILAR.seasons_of(player.name)
+        if season is None and seasons:
+            season = seasons[-1]
+        if season in seasons:
+            found = SIMILAR.similar(player.name, season, k)
+        else:
+            season = None
+            vector = stat_vector(flatten_counters(player))
+            found = SIMILAR.similar(player.name, k=k, vector=vector) if vector else []
+    return season, [{"name": name, "season": s, "distance": distance} for (s, name), distance in found]
+
+
+def update_leaderboard(before, after):
+    """Write the metrics that changed between ``before`` and ``after``. Caller commits."""
+    values = metric_values(after)
+    table = LeaderboardEntry.__table__
+    if before is None:
+        rows = [{"metric": m, "name": after.name, "value": values[m]} for m in LEADERBOARD_METRICS]
+        db.session.execute(insert(table), rows)
+        return
+    old = metric_values(before)
+    for metric in LEADERBOARD_METRICS:
+        if values[metric] != old[metric]:
+            db.session.execute(
+                update(table)
+                .where(table.c.metric == metric, table.c.name == after.name)
+                .values(value=values[metric])
+            )
+
+
+def rebuild_leaderboard(batch_size=EXPORT_BATCH_SIZE):
+    """Refill the leaderboard table from the players table. Caller commits."""
+    table = LeaderboardEntry.__table__
+    db.session.execute(delete(table))
+    rows = []
+    for player in iter_players(batch_size):
+        values = metric_values(player)
+        rows.extend({"metric": m, "name": player.name, "value": values[m]} for m in LEADERBOARD_METRICS)
+        if len(rows) >= batch_size * 10:
+            db.session.execute(insert(table), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(table), rows)
+
+
+def ensure_leaderboard():
+    """Fill the leaderboard for databases that predate it."""
+    if db.session.scalar(select(LeaderboardEntry.name).limit(1)) is not None:
+        return
+    if db.session.scalar(select(PlayerRecord.name).limit(1)) is None:
+        return
+    try:
+        rebuild_leaderboard()
+        db.session.commit()
+    except IntegrityError:
+        # Another worker filled it first
+        db.session.rollback()
+
+
+# (table, column, DDL type) for columns added after their table shipped
+ADDED_COLUMNS = [
+    ("players", "shot_locations", "TEXT"),
+    ("team_stats", "roster_version", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+
+def ensure_columns():
+    """Add columns newer than the database (create_all only adds tables)."""
+    for table, column, ddl in ADDED_COLUMNS:
+        if column in {c["name"] for c in inspect(db.engine).get_columns(table)}:
+            continue
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        except DBAPIError:
+            # Another worker added it first
+            if column not in {c["name"] for c in inspect(db.engine).get_columns(table)}:
+                raise
+
+
+def init_db():
+    """Create missing tables and columns, then seed the team row and leaderboard. Safe to rerun."""
+    db.create_all()
+    ensure_columns()
+    team_aggregate()
+    ensure_leaderboard()
+    current_app.extensions[DB_READY] = True
+
+
+def shot_chart_changes(name, codes):
+    """``{(name, binning, col, row): [made, attempts]}`` for the player and team bins of ``codes``."""
+    changes = {}
+    for binning in BINNINGS:
+        chart = ShotChart(binning)
+        chart.add_codes(codes)
+        for (col, row), (made, attempts) in chart.counts.items():
+            for scope in (name, TEAM_CHART):
+                cell = changes.setdefault((scope, binning, col, row), [0, 0])
+                cell[0] += made
+                cell[1] += attempts
+    return changes
+
+
+def update_shot_charts(before, after):
+    """Add the shots located since ``before`` to the chart bins. Caller commits."""
+    codes = after.shot_locations[len(before.shot_locations) if before else 0:]
+    if not codes:
+        return
+    table = ShotChartBin.__table__
+    for (scope, binning, col, row), (made, attempts) in shot_chart_changes(after.name, codes).items():
+        key = and_(table.c.name == scope, table.c.binning == binning, table.c.col == col, table.c.row == row)
+        result = db.session.execute(
+            update(table).where(key).values(made=table.c.made + made, attempts=table.c.attempts + attempts)
+        )
+        if result.rowcount == 0:
+            db.session.execute(
+                insert(table).values(name=scope, binning=binning, col=col, row=row, made=made, attempts=attempts)
+            )
+
+
+def rebuild_shot_charts(batch_size=EXPORT_BATCH_SIZE):
+    """Refill shot_chart_bins from the players table. Caller commits."""
+    table = ShotChartBin.__table__
+    db.session.execute(delete(table))
+    team = {}
+    rows = []
+    for player in iter_players(batch_size):
+        if not player.shot_locations:
+            continue
+        for (scope, binning, col, row), (made, attempts) in shot_chart_changes(player.name, player.shot_locations).items():
+            if scope == TEAM_CHART:
+                cell = team.setdefault((binning, col, row), [0, 0])
+                cell[0] += made
+                cell[1] += attempts
+            else:
+                rows.append({"name": scope, "binning": binning, "col": col, "row": row, "made": made, "attempts": attempts})
+        if len(rows) >= batch_size * 10:
+            db.session.execute(insert(table), rows)
+            rows = []
+    rows.extend(
+        {"name": TEAM_CHART, "binning": binning, "col": col, "row": row, "made": made, "attempts": attempts}
+        for (binning, col, row), (made, attempts) in team.items()
+    )
+    if rows:
+        db.session.execute(insert(table), rows)
+
+
+def load_shot_chart(name=TEAM_CHART, binning=DEFAULT_BINNING):
+    chart = ShotChart(binning)
+    stmt = select(ShotChartBin.col, ShotChartBin.row, ShotChartBin.made, ShotChartBin.attempts).where(
+        ShotChartBin.name == name, ShotChartBin.binning == binning, ShotChartBin.attempts > 0
+    )
+    for col, row, made, attempts in db.session.execute(stmt):
+        chart.counts[(col, row)] = [made, attempts]
+        chart.made += made
+        chart.attempts += attempts
+    return chart
+
+
+def publish_restore_job(job):
+    """Copy ``job``'s state to the restore_jobs table on its own connection.
+
+    Runs outside the restore's transaction so other workers see progress
+    before the commit. sqlite locks the whole file for that transaction, so
+    there only the queued and finished states are written. Best effort: a
+    failed write never fails the restore.
+    """
+    if job.status == "running" and db.engine.dialect.name == "sqlite":
+        return
+    table = RestoreJobRecord.__table__
+    now = time.time()
+    values = {"status": job.status, "data": job.to_dict(), "updated_at": now}
+    try:
+        with db.engine.begin() as conn:
+            if not conn.execute(update(table).where(table.c.id == job.id).values(**values)).rowcount:
+                conn.execute(insert(table).values(id=job.id, **values))
+                # a new job, drop finished ones nobody polls any more
+                conn.execute(
+                    delete(table).where(
+                        table.c.status.in_(("done", "failed")),
+                        table.c.updated_at < now - restore_jobs.JOB_TTL_SECONDS,
+                    )
+                )
+    except DBAPIError:
+        pass
+
+
+def restore_job_state(job_id):
+    """``RestoreJob.to_dict()`` of a job run by any worker, or None."""
+    job = restore_jobs.get_job(job_id)
+    if job is not None:
+        return job.to_dict()
+    record = db.session.get(RestoreJobRecord, job_id)
+    return record.data if record is not None else None
+
+
+def rebuild_derived_tables():
+    rebuild_team_aggregate()
+    rebuild_leaderboard()
+    rebuild_shot_charts()
+
+
+def leaderboard_top(metric, k=10):
+    stmt = (
+        select(LeaderboardEntry.name, LeaderboardEntry.value)
+        .where(LeaderboardEntry.metric == metric)
+        .order_by(LeaderboardEntry.value.desc(), LeaderboardEntry.name)
+        .limit(k)
+    )
+    return db.session.execute(stmt).all()
+
+
+def leaderboard_position(metric, name):
+    """``(rank, percentile)`` like leaderboards.Leaderboard, or None if unknown."""
+    value = db.session.scalar(
+        select(LeaderboardEntry.value).where(LeaderboardEntry.metric == metric, LeaderboardEntry.name == name)
+    )
+    if value is None:
+        return None
+    column = LeaderboardEntry.value
+    counts = select(
+        func.count(),
+        func.count().filter(column > value),
+        func.count().filter(column == value),
+    ).where(LeaderboardEntry.metric == metric)
+    total, better, tied = db.session.execute(counts).one()
+    tied -= 1
+    percentile = 100.0 if total == 1 else round(100 * (total - better - tied - 1 + tied / 2) / (total - 1), 1)
+    return better + 1, percentile
+
+
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=database_url(),
+        SECRET_KEY=os.environ.get("SECRET_KEY", "dev"),
+        PROFILING=os.environ.get("BASKETBALL_PROFILING", "") not in ("", "0"),
+        PROFILE_SAMPLE_RATE=float(os.environ.get("BASKETBALL_PROFILE_SAMPLE", "0")),
+        PROFILE_DIR=os.environ.get("BASKETBALL_PROFILE_DIR"),
+        PROFILE_QUERY_ALLOWED=os.environ.get("BASKETBALL_PROFILE_QUERY", "") not in ("", "0"),
+        PROFILE_MAX_FILES=int(os.environ.get("BASKETBALL_PROFILE_KEEP", "100")),
+        INIT_DB_ON_FIRST_REQUEST=os.environ.get("BASKETBALL_INIT_DB", "1") not in ("", "0"),
+    )
+    if config:
+        app.config.update(config)
+    db.init_app(app)
+    if app.config["PROFILING"]:
+        install_profiling(app)
+    # schema and seeding run on first use, not at import, so loading the module never touches the database
+    if app.config["INIT_DB_ON_FIRST_REQUEST"]:
+        init_lock = threading.Lock()
+
+        @app.before_request
+        def init_db_once():
+            if app.extensions.get(DB_READY):
+                return
+            with init_lock:
+                if not app.extensions.get(DB_READY):
+                    init_db()
+
+    # the blueprints import their helpers from this module
+    from web_files import bp as files_bp
+    from web_players import bp as players_bp
+    from web_stats import bp as stats_bp
+
+    app.register_blueprint(players_bp)
+    app.register_blueprint(stats_bp)
+    app.register_blueprint(files_bp)
+
+    @app.cli.command("init-db")
+    def init_db_command():
+        """Create missing tables and columns and fill the derived tables of an older database."""
+        init_db()
+        print("Database ready")
+
+    @app.cli.command("rebuild-team-stats")
+    def rebuild_team_stats():
+        """Recompute the team_stats row, the leaderboard and the shot charts from the players table."""
+        aggregate = rebuild_team_aggregate()
+        rebuild_leaderboard()
+        rebuild_shot_charts()
+        db.session.commit()
+        print(f"Rebuilt team stats: {aggregate.players} players, team progress {aggregate.team_percentage()}%")
+
+    @app.cli.command("rebuild-rollups")
+    @click.option("--workers", default=os.cpu_count() or 1, show_default=True, help="parallel workers")
+    @click.option("--mode", type=click.Choice(["process", "thread"]), default="process", show_default=True)
+    def rebuild_rollups_command(workers, mode):
+        """Recompute every season and career rollup from the raw game lines."""
+        count = rebuild_rollup_table(workers, mode)
+        db.session.commit()
+        print(f"Rebuilt rollups from {count} game lines")
+
+    return app
+
+
+if __name__ == "__main__":
+    create_app().run(debug=True)
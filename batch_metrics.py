@@ -0,0 +1,202 @@
+"""Compute the advanced-metric table for many data files at once.
+
+Each team/season keeps its own data file: the desktop app's
+``basketball_data.bbd`` (compact_format.py) or older
+``basketball_data.json``, or the web app's sqlite ``data.db``. This reads
+every file given, on a process pool, and writes one consolidated player
+CSV (summary columns plus a ``source`` column) and one row per file with
+the team figures, then prints throughput.
+
+    python batch_metrics.py seasons/*.json archive/*.db --out players.csv --teams teams.csv
+    python batch_metrics.py seasons/ --workers 8 --full --intervals
+
+Directories are searched for ``*.bbd``, ``*.json`` and ``*.db``. A file that can't be
+read is reported and skipped; the exit status is 1 if any were.
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from basketball_model import (
+    SUMMARY_FIELDS,
+    TRACKING_FIELDS,
+    Player,
+    calc_team_percentage,
+    get_team_possessions,
+    summary_row,
+    tracking_row,
+)
+from compact_format import is_compact, load as load_compact
+from uncertainty import INTERVAL_FIELDS, bootstrap_intervals, interval_row
+
+TEAM_FIELDS = ["source", "players", "team_possessions", "team_percentage", "points", "assists", "rebounds", "turnovers", "TS%", "seconds"]
+
+# web app columns stored as JSON text in sqlite
+_JSON_COLUMNS = ("shots", "strike_zone", "cuts", "paint_touches", "defense")
+
+
+def load_json_players(path):
+    """Players from a ``basketball_data.json`` written by any of the apps (see legacy_import.py)."""
+    # legacy_import pulls in sqlalchemy (via restore_jobs); only JSON files need it
+    from legacy_import import normalize_record
+
+    with open(path, "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+    if not isinstance(data, dict):
+        raise ValueError("expected an object keyed by player name")
+    return [Player.from_dict(name, normalize_record(name, payload or {})[1]) for name, payload in data.items()]
+
+
+def load_sqlite_players(path):
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        players = []
+        for row in conn.execute("SELECT * FROM players ORDER BY name"):
+            payload = dict(row)
+            for column in _JSON_COLUMNS:
+                if isinstance(payload.get(column), str):
+                    payload[column] = json.loads(payload[column])
+            players.append(Player.from_dict(row["name"], payload))
+        return players
+    finally:
+        conn.close()
+
+
+def load_players(path):
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        return load_sqlite_players(path)
+    if is_compact(path):
+        return load_compact(path)[0]
+    return load_json_players(path)
+
+
+def file_metrics(path, full=False, intervals=False):
+    """``(team row, player rows)`` for one data file; runs in a worker process."""
+    started = time.perf_counter()
+    players = load_players(path)
+    team_pos = get_team_possessions(players)
+    rows = []
+    for player in players:
+        row = summary_row(player, team_pos)
+        if full:
+            row.update(tracking_row(player))
+        if intervals:
+            row.update(interval_row(bootstrap_intervals(player)))
+        row["source"] = path
+        rows.append(row)
+    points = sum(p.points for p in players)
+    attempts = sum(p.total_shots() for p in players)
+    team = {
+        "source": path,
+        "players": len(players),
+        "team_possessions": team_pos,
+        "team_percentage": calc_team_percentage(players),
+        "points": points,
+        "assists": sum(p.assists for p in players),
+        "rebounds": sum(p.rebounds for p in players),
+        "turnovers": sum(p.turnovers for p in players),
+        "TS%": round(points / (2 * attempts), 3) if attempts else 0.0,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+    return team, rows
+
+
+def _safe_file_metrics(args):
+    path, full, intervals = args
+    try:
+        return path, file_metrics(path, full, intervals), None
+    except (OSError, ValueError, TypeError, AttributeError, sqlite3.Error) as error:
+        return path, None, f"{type(error).__name__}: {error}"
+
+
+def expand_paths(inputs):
+    """Files named directly, globbed, or found (*.bbd, *.json, *.db) in a directory; duplicates dropped."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(
+                glob.glob(os.path.join(item, "*.bbd")) + glob.glob(os.path.join(item, "*.json"))
+                + glob.glob(os.path.join(item, "*.db"))
+            )
+        else:
+            matches = sorted(glob.glob(item)) or [item]
+        paths.extend(matches)
+    return list(dict.fromkeys(paths))
+
+
+def run_batch(paths, workers=None, full=False, intervals=False):
+    """Compute every file; returns ``(teams, players, errors, elapsed seconds)`` in input order."""
+    started = time.perf_counter()
+    jobs = [(path, full, intervals) for path in paths]
+    if workers == 1 or len(jobs) <= 1:
+        results = [_safe_file_metrics(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # a few files per task keeps the pickling overhead down for small files
+            chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+            results = list(executor.map(_safe_file_metrics, jobs, chunksize=chunksize))
+    teams, players, errors = [], [], []
+    for path, result, error in results:
+        if error:
+            errors.append((path, error))
+            continue
+        team, rows = result
+        teams.append(team)
+        players.extend(rows)
+    return teams, players, errors, time.perf_counter() - started
+
+
+def write_csv(path, fields, rows):
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def format_teams(teams):
+    lines = [f"{'source':<40}{'players':>8}{'team %':>8}{'points':>8}{'TS%':>7}"]
+    for team in teams:
+        source = team["source"] if len(team["source"]) <= 39 else "..." + team["source"][-36:]
+        lines.append(f"{source:<40}{team['players']:>8}{team['team_percentage']:>8}{team['points']:>8}{team['TS%']:>7}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute advanced metrics for many team data files in parallel.")
+    parser.add_argument("inputs", nargs="+", help="data files (.bbd, .json or sqlite .db), globs or directories")
+    parser.add_argument("--out", help="write every player's metrics to this CSV")
+    parser.add_argument("--teams", help="write one row of team figures per file to this CSV")
+    parser.add_argument("--full", action="store_true", help="add every tracking counter to --out")
+    parser.add_argument("--intervals", action="store_true", help="add 95%% bootstrap intervals for PER, TS%% and BPM to --out")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    paths = expand_paths(args.inputs)
+    teams, players, errors, elapsed = run_batch(paths, workers=args.workers, full=args.full, intervals=args.intervals)
+    if args.out:
+        fields = ["source"] + SUMMARY_FIELDS + (INTERVAL_FIELDS if args.intervals else []) + (TRACKING_FIELDS if args.full else [])
+        write_csv(args.out, fields, players)
+    if args.teams:
+        write_csv(args.teams, TEAM_FIELDS, teams)
+    if not args.out and not args.teams:
+        print(format_teams(teams))
+    for path, error in errors:
+        print(f"skipped {path}: {error}", file=sys.stderr)
+    rate = len(teams) / elapsed if elapsed else 0.0
+    print(
+        f"{len(teams)} files, {len(players)} players in {elapsed:.2f}s "
+        f"({rate:.1f} files/s, {len(players) / elapsed if elapsed else 0.0:.0f} players/s)",
+        file=sys.stderr,
+    )
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""Typed, columnar export of player totals and play-by-play events.
+
+The CSV export is text: every reload into pandas parses every number
+again and guesses the types. This writes two tables instead:
+
+    <out>_players   one row per player: name, the counters (int64) and
+                    the summary metrics (float64)
+    <out>_events    one row per play-by-play event: game, period, clock,
+                    player, kind, shot type, and one int64 column per
+                    counter the event changed (0 where it didn't)
+
+Names, games, event kinds and shot types are dictionary-encoded: int32
+codes plus the list of distinct values. With pyarrow installed the
+tables are Parquet (``.parquet``) or uncompressed Arrow IPC (``.arrow``,
+memory-mapped without a copy by ``pyarrow.feather.read_table``);
+otherwise they are NumPy ``.npz`` archives, written by numpy when it is
+installed and by the pure-Python writer below when it isn't. In an
+``.npz`` a dictionary column ``name`` is stored as ``name.codes`` and
+``name.categories``:
+
+    data = np.load("season_players.npz")
+    names = pd.Categorical.from_codes(data["name.codes"], data["name.categories"])
+
+    python columnar_export.py basketball_data.bbd --plays basketball_plays.jsonl --out season
+"""
+import argparse
+import ast
+import sqlite3
+import struct
+import sys
+import zipfile
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python .npz writer below
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather
+    import pyarrow.parquet
+except ImportError:  # Parquet/Arrow need pyarrow; .npz is the fallback
+    pa = None
+
+from batch_metrics import load_players
+from basketball_model import SHOT_TYPES, get_team_possessions, summary_row, tracking_row
+from play_by_play import PlayByPlay
+
+FORMATS = ("parquet", "arrow", "npz")
+
+# summary metrics under names that are valid identifiers (and file names inside an .npz)
+METRIC_COLUMNS = {"PER": "per", "TS%": "ts_pct", "A/T": "ast_to_tov", "Usage%": "usage_pct", "BPM": "bpm"}
+COUNT_FIELDS = ("points", "assists", "rebounds", "turnovers")
+
+# array typecode -> numpy dtype string / pyarrow type name
+_DTYPES = {"q": "<i8", "i": "<i4", "h": "<i2", "d": "<f8"}
+_ARROW_TYPES = {"q": "int64", "i": "int32", "h": "int16", "d": "float64"}
+
+
+class Dictionary:
+    """A dictionary-encoded column: int32 codes into ``categories``."""
+
+    def __init__(self, values=()):
+        self.codes = array("i")
+        self.categories = []
+        self._index = {}
+        for value in values:
+            self.append(value)
+
+    def append(self, value):
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.categories)
+            self.categories.append(value)
+        self.codes.append(code)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def values(self):
+        return [self.categories[code] for code in self.codes]
+
+
+def counter_column(path):
+    """Column name for a flattened counter path: ``shots.layup.made`` -> ``layup_made``."""
+    if path.startswith("shots."):
+        path = path[len("shots."):]
+    return path.replace(".", "_")
+
+
+def shot_type(delta):
+    """Shot type an event recorded, "" if it wasn't a shot."""
+    for path in delta:
+        if path.startswith("shots."):
+            return path.split(".")[1]
+    return ""
+
+
+# --- tables: {column: array or Dictionary}, every column the same length ---
+
+def player_table(players):
+    players = sorted(players, key=lambda p: p.name)
+    team_pos = get_team_possessions(players)
+    table = {"name": Dictionary(p.name for p in players)}
+    rows = [summary_row(p, team_pos) for p in players]
+    tracking = [tracking_row(p) for p in players]
+    for field in COUNT_FIELDS:
+        table[field] = array("q", (row[field] for row in rows))
+    for field in (tracking[0] if tracking else ()):
+        table[field] = array("q", (row[field] for row in tracking))
+    # shot types outside SHOT_TYPES (old "2pt" records) after the standard ones
+    for shot in sorted({t for p in players for t in p.shots} - set(SHOT_TYPES)):
+        for key in ("made", "missed", "contested_made", "contested_missed"):
+            table[f"{shot}_{key}"] = array("q", (p.shots[shot][key] if shot in p.shots else 0 for p in players))
+    for field, column in METRIC_COLUMNS.items():
+        table[column] = array("d", (row[field] for row in rows))
+    return table
+
+
+def event_table(events):
+    events = list(events)
+    table = {
+        "game": Dictionary(e.game_id for e in events),
+        "period": array("h", (e.period for e in events)),
+        "clock": array("d", (e.clock for e in events)),
+        "player": Dictionary(e.player for e in events),
+        "kind": Dictionary(e.kind for e in events),
+        "shot_type": Dictionary(shot_type(e.delta) for e in events),
+    }
+    fields = sorted({path for e in events for path in e.delta})
+    for path in fields:
+        table[counter_column(path)] = array("q", (e.delta.get(path, 0) for e in events))
+    return table
+
+
+# --- writers ---
+
+def _arrow_table(table):
+    columns = {}
+    for name, column in table.items():
+        if isinstance(column, Dictionary):
+            codes = pa.Array.from_buffers(pa.int32(), len(column), [None, pa.py_buffer(column.codes)])
+            columns[name] = pa.DictionaryArray.from_arrays(codes, pa.array(column.categories, pa.string()))
+        else:
+            kind = getattr(pa, _ARROW_TYPES[column.typecode])()
+            # wraps the array's buffer, no copy
+            columns[name] = pa.Array.from_buffers(kind, len(column), [None, pa.py_buffer(column)])
+    return pa.table(columns)
+
+
+def _little_endian(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _npz_arrays(table):
+    """``{member name: array or list of str}`` for an .npz."""
+    arrays = {}
+    for name, column in table.items():
+        if isinstance(column, Dictionary):
+            arrays[f"{name}.codes"] = column.codes
+            arrays[f"{name}.categories"] = column.categories
+        else:
+            arrays[name] = column
+    return arrays
+
+
+def _npy_bytes(values):
+    """A version 1.0 .npy file for an ``array`` or a list of strings."""
+    if isinstance(values, array):
+        descr, data = _DTYPES[values.typecode], _little_endian(values).tobytes()
+    else:
+        width = max((len(text) for text in values), default=0) or 1
+        descr = f"<U{width}"
+        data = b"".join(text.ljust(width, "\0").encode("utf-32-le") for text in values)
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({len(values)},), }}"
+    # magic, version and length take 10 bytes; header and newline pad the total to a multiple of 64
+    header += " " * (-(10 + len(header) + 1) % 64) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin-1") + data
+
+
+def write_npz(path, table, use_numpy=True):
+    arrays = _npz_arrays(table)
+    if use_numpy and np is not None:
+        np.savez(path, **{
+            name: np.array(values, dtype=str) if isinstance(values, list) else np.frombuffer(values, dtype=values.typecode)
+            for name, values in arrays.items()
+        })
+        return
+    # what np.savez writes: one uncompressed .npy per column
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        for name, values in arrays.items():
+            archive.writestr(f"{name}.npy", _npy_bytes(values))
+
+
+def read_npz(path):
+    """``{name: array or list of str}`` from an .npz of 1-D columns, without numpy."""
+    typecodes = {dtype: code for code, dtype in _DTYPES.items()}
+    columns = {}
+    with zipfile.ZipFile(path) as archive:
+        for member in archive.namelist():
+            data = archive.read(member)
+            size = struct.unpack("<H", data[8:10])[0]
+            header = ast.literal_eval(data[10:10 + size].decode("latin-1"))
+            body = data[10 + size:]
+            descr, (length,) = header["descr"], header["shape"]
+            if descr.startswith("<U"):
+                width = int(descr[2:]) * 4
+                values = [body[i * width:(i + 1) * width].decode("utf-32-le").rstrip("\0") for i in range(length)]
+            else:
+                values = array(typecodes[descr])
+                values.frombytes(body)
+                if sys.byteorder == "big":
+                    values.byteswap()
+            columns[member[:-len(".npy")]] = values
+    return columns
+
+
+def default_format():
+    return "parquet" if pa is not None else "npz"
+
+
+def write_table(path, table, fmt=None):
+    fmt = fmt or default_format()
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    if fmt == "npz":
+        write_npz(path, table)
+    elif pa is None:
+        raise RuntimeError(f"writing {fmt} needs pyarrow (pip install pyarrow); npz works without it")
+    elif fmt == "parquet":
+        pyarrow.parquet.write_table(_arrow_table(table), path)
+    else:
+        pyarrow.feather.write_feather(_arrow_table(table), path, compression="uncompressed")
+    return path
+
+
+def export_season(players, events, out, fmt=None):
+    """Write ``<out>_players`` and ``<out>_events``; returns the two paths."""
+    fmt = fmt or default_format()
+    return [
+        write_table(f"{out}_{label}.{fmt}", table, fmt)
+        for label, table in (("players", player_table(players)), ("events", event_table(events)))
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export players and play-by-play as typed columnar files.")
+    parser.add_argument("data", help="basketball_data.bbd, basketball_data.json or the web app's data.db")
+    parser.add_argument("--plays", help="basketball_plays.jsonl, or an older basketball_plays.json (events table is empty without it)")
+    parser.add_argument("--out", default="season", help="output prefix (default: season)")
+    parser.add_argument("--format", choices=FORMATS, help=f"default: {default_format()}")
+    args = parser.parse_args(argv)
+
+    try:
+        players = load_players(args.data)
+        events = PlayByPlay.load(args.plays).events if args.plays else []
+        paths = export_season(players, events, args.out, args.format)
+    except (OSError, ValueError, RuntimeError, sqlite3.Error) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    for path in paths:
+        print(f"wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
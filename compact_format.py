@@ -0,0 +1,430 @@
+"""Compact, versioned on-disk format for the desktop app's data.
+
+``save_data`` used to write ``indent=2`` JSON in which most values are
+zeros repeated for every player and shot type. A ``.bbd`` file instead
+declares the stat schema once and stores only the counters that are not
+zero, as varints:
+
+    magic  b"BBD"
+    varint format version
+    varint header length, header JSON: {"schema": [field, ...], "strings": [...]}
+    varint body length, body of varints:
+    players: varint count, then per player
+        name (string index), sparse counters, number of shot locations
+    games (closed games, rollups.GameLine): varint count, then per game
+        season, game id (string indexes), varint lines, then per line
+        name (string index), sparse counters
+    season totals: varint count, then season, name, sparse counters
+    career totals: varint count, then name, sparse counters
+    sparse counters: varint count, then (field index * 2 + negative, |value|) pairs
+    after the body, every player's shot locations as little-endian uint32
+    (shot_chart.pack_shot codes, which would take 3 bytes as varints anyway)
+
+Fields are flattened counter paths (``shots.layup.made``); the schema
+starts with SCHEMA and appends any other field in the data (e.g. legacy
+``2pt`` shots), so it is "fixed" per file and older files stay readable.
+A game line is the delta of each player's counters against the previous
+closed game, so the season history is stored as per-game delta snapshots
+rather than repeated totals. Season and career totals are stored as
+well (a few hundred bytes), so loading doesn't re-add every game.
+
+``load_team`` reads a ``.bbd`` file and falls back to the old JSON files,
+so existing installs upgrade on their next save.
+
+    python compact_format.py bench --players 300 --games 40
+    python compact_format.py convert basketball_data.json basketball_data.bbd
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from array import array
+
+from basketball_model import SHOT_TYPES, Player
+from play_by_play import flatten_counters
+from rollups import GAMES, GameLine, RollupStore
+
+MAGIC = b"BBD"
+FORMAT_VERSION = 1
+
+SHOT_KEYS = ("made", "missed", "contested_made", "contested_missed")
+SCHEMA = (
+    ["points", "assists", "rebounds", "turnovers"]
+    + [f"shots.{t}.{k}" for t in SHOT_TYPES for k in SHOT_KEYS]
+    + [f"strike_zone.{k}" for k in ("balls", "strikes", "ball_made", "ball_missed", "strike_made", "strike_missed")]
+    + [f"cuts.{k}" for k in ("total", "pass_to_cutter", "made_shot", "missed_shot")]
+    + [f"paint_touches.{k}" for k in ("total", "made_shot", "missed_shot", "kick_out")]
+    + [f"defense.{k}" for k in ("contested_made", "contested_missed", "uncontested_made", "uncontested_missed")]
+)
+
+
+# --- varints ---
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+_MULTI_BYTE = re.compile(rb"[\x80-\xff]+[\x00-\x7f]")
+
+
+def _decode_varints(data):
+    """Every varint in ``data``; runs of one-byte values are copied in one go."""
+    values = []
+    start = 0
+    for match in _MULTI_BYTE.finditer(data):
+        values.extend(data[start:match.start()])
+        value = shift = 0
+        for byte in match.group():
+            value |= (byte & 0x7F) << shift
+            shift += 7
+        values.append(value)
+        start = match.end()
+    values.extend(data[start:])
+    return values
+
+
+# --- encoding ---
+
+class _Strings:
+    def __init__(self):
+        self.items = []
+        self.index = {}
+
+    def __call__(self, text):
+        index = self.index.get(text)
+        if index is None:
+            index = self.index[text] = len(self.items)
+            self.items.append(text)
+        return index
+
+
+def _write_counters(out, counters, field_index):
+    pairs = sorted((field_index[field], value) for field, value in counters.items() if value)
+    _write_varint(out, len(pairs))
+    for index, value in pairs:
+        # the low bit of the field number is the sign, so values stay unsigned
+        key = index << 1
+        if value < 0:
+            key, value = key | 1, -value
+        if key < 0x80 and value < 0x80:
+            out.append(key)
+            out.append(value)
+        else:
+            _write_varint(out, key)
+            _write_varint(out, value)
+
+
+def build_schema(counter_dicts):
+    extra = set()
+    for counters in counter_dicts:
+        extra.update(field for field, value in counters.items() if value)
+    return SCHEMA + sorted(extra.difference(SCHEMA), key=lambda f: (f == GAMES, f))
+
+
+def dumps(players, rollups=None):
+    """Encode ``players`` (Player objects) and a RollupStore (closed games plus their totals)."""
+    players = list(players)
+    rollups = rollups or RollupStore()
+    counters = [flatten_counters(player) for player in players]
+    schema = build_schema(
+        counters + [line.counters for line in rollups.games]
+        + list(rollups.seasons.values()) + list(rollups.careers.values())
+    )
+    field_index = {field: i for i, field in enumerate(schema)}
+    strings = _Strings()
+    body = bytearray()
+    locations = array("I")
+
+    _write_varint(body, len(players))
+    for player, flat in zip(players, counters):
+        _write_varint(body, strings(player.name))
+        _write_counters(body, flat, field_index)
+        _write_varint(body, len(player.shot_locations))
+        locations.extend(player.shot_locations)
+
+    # consecutive lines of the same game form one snapshot
+    snapshots = []
+    for line in rollups.games:
+        if snapshots and snapshots[-1][0] == (line.season, line.game_id):
+            snapshots[-1][1].append(line)
+        else:
+            snapshots.append(((line.season, line.game_id), [line]))
+    _write_varint(body, len(snapshots))
+    for (season, game_id), lines in snapshots:
+        _write_varint(body, strings(season))
+        _write_varint(body, strings(game_id))
+        _write_varint(body, len(lines))
+        for line in lines:
+            _write_varint(body, strings(line.name))
+            _write_counters(body, line.counters, field_index)
+
+    # season and career totals, so loading doesn't re-add every game
+    _write_varint(body, len(rollups.seasons))
+    for (season, name), totals in rollups.seasons.items():
+        _write_varint(body, strings(season))
+        _write_varint(body, strings(name))
+        _write_counters(body, totals, field_index)
+    _write_varint(body, len(rollups.careers))
+    for name, totals in rollups.careers.items():
+        _write_varint(body, strings(name))
+        _write_counters(body, totals, field_index)
+
+    header = json.dumps({"schema": schema, "strings": strings.items}, separators=(",", ":")).encode("utf-8")
+    out = bytearray(MAGIC)
+    _write_varint(out, FORMAT_VERSION)
+    _write_varint(out, len(header))
+    out += header
+    _write_varint(out, len(body))
+    if sys.byteorder == "big":
+        locations.byteswap()
+    return bytes(out + body + locations.tobytes())
+
+
+# --- decoding ---
+
+def _setter(field):
+    """Store one schema field on a Player."""
+    parts = field.split(".")
+    if len(parts) == 1:
+        return lambda player, value: setattr(player, field, value)
+    if parts[0] == "shots" and len(parts) == 3:
+        shot_type, key = parts[1], parts[2]
+        return lambda player, value: player.shots[shot_type].__setitem__(key, value)
+    group, key = parts[0], parts[-1]
+    return lambda player, value: getattr(player, group).__setitem__(key, value)
+
+
+class _Fields:
+    """Turns the (field number, value) pairs written by _write_counters back into dicts."""
+
+    def __init__(self, schema):
+        self.names = [field for field in schema for _ in (0, 1)]
+        self.negative = set(range(1, 2 * len(schema), 2))
+
+    def read(self, values, pos):
+        """``(counters, next position)`` for the counters starting at ``values[pos]``."""
+        end = pos + 1 + 2 * values[pos]
+        keys, numbers = values[pos + 1:end:2], values[pos + 2:end:2]
+        counters = dict(zip(map(self.names.__getitem__, keys), numbers))
+        if not self.negative.isdisjoint(keys):
+            for key in self.negative.intersection(keys):
+                counters[self.names[key]] *= -1
+        return counters, end
+
+
+def loads(data, rollups=None):
+    """``(players, rollups)``: Player objects and a RollupStore (``rollups``, replaced in place, if given)."""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a compact data file")
+    pos = len(MAGIC)
+    version, pos = _read_varint(data, pos)
+    if version > FORMAT_VERSION:
+        raise ValueError(f"data file format {version} is newer than this app understands ({FORMAT_VERSION})")
+    size, pos = _read_varint(data, pos)
+    header = json.loads(data[pos:pos + size].decode("utf-8"))
+    schema, strings = header["schema"], header["strings"]
+    pos += size
+    size, pos = _read_varint(data, pos)
+    values = _decode_varints(data[pos:pos + size])
+    locations = array("I")
+    locations.frombytes(data[pos + size:])
+    if sys.byteorder == "big":
+        locations.byteswap()
+    setters = {field: _setter(field) for field in schema}
+    fields = _Fields(schema)
+    pos = start = 0
+
+    players = []
+    count = values[pos]
+    pos += 1
+    for _ in range(count):
+        player = Player(strings[values[pos]])
+        counters, pos = fields.read(values, pos + 1)
+        for field, value in counters.items():
+            setters[field](player, value)
+        player.shot_locations = locations[start:start + values[pos]]
+        start += values[pos]
+        pos += 1
+        players.append(player)
+
+    if rollups is None:
+        rollups = RollupStore()
+    rollups.games, rollups.seasons, rollups.careers = [], {}, {}
+    count = values[pos]
+    pos += 1
+    for _ in range(count):
+        season, game_id, lines = strings[values[pos]], strings[values[pos + 1]], values[pos + 2]
+        pos += 3
+        for _ in range(lines):
+            name = strings[values[pos]]
+            counters, pos = fields.read(values, pos + 1)
+            rollups.games.append(GameLine(season, game_id, name, counters))
+    count = values[pos]
+    pos += 1
+    for _ in range(count):
+        key = (strings[values[pos]], strings[values[pos + 1]])
+        rollups.seasons[key], pos = fields.read(values, pos + 2)
+    count = values[pos]
+    pos += 1
+    for _ in range(count):
+        name = strings[values[pos]]
+        rollups.careers[name], pos = fields.read(values, pos + 1)
+    return players, rollups
+
+
+def is_compact(path):
+    try:
+        with open(path, "rb") as handle:
+            return handle.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def save(path, players, rollups=None):
+    """Write atomically, so a crash mid-save leaves the previous file."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as handle:
+        handle.write(dumps(players, rollups))
+    os.replace(tmp, path)
+
+
+def load(path, rollups=None):
+    with open(path, "rb") as handle:
+        return loads(handle.read(), rollups)
+
+
+def load_team(compact_path, json_path=None, rollups_path=None, rollups=None):
+    """``(players, rollups)`` from the compact file, or the old JSON files if there is none yet."""
+    if os.path.exists(compact_path):
+        return load(compact_path, rollups)
+    return load_json_team(json_path, rollups_path, rollups)
+
+
+def load_json_team(json_path=None, rollups_path=None, rollups=None):
+    """``(players, rollups)`` from the old JSON files; a missing file counts as empty."""
+    players = []
+    if json_path and os.path.exists(json_path):
+        with open(json_path, "r", encoding="utf-8") as handle:
+            players = [Player.from_dict(name, payload) for name, payload in json.load(handle).items()]
+    if rollups is None:
+        rollups = RollupStore()
+    rollups.restore({})
+    if rollups_path and os.path.exists(rollups_path):
+        with open(rollups_path, "r", encoding="utf-8") as handle:
+            rollups.restore(json.load(handle))
+    return players, rollups
+
+
+# --- comparison on a synthetic season ---
+
+def synthetic_season(players=15, games=30, seed=1):
+    """A roster played through ``games`` closed games; returns ``(players, rollup store)``."""
+    rng = random.Random(seed)
+    roster = [Player(f"Player {i}") for i in range(players)]
+    rollups = RollupStore()
+    for game in range(games):
+        for player in roster:
+            for _ in range(rng.randint(0, 25)):
+                pick = rng.random()
+                if pick < 0.5:
+                    x, y = rng.uniform(-25, 25), rng.uniform(0, 30)
+                    player.record_shot(rng.choice(SHOT_TYPES), rng.random() < 0.45, rng.random() < 0.3,
+                                       **({"x": x, "y": y} if rng.random() < 0.3 else {}))
+                elif pick < 0.7:
+                    player.record_stat(rng.choice(["assists", "rebounds", "turnovers"]))
+                elif pick < 0.8:
+                    player.record_cut(rng.choice(["pass", "made", "missed"]))
+                elif pick < 0.9:
+                    player.record_paint_touch(rng.choice(["made", "missed", "kick"]))
+                else:
+                    player.record_defense(rng.random() < 0.5, rng.random() < 0.4)
+        rollups.close_game("2026", f"G{game + 1}", roster)
+    return roster, rollups
+
+
+def compare(players, rollups, repeat=5):
+    """Size and load time of the old JSON files vs one compact file."""
+    json_data = json.dumps({p.name: p.to_dict() for p in players}, indent=2)
+    json_rollups = json.dumps(rollups.to_dict())
+    compact = dumps(players, rollups)
+
+    def best(fn):
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - started)
+        return min(times)
+
+    def load_json():
+        [Player.from_dict(name, payload) for name, payload in json.loads(json_data).items()]
+        RollupStore.from_dict(json.loads(json_rollups))
+
+    def load_compact():
+        loads(compact)
+
+    return {
+        "json_bytes": len(json_data.encode("utf-8")) + len(json_rollups.encode("utf-8")),
+        "compact_bytes": len(compact),
+        "json_load_s": best(load_json),
+        "compact_load_s": best(load_compact),
+        "json_save_s": best(lambda: (json.dumps({p.name: p.to_dict() for p in players}, indent=2), json.dumps(rollups.to_dict()))),
+        "compact_save_s": best(lambda: dumps(players, rollups)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compact data file tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench = commands.add_parser("bench", help="compare JSON and compact size and speed on a synthetic season")
+    bench.add_argument("--players", type=int, default=15)
+    bench.add_argument("--games", type=int, default=30)
+    convert = commands.add_parser("convert", help="convert between basketball_data.json and .bbd")
+    convert.add_argument("source")
+    convert.add_argument("target")
+    convert.add_argument("--rollups", help="basketball_rollups.json to read (to .bbd) or write (from .bbd)")
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        result = compare(*synthetic_season(args.players, args.games))
+        print(f"{args.players} players, {args.games} games")
+        print(f"size  json {result['json_bytes']:>10,} B   compact {result['compact_bytes']:>10,} B   "
+              f"({result['json_bytes'] / result['compact_bytes']:.1f}x smaller)")
+        for what in ("load", "save"):
+            j, c = result[f"json_{what}_s"], result[f"compact_{what}_s"]
+            print(f"{what}  json {j * 1000:>9.1f} ms   compact {c * 1000:>9.1f} ms   ({j / c:.1f}x)")
+        return 0
+
+    if is_compact(args.source):
+        players, rollups = load(args.source)
+        with open(args.target, "w", encoding="utf-8") as handle:
+            json.dump({p.name: p.to_dict() for p in players}, handle, indent=2)
+        if args.rollups:
+            with open(args.rollups, "w", encoding="utf-8") as handle:
+                json.dump(rollups.to_dict(), handle)
+    else:
+        players, rollups = load_json_team(args.source, args.rollups)
+        save(args.target, players, rollups)
+    print(f"wrote {len(players)} players to {args.target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""A player's event history with only the recent events in memory.
+
+basketball_app.py used to keep every event of the session in
+``Player.event_history`` and write the whole list on every save. A
+SpilledHistory keeps at most WINDOW events in memory; once there are
+more, the oldest half are appended to the player's segment file
+(one JSON object per line) and dropped from memory. Iterating goes
+through the segment lazily and then the in-memory events, so reports see
+the full history and memory stays flat however long the session runs.
+
+The data file only stores the recent events and how far the segment
+goes:
+
+    {"segment": "Ann-1a2b3c4d.jsonl", "spilled": 812, "size": 45213, "recent": [...]}
+
+A segment that is longer than ``size`` (events spilled after the last
+save, which are still in the saved ``recent``) is cut back on load, so a
+crash between the two never duplicates events. A plain list (the old
+format) is loaded as recent events and spilled on the next append.
+
+SpilledLog does the same for the play-by-play log the app replays its
+totals from: the log's JSON-lines file is the log, only the latest events
+are in memory, and earlier ones are read back by position.
+"""
+import collections
+import json
+import os
+import re
+import zlib
+from array import array
+
+from play_by_play import GameStamp, PlayByPlay, PlayEvent
+
+WINDOW = 256
+BLOCK = 64  # SpilledLog keeps the file offset of every BLOCK-th event
+_TAIL_BLOCK = 4096
+
+
+def segment_name(name):
+    """File name for a player's segment: readable, and unique even for names that differ only in odd characters."""
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", name)[:40] or "player"
+    return f"{slug}-{zlib.crc32(name.encode('utf-8')):08x}.jsonl"
+
+
+class SpilledHistory:
+    def __init__(self, directory, name, window=WINDOW):
+        self.directory = directory
+        self.segment = segment_name(name)
+        self.window = window
+        self.recent = []
+        self.spilled = 0  # events in the segment
+        self.size = 0  # bytes of the segment in use
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, self.segment)
+
+    @staticmethod
+    def restore(data, directory, name, window=WINDOW):
+        """A history from what ``to_dict`` saved (or an old plain list)."""
+        history = SpilledHistory(directory, name, window)
+        if isinstance(data, dict):
+            history.segment = os.path.basename(data.get("segment") or history.segment)
+            history.recent = list(data.get("recent") or [])
+            history.spilled = int(data.get("spilled", 0))
+            history.size = int(data.get("size", 0))
+            history._check_segment()
+        else:
+            history.recent = list(data or [])
+        return history
+
+    def _check_segment(self):
+        try:
+            actual = os.path.getsize(self.path)
+        except OSError:
+            actual = 0
+        if actual > self.size:
+            with open(self.path, "rb+") as handle:
+                handle.truncate(self.size)
+        elif actual < self.size:  # segment lost or cut short: keep what is there
+            self.size = actual
+            self.spilled = sum(1 for _ in self._read_segment())
+
+    def to_dict(self):
+        return {"segment": self.segment, "spilled": self.spilled, "size": self.size, "recent": list(self.recent)}
+
+    def __len__(self):
+        return self.spilled + len(self.recent)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        yield from self._read_segment()
+        yield from list(self.recent)
+
+    def _read_segment(self):
+        if not self.size:
+            return
+        with open(self.path, "rb") as handle:
+            remaining = self.size
+            for line in handle:
+                if remaining <= 0:
+                    break
+                remaining -= len(line)
+                yield json.loads(line)
+
+    def append(self, event):
+        self.recent.append(event)
+        if len(self.recent) > self.window:
+            self._spill(max(self.window // 2, len(self.recent) - self.window))
+
+    def _spill(self, count):
+        data = "".join(json.dumps(event, separators=(",", ":")) + "\n" for event in self.recent[:count])
+        data = data.encode("utf-8")
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path, "ab") as handle:
+            handle.truncate(self.size)  # drop anything past what we know about
+            handle.write(data)
+        self.size += len(data)
+        self.spilled += count
+        del self.recent[:count]
+
+    def pop(self):
+        """Remove and return the latest event, reading it back from the segment if memory is empty."""
+        if self.recent:
+            return self.recent.pop()
+        if not self.spilled:
+            raise IndexError("pop from empty history")
+        with open(self.path, "rb+") as handle:
+            # the last line ends at ``size``; look back for the newline before it
+            start = self.size - 1
+            while start > 0:
+                block = max(0, start - _TAIL_BLOCK)
+                handle.seek(block)
+                found = handle.read(start - block).rfind(b"\n")
+                if found >= 0:
+                    start = block + found + 1
+                    break
+                start = block
+            handle.seek(start)
+            event = json.loads(handle.read(self.size - start))
+            handle.truncate(start)
+        self.size = start
+        self.spilled -= 1
+        return event
+
+    def discard(self):
+        """Forget everything, including the segment file."""
+        self.recent = []
+        self.spilled = self.size = 0
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class SpilledLog:
+    """A play-by-play log kept in its JSON-lines file, for basketball_app.
+
+    At most ``window`` of the latest events stay in memory; ``iter_events``
+    reads earlier ones from the file, seeking to the byte offset kept for
+    every ``block``-th event, so memory grows by one offset per block.
+    New events are written on ``flush`` (the app's save) or once more than
+    ``window`` are waiting. Deleting an event or a player rewrites the file
+    line by line. Stamps and clock positions work as in PlayByPlay, so
+    ``play_logged`` methods and Replay take it in place of one.
+    """
+
+    def __init__(self, path, window=WINDOW, block=BLOCK, clock=None):
+        self.path = path
+        self.window = window
+        self.block = block
+        self.clock = clock or PlayByPlay()  # stamps and timeline positions; holds no events
+        self.recent = []  # the latest events, recent[0] being event number len(self) - len(recent)
+        self.version = 0  # bumped whenever the file is reread
+        self._count = 0
+        self._written = 0  # events in the file
+        self._size = 0  # bytes of the file in use
+        self._blocks = array("q")  # file offsets of events 0, block, 2 * block, ...
+
+    @property
+    def period_seconds(self):
+        return self.clock.period_seconds
+
+    def stamp(self, game_id, period, clock):
+        return GameStamp(self, game_id, period, clock)
+
+    def position(self, period, clock):
+        return self.clock.position(period, clock)
+
+    def __len__(self):
+        return self._count
+
+    def load(self):
+        """Read the file once, keeping the latest ``window`` events; a last line cut short by a crash is dropped."""
+        recent = collections.deque(maxlen=self.window)
+        self._blocks = array("q")
+        self._count = self._size = 0
+        try:
+            with open(self.path, "rb") as handle:
+                for line in handle:
+                    if not line.endswith(b"\n"):
+                        break
+                    if line.strip():
+                        if self._count % self.block == 0:
+                            self._blocks.append(self._size)
+                        recent.append(line)
+                        self._count += 1
+                    self._size += len(line)
+            if os.path.getsize(self.path) > self._size:
+                with open(self.path, "rb+") as handle:
+                    handle.truncate(self._size)
+        except FileNotFoundError:
+            pass
+        self.recent = [PlayEvent.from_dict(json.loads(line)) for line in recent]
+        self._written = self._count
+        self.version += 1
+
+    def append(self, player, when, kind, delta):
+        event = PlayEvent(when.game_id, when.period, when.clock, player, kind, dict(delta))
+        self.recent.append(event)
+        self._count += 1
+        if len(self.recent) > self.window:
+            self.flush()
+        return event
+
+    def flush(self):
+        """Write the events logged since the last flush; then only the latest ``window`` stay in memory."""
+        first = self._count - len(self.recent)
+        pending = self.recent[self._written - first:]
+        if pending:
+            lines, offset = [], self._size
+            for number, event in enumerate(pending, self._written):
+                line = (json.dumps(event.to_dict()) + "\n").encode("utf-8")
+                if number % self.block == 0:
+                    self._blocks.append(offset)
+                lines.append(line)
+                offset += len(line)
+            with open(self.path, "ab") as handle:
+                handle.truncate(self._size)  # drop anything past what we know about
+                handle.write(b"".join(lines))
+            self._size, self._written = offset, self._count
+        if len(self.recent) > self.window:
+            del self.recent[:len(self.recent) - self.window // 2]
+
+    def iter_events(self, start=0, end=None):
+        """Events ``start`` to ``end`` in order: from the file, then from memory."""
+        end = self._count if end is None else min(end, self._count)
+        first = self._count - len(self.recent)
+        if start < min(end, first):
+            yield from self._read(start, min(end, first))
+        for index in range(max(start, first), end):
+            yield self.recent[index - first]
+
+    def _read(self, start, end):
+        number = start - start % self.block
+        with open(self.path, "rb") as handle:
+            handle.seek(self._blocks[start // self.block])
+            for line in handle:
+                if number >= end:
+                    break
+                if not line.strip():
+                    continue
+                if number >= start:
+                    yield PlayEvent.from_dict(json.loads(line))
+                number += 1
+
+    def last_index(self, player):
+        """Number of ``player``'s latest event, or None; reads the file back a block at a time."""
+        first = self._count - len(self.recent)
+        for index in range(len(self.recent) - 1, -1, -1):
+            if self.recent[index].player == player:
+                return first + index
+        for block in range((first - 1) // self.block, -1, -1):
+            start = block * self.block
+            found = None
+            for index, event in enumerate(self._read(start, min(start + self.block, first)), start):
+                if event.player == player:
+                    found = index
+            if found is not None:
+                return found
+        return None
+
+    def _rewrite(self, keep):
+        self.flush()
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as handle:
+            for index, event in enumerate(self.iter_events()):
+                if keep(index, event):
+                    handle.write(json.dumps(event.to_dict()) + "\n")
+        os.replace(tmp, self.path)
+        self.load()
+
+    def delete(self, index):
+        self._rewrite(lambda number, event: number != index)
+
+    def remove_player(self, name):
+        self._rewrite(lambda number, event: event.player != name)
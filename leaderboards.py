@@ -0,0 +1,143 @@
+"""Leaderboards for every metric, kept sorted as players change.
+
+``LeaderboardService`` holds one sorted index per metric. Updating a
+player repositions them in each index whose value changed, which is a
+bisect (O(log n)) plus a list insert/delete; for a roster that is far
+cheaper than re-sorting ``TEAM.values()`` on every read. Top-k, rank and
+percentile queries are bisects or slices of those indexes.
+
+Usage% is indexed by used possessions. Every player's Usage% shares the
+same team-possessions divisor, so the order is the same, and one player's
+event does not force everyone else to be re-indexed.
+"""
+import bisect
+
+from basketball_model import TRACKING_FIELDS, tracking_row, used_possessions
+
+# Every metric with a leaderboard, in display order
+LEADERBOARD_METRICS = ["PER", "TS%", "A/T", "Usage%", "BPM", "points", "assists", "rebounds", "turnovers"] + TRACKING_FIELDS
+
+RATE_METRICS = ("PER", "TS%", "A/T", "Usage%", "BPM")
+
+# Shown in reports and added to exports as "<metric> rank"
+RANKED_METRICS = ("PER", "TS%", "Usage%", "BPM", "points")
+RANK_FIELDS = [f"{metric} rank" for metric in RANKED_METRICS]
+
+
+def metric_values(player):
+    """Sort value of every leaderboard metric for ``player``."""
+    values = {
+        "PER": player.calc_per(),
+        "TS%": player.calc_ts(),
+        "A/T": player.calc_ast_to_tov(),
+        "Usage%": used_possessions(player),
+        "BPM": player.calc_bpm(),
+        "points": player.points,
+        "assists": player.assists,
+        "rebounds": player.rebounds,
+        "turnovers": player.turnovers,
+    }
+    values.update(tracking_row(player))
+    return values
+
+
+def display_value(metric, value, team_pos):
+    """Turn an index value back into what the reports show."""
+    if metric == "Usage%":
+        return round(100 * value / team_pos, 2) if team_pos > 0 else 0.0
+    if metric not in RATE_METRICS:
+        return int(value)  # counters come back from a float column
+    return value
+
+
+class _After:
+    """Sorts after every name, for "last entry with this value" bisects."""
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+_AFTER = _After()
+
+
+class Leaderboard:
+    """Names sorted by value, highest first (ties by name)."""
+
+    def __init__(self):
+        self.entries = []  # (-value, name), ascending
+        self.values = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def update(self, name, value):
+        old = self.values.get(name)
+        if name in self.values and old == value:
+            return
+        if old is not None:
+            del self.entries[bisect.bisect_left(self.entries, (-old, name))]
+        bisect.insort(self.entries, (-value, name))
+        self.values[name] = value
+
+    def remove(self, name):
+        old = self.values.pop(name, None)
+        if old is not None:
+            del self.entries[bisect.bisect_left(self.entries, (-old, name))]
+
+    def top(self, k):
+        return [(name, -neg) for neg, name in self.entries[:k]]
+
+    def rank(self, name):
+        """1-based competition rank (ties share the better rank), None if unknown."""
+        value = self.values.get(name)
+        if value is None:
+            return None
+        return 1 + bisect.bisect_left(self.entries, (-value,))
+
+    def percentile(self, name):
+        """Percent of the other players this one ranks above, counting ties as half."""
+        value = self.values.get(name)
+        if value is None:
+            return None
+        n = len(self.entries)
+        if n == 1:
+            return 100.0
+        better = bisect.bisect_left(self.entries, (-value,))
+        tied = bisect.bisect_right(self.entries, (-value, _AFTER)) - better - 1
+        below = n - better - tied - 1
+        return round(100 * (below + tied / 2) / (n - 1), 1)
+
+
+class LeaderboardService:
+    def __init__(self, metrics=LEADERBOARD_METRICS):
+        self.boards = {metric: Leaderboard() for metric in metrics}
+
+    def update(self, player):
+        values = metric_values(player)
+        for metric, board in self.boards.items():
+            board.update(player.name, values[metric])
+
+    def remove(self, name):
+        for board in self.boards.values():
+            board.remove(name)
+
+    def rebuild(self, players):
+        for metric in self.boards:
+            self.boards[metric] = Leaderboard()
+        for player in players:
+            self.update(player)
+
+    def top(self, metric, k=5, team_pos=1):
+        return [(name, display_value(metric, value, team_pos)) for name, value in self.boards[metric].top(k)]
+
+    def rank(self, metric, name):
+        return self.boards[metric].rank(name)
+
+    def percentile(self, metric, name):
+        return self.boards[metric].percentile(name)
+
+    def rank_row(self, name):
+        return {f"{metric} rank": self.rank(metric, name) for metric in RANKED_METRICS}
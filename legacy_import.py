@@ -0,0 +1,316 @@
+"""Import data files from every version of the tally apps into one canonical file.
+
+Three shapes of ``basketball_data.json`` are around, keyed by player name:
+
+- ``stats`` (basketball_stats.py): shots by type with made/missed only,
+  assists, turnovers, rebounds, points; ``2pt`` is a shot type.
+- ``analytics`` (basketball_app.py): nested ``strike_zone`` (``balls:
+  {total, made, missed}``), ``paint_touches`` with ``made``/``missed``/
+  ``kick``, nested ``defense``, plus ``event_history`` and ``games_played``.
+- ``app`` (app.py and the web backup): the canonical ``Player.to_dict()``
+  shape with flat ``ball_made``/``strike_missed`` keys; older files carry
+  stray all-zero ``2pt`` entries left by the defaultdict.
+
+The format is detected per record, so a hand-merged file with mixed
+records imports fine. Records are normalised straight into the
+``Player.to_dict()`` shape: empty shot types are dropped, a non-empty
+``2pt`` is kept as is (there is no telling layups from midrange), and
+``event_history``/``games_played`` are dropped (in whichever format they
+turn up) since closed games live in the rollups now. The points total is
+kept as recorded.
+
+Files are parsed on a process pool. Files over STREAM_THRESHOLD are
+streamed record by record (see restore_jobs.iter_json_object); smaller
+ones go through json.load, which is several times faster. A name seen in several files is merged by
+adding up the counters (``--on-duplicate last`` keeps the later file
+instead). The output loads in the desktop app or restores on the web app.
+
+    python legacy_import.py old_seasons/ laptop/basketball_data.json --out basketball_data.json
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from restore_jobs import MAX_REPORTED_ERRORS, iter_json_object
+from shot_chart import decode_locations, encode_locations
+
+FORMATS = ("app", "analytics", "stats")
+STREAM_THRESHOLD = 64 * 1024 * 1024  # bytes
+SHOT_KEYS = ("made", "missed", "contested_made", "contested_missed")
+TOTAL_KEYS = ("assists", "turnovers", "rebounds", "points")
+GROUP_KEYS = {
+    "strike_zone": ("balls", "strikes", "ball_made", "ball_missed", "strike_made", "strike_missed"),
+    "cuts": ("total", "pass_to_cutter", "made_shot", "missed_shot"),
+    "paint_touches": ("total", "made_shot", "missed_shot", "kick_out"),
+    "defense": ("contested_made", "contested_missed", "uncontested_made", "uncontested_missed"),
+}
+# analytics-format paint touch keys
+_PAINT_ALIASES = {"made": "made_shot", "missed": "missed_shot", "kick": "kick_out"}
+
+
+def _nested(group):
+    return isinstance(group, dict) and any(isinstance(value, dict) for value in group.values())
+
+
+def detect_format(payload):
+    """``"app"``, ``"analytics"`` or ``"stats"`` for one player record.
+
+    Decided by the shape of the counter groups; some app-format files also
+    carry an ``event_history``.
+    """
+    if _nested(payload.get("strike_zone")) or _nested(payload.get("defense")):
+        return "analytics"
+    paint = payload.get("paint_touches")
+    if isinstance(paint, dict) and any(key in paint for key in _PAINT_ALIASES):
+        return "analytics"
+    if any(key in payload for key in ("strike_zone", "cuts", "paint_touches", "defense", "shot_locations")):
+        return "app"
+    if "games_played" in payload:
+        return "analytics"
+    return "stats"
+
+
+def _flat_groups(payload):
+    return {
+        group: {key: (payload.get(group) or {}).get(key, 0) for key in keys}
+        for group, keys in GROUP_KEYS.items()
+    }
+
+
+def _analytics_groups(payload):
+    sz = payload.get("strike_zone") or {}
+    balls, strikes = sz.get("balls") or {}, sz.get("strikes") or {}
+    paint = payload.get("paint_touches") or {}
+    defense = payload.get("defense") or {}
+    contested, uncontested = defense.get("contested") or {}, defense.get("uncontested") or {}
+    cuts = payload.get("cuts") or {}
+    return {
+        "strike_zone": {
+            "balls": balls.get("total", 0), "strikes": strikes.get("total", 0),
+            "ball_made": balls.get("made", 0), "ball_missed": balls.get("missed", 0),
+            "strike_made": strikes.get("made", 0), "strike_missed": strikes.get("missed", 0),
+        },
+        "cuts": {key: cuts.get(key, 0) for key in GROUP_KEYS["cuts"]},
+        "paint_touches": {
+            "total": paint.get("total", 0),
+            **{new: paint.get(old, paint.get(new, 0)) for old, new in _PAINT_ALIASES.items()},
+        },
+        "defense": {
+            "contested_made": contested.get("made", 0), "contested_missed": contested.get("missed", 0),
+            "uncontested_made": uncontested.get("made", 0), "uncontested_missed": uncontested.get("missed", 0),
+        },
+    }
+
+
+def normalize_record(name, payload):
+    """``(format, canonical record)``; the record is shaped like ``Player.to_dict()``."""
+    fmt = detect_format(payload)
+    shots = {}
+    for shot_type, counts in (payload.get("shots") or {}).items():
+        row = {key: (counts or {}).get(key, 0) for key in SHOT_KEYS}
+        if any(row.values()):
+            shots[shot_type] = row
+    record = {"name": name, "shots": shots}
+    record.update({key: payload.get(key, 0) for key in TOTAL_KEYS})
+    record.update(_analytics_groups(payload) if fmt == "analytics" else _flat_groups(payload))
+    record["shot_locations"] = payload.get("shot_locations") or ""
+    return fmt, record
+
+
+def _bad_count(value):
+    return type(value) is not int or value < 0  # bools are not counts either
+
+
+def check_record(name, record):
+    """A reason string if a normalised record can't be imported (cf. restore_jobs.validate_player)."""
+    if not name.strip():
+        return "empty name"
+    values = [record[key] for key in TOTAL_KEYS]
+    for counts in record["shots"].values():
+        values.extend(counts.values())
+    for group in GROUP_KEYS:
+        values.extend(record[group].values())
+    if all(type(value) is int for value in values) and min(values) >= 0:
+        return _check_locations(record)
+    # find the offending counter for the message
+    for key in TOTAL_KEYS:
+        if _bad_count(record[key]):
+            return f"{key} must be a whole number"
+    groups = [("shots." + shot_type, counts) for shot_type, counts in record["shots"].items()]
+    groups += [(group, record[group]) for group in GROUP_KEYS]
+    for label, group in groups:
+        for key, value in group.items():
+            if _bad_count(value):
+                return f"{label}.{key} must be a whole number"
+    return None
+
+
+def _check_locations(record):
+    if record["shot_locations"]:
+        try:
+            decode_locations(record["shot_locations"])
+        except (TypeError, ValueError):
+            return "shot_locations must be base64 packed shots"
+    return None
+
+
+def merge_records(into, record):
+    """Add ``record``'s counters (and located shots) to ``into``."""
+    for key in TOTAL_KEYS:
+        into[key] += record[key]
+    for shot_type, counts in record["shots"].items():
+        target = into["shots"].setdefault(shot_type, dict.fromkeys(SHOT_KEYS, 0))
+        for key, value in counts.items():
+            target[key] += value
+    for group in GROUP_KEYS:
+        for key, value in record[group].items():
+            into[group][key] += value
+    if record["shot_locations"]:
+        codes = decode_locations(into["shot_locations"])
+        codes.extend(decode_locations(record["shot_locations"]))
+        into["shot_locations"] = encode_locations(codes)
+    return into
+
+
+def iter_records(path):
+    """``(name, payload)`` for every player in a data file."""
+    if os.path.getsize(path) > STREAM_THRESHOLD:
+        with open(path, "r", encoding="utf-8") as handle:
+            yield from iter_json_object(handle)
+        return
+    with open(path, "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+    if not isinstance(data, dict):
+        raise ValueError("expected an object keyed by player name")
+    yield from data.items()
+
+
+def import_file(path):
+    """Normalise every record of one file; runs in a worker process."""
+    result = {"path": path, "records": [], "formats": Counter(), "skipped": [], "history_events": 0, "error": None}
+    try:
+        for name, payload in iter_records(path):
+            reason = None if isinstance(payload, dict) else "record is not an object"
+            if reason is None:
+                try:
+                    fmt, record = normalize_record(name, payload)
+                except (AttributeError, TypeError):
+                    reason = "counters are not objects"
+                else:
+                    reason = check_record(name, record)
+            if reason:
+                if len(result["skipped"]) < MAX_REPORTED_ERRORS:
+                    result["skipped"].append((name, reason))
+                result["formats"]["skipped"] += 1
+                continue
+            result["formats"][fmt] += 1
+            history = payload.get("event_history")
+            if isinstance(history, list):
+                result["history_events"] += len(history)
+            elif isinstance(history, dict):  # recent events plus a segment file (event_history.py)
+                result["history_events"] += int(history.get("spilled", 0)) + len(history.get("recent") or [])
+            result["records"].append(record)
+    except (OSError, ValueError, UnicodeDecodeError) as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+    return result
+
+
+def expand_paths(inputs):
+    """Files named directly, globbed, or the ``*.json`` files in a directory; duplicates dropped."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, "*.json"))))
+        else:
+            paths.extend(sorted(glob.glob(item)) or [item])
+    return list(dict.fromkeys(paths))
+
+
+def run_import(paths, workers=None, on_duplicate="merge"):
+    """Import every file; returns ``(players by name, report)`` with players in first-seen order."""
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= 1:
+        results = [import_file(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(paths) // (workers * 4))
+            results = list(executor.map(import_file, paths, chunksize=chunksize))
+    players = {}
+    report = {"files": 0, "records": 0, "formats": Counter(), "merged": 0, "history_events": 0, "skipped": [], "errors": []}
+    for result in results:  # input order, so "last" means the later file
+        if result["error"]:
+            report["errors"].append((result["path"], result["error"]))
+            continue
+        report["files"] += 1
+        report["formats"].update(result["formats"])
+        report["history_events"] += result["history_events"]
+        report["skipped"].extend((result["path"], name, reason) for name, reason in result["skipped"])
+        for record in result["records"]:
+            report["records"] += 1
+            name = record["name"]
+            if name not in players:
+                players[name] = record
+                continue
+            report["merged"] += 1
+            if on_duplicate == "merge":
+                merge_records(players[name], record)
+            else:
+                players[name] = record
+    report["seconds"] = time.perf_counter() - started
+    return players, report
+
+
+def write_players(path, players):
+    """Write the canonical file one player at a time (same shape as save_data / the web backup)."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as handle:
+        handle.write("{")
+        for i, (name, record) in enumerate(players.items()):
+            handle.write(",\n" if i else "\n")
+            handle.write(f"  {json.dumps(name)}: {json.dumps(record)}")
+        handle.write("\n}\n")
+    os.replace(tmp, path)
+
+
+def format_report(report, players):
+    seconds = report["seconds"]
+    formats = ", ".join(f"{fmt} {report['formats'][fmt]}" for fmt in FORMATS + ("skipped",) if report["formats"][fmt])
+    lines = [
+        f"{report['files']} files, {report['records']} records ({formats or 'none'}) -> {len(players)} players "
+        f"in {seconds:.2f}s ({report['records'] / seconds if seconds else 0.0:.0f} records/s)",
+    ]
+    if report["merged"]:
+        lines.append(f"{report['merged']} records for a name already imported were combined")
+    if report["history_events"]:
+        lines.append(f"dropped {report['history_events']} event_history entries (not kept in the canonical format)")
+    lines += [f"skipped {name!r} in {path}: {reason}" for path, name, reason in report["skipped"]]
+    lines += [f"could not read {path}: {error}" for path, error in report["errors"]]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import and combine basketball_data.json files from every app version.")
+    parser.add_argument("inputs", nargs="+", help="data files, globs or directories of *.json")
+    parser.add_argument("--out", required=True, help="canonical data file to write")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument(
+        "--on-duplicate", choices=("merge", "last"), default="merge",
+        help="a name in several files: add the counters up (default) or keep the later file's record",
+    )
+    args = parser.parse_args(argv)
+
+    paths = expand_paths(args.inputs)
+    players, report = run_import(paths, workers=args.workers, on_duplicate=args.on_duplicate)
+    write_players(args.out, players)
+    print(format_report(report, players), file=sys.stderr)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
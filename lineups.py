@@ -0,0 +1,320 @@
+"""Lineup and on/off aggregates built from the play-by-play log.
+
+Every player seen in a substitution gets a bit, and a lineup is the int
+with the on-floor players' bits set. Each stat or opponent event in the
+log is credited to the lineup on the floor at its clock position, and
+also to every 1-, 2- and 3-player subset of that lineup. Per-player on/off
+splits, "best 3-man combos by net rating" and so on are then lookups and a
+sort over a few hundred precomputed totals, not a pass over the season.
+
+    index = LineupIndex(PLAYS)
+    index.on_off("Ann")
+    index.best_combos(3, limit=5)
+
+The index follows the log: new events are folded in on the next query,
+and if events were rewritten (undo, rename) or a substitution was
+entered behind events already credited, it rebuilds from scratch.
+"""
+import bisect
+import itertools
+from array import array
+
+from play_by_play import LINEUP_KINDS, OPPONENT, SUB_IN, SUB_OUT
+
+COMBO_SIZES = (1, 2, 3)
+
+
+def possessions_used(delta):
+    """Team possessions an event used: field goal attempts plus turnovers."""
+    used = delta.get("turnovers", 0)
+    for field, amount in delta.items():
+        if field.startswith("shots.") and field.endswith((".made", ".missed")):
+            used += amount
+    return used
+
+
+class LineupTotals:
+    __slots__ = ("points_for", "points_against", "off_possessions", "def_possessions", "counters")
+
+    def __init__(self):
+        self.points_for = 0
+        self.points_against = 0
+        self.off_possessions = 0
+        self.def_possessions = 0
+        self.counters = {}
+
+    def add_offense(self, delta, possessions):
+        self.points_for += delta.get("points", 0)
+        self.off_possessions += possessions
+        counters = self.counters
+        for field, amount in delta.items():
+            counters[field] = counters.get(field, 0) + amount
+
+    def add_defense(self, points):
+        self.points_against += points
+        self.def_possessions += 1
+
+    def minus(self, other):
+        out = LineupTotals()
+        out.points_for = self.points_for - other.points_for
+        out.points_against = self.points_against - other.points_against
+        out.off_possessions = self.off_possessions - other.off_possessions
+        out.def_possessions = self.def_possessions - other.def_possessions
+        out.counters = {k: v - other.counters.get(k, 0) for k, v in self.counters.items()}
+        return out
+
+    def possessions(self):
+        return self.off_possessions + self.def_possessions
+
+    def offensive_rating(self):
+        return round(100 * self.points_for / self.off_possessions, 1) if self.off_possessions else 0.0
+
+    def defensive_rating(self):
+        return round(100 * self.points_against / self.def_possessions, 1) if self.def_possessions else 0.0
+
+    def net_rating(self):
+        return round(self.offensive_rating() - self.defensive_rating(), 1)
+
+    # the defensive tracking counters: a paint touch and a defense event are
+    # recorded on the defender, so a lineup's totals are what it allowed
+
+    def paint_touches_allowed(self):
+        """``(touches, scored off them)`` allowed by the players on the floor."""
+        return self.counters.get("paint_touches.total", 0), self.counters.get("paint_touches.made_shot", 0)
+
+    def contest_outcomes(self):
+        """``{"contested": (made, missed), "uncontested": (...), "own contested": (...)}``.
+
+        The first two are opponents' shots the players on the floor defended,
+        the last the lineup's own shots that were contested.
+        """
+        counters = self.counters
+        own_made = own_missed = 0
+        for field, amount in counters.items():
+            if field.startswith("shots."):
+                if field.endswith(".contested_made"):
+                    own_made += amount
+                elif field.endswith(".contested_missed"):
+                    own_missed += amount
+        return {
+            "contested": (counters.get("defense.contested_made", 0), counters.get("defense.contested_missed", 0)),
+            "uncontested": (counters.get("defense.uncontested_made", 0), counters.get("defense.uncontested_missed", 0)),
+            "own contested": (own_made, own_missed),
+        }
+
+    def to_dict(self):
+        return {
+            "points_for": self.points_for,
+            "points_against": self.points_against,
+            "off_possessions": self.off_possessions,
+            "def_possessions": self.def_possessions,
+            "ORtg": self.offensive_rating(),
+            "DRtg": self.defensive_rating(),
+            "net": self.net_rating(),
+            "counters": dict(self.counters),
+        }
+
+
+class _GameLineups:
+    """Who was on the floor from each substitution onwards in one game."""
+
+    def __init__(self):
+        self.positions = array("d")
+        self.masks = []
+        self.last_credit = float("-inf")
+
+    def mask_at(self, position):
+        i = bisect.bisect_right(self.positions, position)
+        return self.masks[i - 1] if i else 0
+
+    def current(self):
+        return self.masks[-1] if self.masks else 0
+
+
+class LineupIndex:
+    def __init__(self, log, combo_sizes=COMBO_SIZES):
+        self.log = log
+        self.combo_sizes = tuple(combo_sizes)
+        self._reset()
+
+    def _reset(self):
+        self.roster = []
+        self._bits = {}
+        self.team = LineupTotals()
+        self.lineups = {}
+        self.combos = {size: {} for size in self.combo_sizes}
+        self._games = {}
+        self._subsets = {}
+        self._seen = 0
+        self._version = self.log.version
+
+    # --- masks ---
+    def bit(self, name):
+        bit = self._bits.get(name)
+        if bit is None:
+            bit = self._bits[name] = 1 << len(self.roster)
+            self.roster.append(name)
+        return bit
+
+    def mask(self, names):
+        mask = 0
+        for name in names:
+            mask |= self.bit(name)
+        return mask
+
+    def names(self, mask):
+        return tuple(sorted(name for i, name in enumerate(self.roster) if mask >> i & 1))
+
+    def _subsets_of(self, mask):
+        subsets = self._subsets.get(mask)
+        if subsets is None:
+            bits = [1 << i for i in range(mask.bit_length()) if mask >> i & 1]
+            subsets = self._subsets[mask] = [
+                (size, sum(combo)) for size in self.combo_sizes for combo in itertools.combinations(bits, size)
+            ]
+        return subsets
+
+    # --- keeping up with the log ---
+    def sync(self):
+        if self._version != self.log.version:
+            self.rebuild()
+            return
+        events = self.log.events
+        for event in events[self._seen:]:
+            if not self._apply(event):
+                self.rebuild()
+                return
+        self._seen = len(events)
+
+    def rebuild(self):
+        self._reset()
+        events = self.log.events
+        position = self.log.position
+        # Replay each game in clock order; the sort is stable, so at the same
+        # clock a shot entered before a substitution stays with the old five
+        for event in sorted(events, key=lambda e: (e.game_id, position(e.period, e.clock))):
+            self._apply(event)
+        self._seen = len(events)
+
+    def _game(self, game_id):
+        game = self._games.get(game_id)
+        if game is None:
+            game = self._games[game_id] = _GameLineups()
+        return game
+
+    def _apply_sub(self, event, pos):
+        game = self._game(event.game_id)
+        mask = game.current()
+        bit = self.bit(event.player)
+        mask = mask | bit if event.kind == SUB_IN else mask & ~bit
+        if game.positions and game.positions[-1] == pos:
+            game.masks[-1] = mask  # several players changing at the same dead ball
+        else:
+            game.positions.append(pos)
+            game.masks.append(mask)
+
+    def _apply(self, event):
+        """Fold one event in; False when it lands behind what was already credited."""
+        pos = self.log.position(event.period, event.clock)
+        game = self._game(event.game_id)
+        if event.kind in (SUB_IN, SUB_OUT):
+            if pos < game.last_credit or (game.positions and pos < game.positions[-1]):
+                return False
+            self._apply_sub(event, pos)
+            return True
+        game.last_credit = max(game.last_credit, pos)
+        mask = game.mask_at(pos)
+        if event.kind == OPPONENT:
+            points = event.delta.get("points", 0)
+            self._credit(mask, lambda totals: totals.add_defense(points))
+        elif event.kind not in LINEUP_KINDS:
+            used = possessions_used(event.delta)
+            delta = event.delta
+            self._credit(mask, lambda totals: totals.add_offense(delta, used))
+        return True
+
+    def _credit(self, mask, apply):
+        apply(self.team)
+        if not mask:
+            return
+        totals = self.lineups.get(mask)
+        if totals is None:
+            totals = self.lineups[mask] = LineupTotals()
+        apply(totals)
+        for size, subset in self._subsets_of(mask):
+            group = self.combos[size]
+            totals = group.get(subset)
+            if totals is None:
+                totals = group[subset] = LineupTotals()
+            apply(totals)
+
+    # --- queries ---
+    def on_floor(self, game_id):
+        self.sync()
+        game = self._games.get(str(game_id))
+        return self.names(game.current()) if game else ()
+
+    def on_off(self, name):
+        self.sync()
+        on = self.combos.get(1, {}).get(self._bits.get(name, 0)) or LineupTotals()
+        return {"on": on, "off": self.team.minus(on)}
+
+    def lineup(self, names):
+        self.sync()
+        if any(name not in self._bits for name in names):
+            return LineupTotals()
+        return self.lineups.get(self.mask(names)) or LineupTotals()
+
+    def best_combos(self, size=3, limit=10, min_possessions=1, key=LineupTotals.net_rating):
+        """``[(names, totals), ...]`` for the ``size``-player groups with the best ``key``.
+
+        ``size=5`` ranks full lineups.
+        """
+        self.sync()
+        group = self.lineups if size not in self.combos else self.combos[size]
+        rows = [
+            (mask, totals) for mask, totals in group.items()
+            if totals.possessions() >= min_possessions and (group is not self.lineups or bin(mask).count("1") == size)
+        ]
+        rows.sort(key=lambda row: key(row[1]), reverse=True)
+        return [(self.names(mask), totals) for mask, totals in rows[:limit]]
+
+
+def _made_of(outcome):
+    made, missed = outcome
+    return f"{made}/{made + missed}"
+
+
+def lineup_report(index, limit=5, min_possessions=1):
+    """Plain-text lineup section for the desktop report."""
+    index.sync()
+    lines = [
+        "ON/OFF (net rating per 100 possessions; while on the floor: paint touches allowed",
+        "and shots made/taken against contested and open defense, and our contested shots)",
+    ]
+    for name in sorted(index.roster):
+        split = index.on_off(name)
+        on, off = split["on"], split["off"]
+        touches, scored = on.paint_touches_allowed()
+        contests = on.contest_outcomes()
+        lines.append(
+            f"  {name:<18} on {on.net_rating():>+7.1f} ({on.possessions()} poss) | "
+            f"off {off.net_rating():>+7.1f} ({off.possessions()} poss)"
+        )
+        lines.append(
+            f"  {'':<18} paint touches allowed {touches} ({scored} scored) | "
+            f"vs contested D {_made_of(contests['contested'])} | vs open D {_made_of(contests['uncontested'])} | "
+            f"our contested {_made_of(contests['own contested'])}"
+        )
+    for size, title in ((3, "BEST 3-MAN COMBOS"), (5, "BEST LINEUPS")):
+        lines.append("")
+        lines.append(title)
+        best = index.best_combos(size, limit=limit, min_possessions=min_possessions)
+        if not best:
+            lines.append("  (no stints recorded yet)")
+        for names, totals in best:
+            lines.append(
+                f"  {totals.net_rating():>+7.1f}  {' / '.join(names)}  "
+                f"(PF {totals.points_for}, PA {totals.points_against}, {totals.possessions()} poss)"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,308 @@
+"""Load generator for the web app (basketball_web.py).
+
+Simulates scorekeepers recording events and viewers watching the team
+pages, then reports throughput and p50/p95/p99 latency per route.
+
+    # against a running server (gunicorn -w 4 -b 127.0.0.1:8000 "basketball_web:create_app()")
+    python loadtest.py --url http://127.0.0.1:8000 --scorekeepers 4 --viewers 20 --duration 60
+
+    # or let the script start the app on a throwaway sqlite database
+    python loadtest.py --serve --duration 20 --out run1.json
+    python loadtest.py --serve --duration 20 --out run2.json --compare run1.json
+
+Only point it at a server whose data you don't mind filling with
+synthetic "Load ..." players.
+"""
+import argparse
+import http.client
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote, urlencode, urlsplit
+
+# Weighted mix of what a scorekeeper taps during a game
+EVENT_MIX = [
+    (30, {"event": "shot", "shot_type": "layup"}),
+    (20, {"event": "shot", "shot_type": "midrange"}),
+    (20, {"event": "shot", "shot_type": "3pt"}),
+    (12, {"event": "rebound"}),
+    (8, {"event": "assist"}),
+    (5, {"event": "turnover"}),
+    (4, {"event": "strike", "kind": "balls"}),
+    (4, {"event": "strike", "kind": "strikes"}),
+    (4, {"event": "cut", "result": "pass"}),
+    (3, {"event": "paint", "result": "kick"}),
+    (5, {"event": "defense"}),
+]
+
+# What a viewer's browser requests
+VIEW_MIX = [
+    (55, "index", "/"),
+    (40, "report", "/report"),
+    (5, "export_csv", "/export.csv"),
+]
+
+ROUTES = ("add_player", "player_event", "player_page", "index", "report", "export_csv")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {route: [] for route in ROUTES}
+        self.errors = {route: 0 for route in ROUTES}
+
+    def add(self, route, seconds, ok):
+        with self.lock:
+            self.latencies[route].append(seconds)
+            if not ok:
+                self.errors[route] += 1
+
+    def summary(self, elapsed):
+        routes = {}
+        everything = []
+        for route in ROUTES:
+            values = sorted(self.latencies[route])
+            everything.extend(values)
+            if not values:
+                continue
+            routes[route] = _stats(values, self.errors[route], elapsed)
+        everything.sort()
+        total = _stats(everything, sum(self.errors.values()), elapsed) if everything else {}
+        return {"routes": routes, "total": total}
+
+
+def _stats(values, errors, elapsed):
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(1000 * sum(values) / len(values), 2),
+        "p50_ms": round(1000 * percentile(values, 50), 2),
+        "p95_ms": round(1000 * percentile(values, 95), 2),
+        "p99_ms": round(1000 * percentile(values, 99), 2),
+        "max_ms": round(1000 * values[-1], 2),
+    }
+
+
+class Client:
+    """One keep-alive connection, like one browser tab."""
+
+    def __init__(self, base_url, recorder, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self.recorder = recorder
+        self.timeout = timeout
+        self.conn = None
+
+    def request(self, route, method, path, form=None):
+        body = urlencode(form, doseq=True) if form is not None else None
+        headers = {"Content-Type": "application/x-www-form-urlencoded"} if body is not None else {}
+        start = time.perf_counter()
+        ok = False
+        location = None
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self.conn.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+            ok = response.status < 400
+            location = response.getheader("Location")
+        except (OSError, http.client.HTTPException):
+            self.close()
+        self.recorder.add(route, time.perf_counter() - start, ok)
+        return location
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def weighted_choice(rng, mix):
+    total = sum(item[0] for item in mix)
+    pick = rng.uniform(0, total)
+    for item in mix:
+        pick -= item[0]
+        if pick <= 0:
+            return item
+    return mix[-1]
+
+
+def event_form(rng):
+    form = dict(weighted_choice(rng, EVENT_MIX)[1])
+    if form["event"] == "shot":
+        form["made"] = "yes" if rng.random() < 0.45 else "no"
+        form["contested"] = "yes" if rng.random() < 0.4 else "no"
+    elif form["event"] == "defense":
+        form["contested"] = ["no", "yes" if rng.random() < 0.6 else "no"]
+        form["made"] = ["yes", "yes" if rng.random() < 0.4 else "no"]
+    return form
+
+
+def scorekeeper(client, rng, stop, roster, think):
+    names = []
+    for name in roster:
+        # synthetic names all look alike; don't let the duplicate check turn them away
+        client.request("add_player", "POST", "/add", {"name": name, "allow_similar": "1"})
+        names.append(name)
+    while not stop.is_set():
+        name = rng.choice(names)
+        path = "/player/" + quote(name, safe="")
+        location = client.request("player_event", "POST", path + "/event", event_form(rng))
+        if location:
+            # the browser follows the redirect back to the player page
+            client.request("player_page", "GET", path)
+        stop.wait(rng.uniform(0, 2 * think))
+    client.close()
+
+
+def viewer(client, rng, stop, think):
+    while not stop.is_set():
+        _, route, path = weighted_choice(rng, VIEW_MIX)
+        client.request(route, "GET", path)
+        stop.wait(rng.uniform(0, 2 * think))
+    client.close()
+
+
+def run_load(base_url, scorekeepers=4, viewers=10, duration=10.0, players_per_team=5,
+             scorekeeper_think=0.5, viewer_think=2.0, seed=None):
+    """Drive ``base_url`` for ``duration`` seconds and return the summary dict."""
+    recorder = Recorder()
+    stop = threading.Event()
+    rng = random.Random(seed)
+    run_id = f"{rng.randrange(16 ** 6):06x}"
+    threads = []
+    for i in range(scorekeepers):
+        roster = [f"Load {run_id} S{i} P{j}" for j in range(players_per_team)]
+        worker_rng = random.Random(rng.random())
+        args = (Client(base_url, recorder), worker_rng, stop, roster, scorekeeper_think)
+        threads.append(threading.Thread(target=scorekeeper, args=args, daemon=True))
+    for _ in range(viewers):
+        args = (Client(base_url, recorder), random.Random(rng.random()), stop, viewer_think)
+        threads.append(threading.Thread(target=viewer, args=args, daemon=True))
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=60)
+    elapsed = time.perf_counter() - start
+
+    summary = recorder.summary(elapsed)
+    summary["config"] = {
+        "url": base_url,
+        "scorekeepers": scorekeepers,
+        "viewers": viewers,
+        "duration_s": round(elapsed, 2),
+        "players_per_team": players_per_team,
+        "scorekeeper_think_s": scorekeeper_think,
+        "viewer_think_s": viewer_think,
+    }
+    return summary
+
+
+def serve_local(port=0):
+    """Start the app on a temporary sqlite database; returns (base_url, server)."""
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # no per-request access log
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="basketball-load-"), "load.db")
+    import basketball_web
+
+    app = basketball_web.create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + db_path})
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+def format_table(summary, baseline=None):
+    header = f"{'route':<14}{'reqs':>8}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    if baseline:
+        header += f"{'p95 vs base':>14}"
+    lines = [header, "-" * len(header)]
+    rows = list(summary["routes"].items()) + [("TOTAL", summary["total"])]
+    for route, stats in rows:
+        if not stats:
+            continue
+        line = (
+            f"{route:<14}{stats['requests']:>8}{stats['errors']:>6}{stats['throughput_rps']:>9}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+        )
+        if baseline:
+            base = baseline["routes"].get(route) if route != "TOTAL" else baseline.get("total")
+            if base and base.get("p95_ms"):
+                change = 100.0 * (stats["p95_ms"] - base["p95_ms"]) / base["p95_ms"]
+                line += f"{change:>+13.1f}%"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the basketball web app.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="base URL of a running server, e.g. http://127.0.0.1:8000")
+    target.add_argument("--serve", action="store_true", help="start the app locally on a temp database")
+    parser.add_argument("--scorekeepers", type=int, default=4, help="concurrent scorekeepers (default 4)")
+    parser.add_argument("--viewers", type=int, default=10, help="concurrent viewers (default 10)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run (default 30)")
+    parser.add_argument("--players", type=int, default=5, help="players added per scorekeeper (default 5)")
+    parser.add_argument("--scorekeeper-think", type=float, default=0.5, help="mean seconds between events")
+    parser.add_argument("--viewer-think", type=float, default=2.0, help="mean seconds between page views")
+    parser.add_argument("--seed", type=int, help="random seed for a repeatable event mix")
+    parser.add_argument("--out", help="write the JSON summary here")
+    parser.add_argument("--compare", help="earlier JSON summary to compare p95 against")
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.url
+    if args.serve:
+        base_url, server = serve_local()
+    try:
+        summary = run_load(
+            base_url,
+            scorekeepers=args.scorekeepers,
+            viewers=args.viewers,
+            duration=args.duration,
+            players_per_team=args.players,
+            scorekeeper_think=args.scorekeeper_think,
+            viewer_think=args.viewer_think,
+            seed=args.seed,
+        )
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+    print(format_table(summary, baseline))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as handle:
+            json.dump(summary, handle, indent=2)
+        print(f"Summary written to {os.path.abspath(args.out)}")
+    return 1 if summary["total"].get("errors") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""Type-to-filter search and duplicate detection over player names.
+
+Names are compared folded: case, accents and punctuation ignored, so
+"José O'Neil" is "jose o neil". A NameIndex keeps
+
+- the folded names, and each folded name from its second word on ("o
+  neil", "neil"), in sorted lists -- a trie flattened into arrays, like
+  the leaderboard indexes -- so "ne" finds José O'Neil with a bisect and
+  a walk over the matches, stopping at the limit;
+- each name's trigrams and a trigram -> names map, so a query with a
+  typo ("smiht") or a name that is nearly one already on the roster
+  ("Jon Smith" / "John Smith", "Smith, John") still finds it. Only the
+  posting lists of the query's rarest trigrams are read.
+
+    NAMES = NameIndex(TEAM)
+    NAMES.search("ann")          # ["Ann Lee", "Mary Ann Cho"] -- whole-name matches first
+    NAMES.duplicates("ann  lee")  # ["Ann Lee"]
+    python name_index.py bench --names 10000
+"""
+import argparse
+import bisect
+import math
+import random
+import re
+import sys
+import time
+import unicodedata
+
+SEARCH_LIMIT = 50
+FUZZY_SIMILARITY = 0.5  # shared trigrams / query trigrams for a fuzzy search hit
+DUPLICATE_SIMILARITY = 0.7  # trigram Dice coefficient for a likely duplicate
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def fold(name):
+    """Lowercase ASCII words separated by single spaces."""
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def trigrams(folded):
+    """Trigrams of each word, padded so word starts and ends count."""
+    grams = set()
+    for word in folded.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _later_words(folded):
+    words = folded.split()
+    return [" ".join(words[i:]) for i in range(1, len(words))]
+
+
+class NameIndex:
+    def __init__(self, names=()):
+        self._whole = []  # sorted (folded name, name)
+        self._words = []  # sorted (folded name from its second word on, name)
+        self._folded = {}  # name -> folded
+        self._name_grams = {}  # name -> frozenset of trigrams
+        self._grams = {}  # trigram -> set of names
+        self.rebuild(names)
+
+    def rebuild(self, names):
+        self._folded = {name: fold(name) for name in names}
+        self._whole = sorted((folded, name) for name, folded in self._folded.items())
+        self._words = sorted((key, name) for name, folded in self._folded.items() for key in _later_words(folded))
+        self._name_grams = {name: frozenset(trigrams(folded)) for name, folded in self._folded.items()}
+        self._grams = {}
+        for name, grams in self._name_grams.items():
+            for gram in grams:
+                self._grams.setdefault(gram, set()).add(name)
+
+    def sync(self, names):
+        """Add and remove so the index holds exactly ``names``; returns how many changed."""
+        names = set(names)
+        gone = [name for name in self._folded if name not in names]
+        new = [name for name in names if name not in self._folded]
+        for name in gone:
+            self.remove(name)
+        for name in new:
+            self.add(name)
+        return len(gone) + len(new)
+
+    def __len__(self):
+        return len(self._folded)
+
+    def __contains__(self, name):
+        return name in self._folded
+
+    def add(self, name):
+        if name in self._folded:
+            return
+        folded = self._folded[name] = fold(name)
+        bisect.insort(self._whole, (folded, name))
+        for key in _later_words(folded):
+            bisect.insort(self._words, (key, name))
+        grams = self._name_grams[name] = frozenset(trigrams(folded))
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(name)
+
+    def remove(self, name):
+        folded = self._folded.pop(name, None)
+        if folded is None:
+            return
+        _discard(self._whole, (folded, name))
+        for key in _later_words(folded):
+            _discard(self._words, (key, name))
+        for gram in self._name_grams.pop(name):
+            members = self._grams[gram]
+            members.discard(name)
+            if not members:
+                del self._grams[gram]
+
+    def rename(self, old, new):
+        self.remove(old)
+        self.add(new)
+
+    def prefix(self, query, limit=SEARCH_LIMIT):
+        """Names with a word starting with ``query`` (folded): whole-name matches first, each group by name."""
+        key = fold(query)
+        hits, seen = [], set()
+        for keys in (self._whole, self._words):
+            index = bisect.bisect_left(keys, (key,))
+            while index < len(keys) and not (limit and len(hits) >= limit):
+                suffix, name = keys[index]
+                if not suffix.startswith(key):
+                    break
+                if name not in seen:
+                    seen.add(name)
+                    hits.append(name)
+                index += 1
+        return hits
+
+    def _candidates(self, grams, min_shared):
+        """Names sharing at least ``min_shared`` of ``grams``, with how many they share.
+
+        Any such name has one of the rarest ``len(grams) - min_shared + 1``
+        grams, so only those posting lists are read.
+        """
+        rarest = sorted(grams, key=lambda gram: len(self._grams.get(gram, ())))
+        names = set()
+        for gram in rarest[:len(rarest) - min_shared + 1]:
+            names.update(self._grams.get(gram, ()))
+        shared = ((name, len(grams & self._name_grams[name])) for name in names)
+        return [(name, count) for name, count in shared if count >= min_shared]
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Type-to-filter: prefix hits; if there are none (a typo?) and 3+ letters were typed, names sharing most trigrams."""
+        folded = fold(query)
+        if not folded:
+            return [name for _, name in (self._whole[:limit] if limit else self._whole)]
+        hits = self.prefix(query, limit)
+        if hits or len(folded.replace(" ", "")) < 3:
+            return hits
+        grams = trigrams(folded)
+        fuzzy = self._candidates(grams, math.ceil(FUZZY_SIMILARITY * len(grams)))
+        fuzzy.sort(key=lambda item: (-item[1], self._folded[item[0]], item[0]))
+        return [name for name, _ in (fuzzy[:limit] if limit else fuzzy)]
+
+    def duplicates(self, name, ignore=(), threshold=DUPLICATE_SIMILARITY):
+        """Names already indexed that look like ``name`` (same folded words in any order, or close by trigrams), closest first."""
+        grams = frozenset(trigrams(fold(name)))
+        if not grams:
+            return []
+        skip = {name, *([ignore] if isinstance(ignore, str) else ignore)}
+        # Dice 2s/(a+b) >= t needs s >= t*a/(2-t), since b >= s
+        found = []
+        for other, shared in self._candidates(grams, max(1, math.ceil(threshold * len(grams) / (2 - threshold)))):
+            score = 2 * shared / (len(grams) + len(self._name_grams[other]))
+            if other not in skip and score >= threshold:
+                found.append((score, other))
+        return [other for _, other in sorted(found, key=lambda item: (-item[0], item[1]))]
+
+
+def _discard(keys, item):
+    index = bisect.bisect_left(keys, item)
+    if index < len(keys) and keys[index] == item:
+        del keys[index]
+
+
+def synthetic_names(count=10000, seed=1):
+    rng = random.Random(seed)
+    first = ["Ann", "Ben", "Cal", "Dee", "Eli", "Fay", "Gus", "Hal", "Ida", "José", "Kai", "Lea", "Max", "Noa", "Oli",
+             "Pia", "Quinn", "Rae", "Sam", "Tia", "Uma", "Vic", "Wes", "Xan", "Yara", "Zoe"]
+    last = ["Lee", "Ng", "Cho", "Smith", "O'Neil", "García", "Okafor", "Nowak", "Rossi", "Kim", "Patel", "Müller",
+            "Silva", "Haddad", "Ivanov", "Tanaka", "Dubois", "Jensen", "Moreau", "Costa"]
+    names = set()
+    while len(names) < count:
+        names.add(f"{rng.choice(first)} {rng.choice(last)}-{rng.randint(1, count)}")
+    return sorted(names)
+
+
+def _typo(rng, name):
+    """``name`` with two neighbouring letters swapped."""
+    at = rng.randrange(len(name) - 1)
+    return name[:at] + name[at + 1] + name[at] + name[at + 2:]
+
+
+def bench(count=10000, queries=2000, seed=1):
+    """Build time and mean/worst time of typed prefixes, typos and duplicate checks, in milliseconds."""
+    names = synthetic_names(count, seed)
+    started = time.perf_counter()
+    index = NameIndex(names)
+    built = time.perf_counter() - started
+    rng = random.Random(seed)
+    typed = [rng.choice(names)[:rng.randint(1, 8)] for _ in range(queries)]
+    typos = [_typo(rng, rng.choice(names)) for _ in range(queries)]
+    results = {"names": count, "build_ms": built * 1000}
+    for label, run, inputs in (
+        ("search", index.search, typed),
+        ("typo", index.search, typos),
+        ("duplicates", index.duplicates, typos),
+    ):
+        times = []
+        for query in inputs:
+            started = time.perf_counter()
+            run(query)
+            times.append(time.perf_counter() - started)
+        results[f"{label}_mean_ms"] = sum(times) / len(times) * 1000
+        results[f"{label}_max_ms"] = max(times) * 1000
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Player name index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench_parser = commands.add_parser("bench", help="time searches over synthetic names")
+    bench_parser.add_argument("--names", type=int, default=10000)
+    bench_parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args(argv)
+    for key, value in bench(args.names, args.queries).items():
+        print(f"{key:<20}{value:>10.3f}" if isinstance(value, float) else f"{key:<20}{value:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
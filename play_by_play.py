@@ -0,0 +1,372 @@
+"""Play-by-play log with prefix sums for time-window stats.
+
+Pass ``when=log.stamp(game_id, period, clock)`` to any ``record_*`` method
+decorated with ``play_logged`` and the change it made to the player's
+counters is appended to the log as one event. ``clock`` is the time left
+in the period, as seconds or "M:SS".
+
+For every (player, game) the log keeps the events' clock positions and
+the running totals after each event. A window (a quarter, a half, 5:00
+to 0:00 of the 4th, ...) is two bisects into the clock positions and one
+subtraction of two rows of running totals. The events are never
+rescanned, so a window costs the same however many events fall in it.
+"""
+import bisect
+import functools
+import json
+import os
+from array import array
+
+PERIOD_SECONDS = 600  # 10 minute quarters
+OVERTIME_SECONDS = 300
+REGULATION_PERIODS = 4
+
+# Spacing between periods on the timeline; larger than any period so a
+# quarter's 0:00 and the next quarter's 10:00 never share a position
+_PERIOD_STRIDE = 100000
+
+# Event kinds that say who is on the floor or what the opponent did rather
+# than change a player's counters; they get no per-player timeline
+SUB_IN = "sub_in"
+SUB_OUT = "sub_out"
+OPPONENT = "opponent"
+LINEUP_KINDS = {SUB_IN, SUB_OUT, OPPONENT}
+
+# Attributes that are not per-event counters
+_NOT_COUNTERS = {"name", "event_history", "games_played"}
+
+
+def parse_clock(clock):
+    """Seconds left in the period from ``452``, ``452.5`` or ``"7:32"``."""
+    if isinstance(clock, str):
+        minutes, _, seconds = clock.strip().rpartition(":")
+        return int(minutes or 0) * 60 + float(seconds)
+    return float(clock)
+
+
+def format_clock(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+def flatten_counters(obj, prefix="", out=None):
+    """{"shots.layup.made": 2, "points": 4, ...} for every int counter on ``obj``."""
+    if out is None:
+        out = {}
+    items = obj.items() if isinstance(obj, dict) else vars(obj).items()
+    for key, value in items:
+        if not prefix and key in _NOT_COUNTERS:
+            continue
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flatten_counters(value, path + ".", out)
+        elif isinstance(value, int) and not isinstance(value, bool):
+            out[path] = value
+    return out
+
+
+def unflatten_counters(flat):
+    nested = {}
+    for path, value in flat.items():
+        node = nested
+        *parents, leaf = path.split(".")
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+    return nested
+
+
+def counter_delta(before, after):
+    return {k: v - before.get(k, 0) for k, v in after.items() if v != before.get(k, 0)}
+
+
+def play_logged(method):
+    """Let a ``record_*`` method take ``when=`` and log what it changed."""
+
+    @functools.wraps(method)
+    def recorder(self, *args, when=None, **kwargs):
+        if when is None:
+            return method(self, *args, **kwargs)
+        before = flatten_counters(self)
+        result = method(self, *args, **kwargs)
+        delta = counter_delta(before, flatten_counters(self))
+        when.log.append(self.name, when, method.__name__, delta)
+        return result
+
+    return recorder
+
+
+def event_lines(events):
+    """Events as JSON lines (bytes), one per line: the desktop apps' play-by-play files."""
+    return "".join(json.dumps(event.to_dict()) + "\n" for event in events).encode("utf-8")
+
+
+def parse_event_lines(data):
+    return [PlayEvent.from_dict(json.loads(line)) for line in data.splitlines() if line.strip()]
+
+
+class GameStamp:
+    __slots__ = ("log", "game_id", "period", "clock")
+
+    def __init__(self, log, game_id, period, clock):
+        self.log = log
+        self.game_id = str(game_id)
+        self.period = int(period)
+        self.clock = parse_clock(clock)
+
+
+class PlayEvent:
+    __slots__ = ("game_id", "period", "clock", "player", "kind", "delta")
+
+    def __init__(self, game_id, period, clock, player, kind, delta):
+        self.game_id = game_id
+        self.period = period
+        self.clock = clock
+        self.player = player
+        self.kind = kind
+        self.delta = delta
+
+    def to_dict(self):
+        return {
+            "game": self.game_id,
+            "period": self.period,
+            "clock": self.clock,
+            "player": self.player,
+            "kind": self.kind,
+            "delta": self.delta,
+        }
+
+    @staticmethod
+    def from_dict(data):
+        return PlayEvent(
+            str(data["game"]), int(data["period"]), float(data["clock"]),
+            data["player"], data.get("kind", ""), dict(data.get("delta") or {}),
+        )
+
+
+class _Timeline:
+    """Clock positions and running totals for one player in one game."""
+
+    def __init__(self):
+        self.positions = array("d")
+        self.rows = [array("q")]  # rows[i] = totals after the first i events
+
+    def add(self, position, changes):
+        index = bisect.bisect_right(self.positions, position)
+        self.positions.insert(index, position)
+        row = array("q", self.rows[index])
+        self._apply(row, changes)
+        self.rows.insert(index + 1, row)
+        # An entry made late (clock earlier than the last event) shifts every later total
+        for later in self.rows[index + 2:]:
+            self._apply(later, changes)
+
+    @staticmethod
+    def _apply(row, changes):
+        for field, amount in changes:
+            if field >= len(row):
+                row.extend([0] * (field + 1 - len(row)))
+            row[field] += amount
+
+    def totals(self, start, end):
+        """Totals of events with ``start <= position <= end``."""
+        lo = bisect.bisect_left(self.positions, start)
+        hi = bisect.bisect_right(self.positions, end)
+        if hi <= lo:
+            return array("q")
+        upper, lower = self.rows[hi], self.rows[lo]
+        out = array("q", upper)
+        for i in range(min(len(lower), len(out))):
+            out[i] -= lower[i]
+        return out
+
+
+class PlayByPlay:
+    def __init__(self, period_seconds=PERIOD_SECONDS, regulation_periods=REGULATION_PERIODS,
+                 overtime_seconds=OVERTIME_SECONDS):
+        self.period_seconds = period_seconds
+        self.regulation_periods = regulation_periods
+        self.overtime_seconds = overtime_seconds
+        self.events = []
+        self.fields = []
+        self._field_index = {}
+        self._timelines = {}  # (player, game_id) -> _Timeline
+        self._games = {}  # player -> game ids in first-seen order
+        self.max_period = 0
+        self.version = 0  # bumped whenever events are rewritten rather than appended
+
+    def __len__(self):
+        return len(self.events)
+
+    def stamp(self, game_id, period, clock):
+        return GameStamp(self, game_id, period, clock)
+
+    def period_length(self, period):
+        return self.period_seconds if period <= self.regulation_periods else self.overtime_seconds
+
+    def position(self, period, clock):
+        """Timeline position of ``clock`` (seconds left) in ``period``."""
+        length = self.period_length(period)
+        clock = min(max(clock, 0.0), length)
+        return (period - 1) * _PERIOD_STRIDE + (length - clock)
+
+    def append(self, player, when, kind, delta):
+        event = PlayEvent(when.game_id, when.period, when.clock, player, kind, dict(delta))
+        self.events.append(event)
+        self._index(event)
+        return event
+
+    def substitute(self, when, players_in=(), players_out=()):
+        """Log a substitution; players going out are logged first."""
+        for name in players_out:
+            self.append(name, when, SUB_OUT, {})
+        for name in players_in:
+            self.append(name, when, SUB_IN, {})
+
+    def opponent_possession(self, when, points=0):
+        self.append("", when, OPPONENT, {"points": int(points)})
+
+    def _index(self, event):
+        self.max_period = max(self.max_period, event.period)
+        if event.kind in LINEUP_KINDS:
+            return
+        changes = []
+        for field, amount in event.delta.items():
+            index = self._field_index.get(field)
+            if index is None:
+                index = self._field_index[field] = len(self.fields)
+                self.fields.append(field)
+            changes.append((index, amount))
+        key = (event.player, event.game_id)
+        timeline = self._timelines.get(key)
+        if timeline is None:
+            timeline = self._timelines[key] = _Timeline()
+            self._games.setdefault(event.player, []).append(event.game_id)
+        timeline.add(self.position(event.period, event.clock), changes)
+
+    def _reindex(self):
+        self.fields = []
+        self._field_index = {}
+        self._timelines = {}
+        self._games = {}
+        self.max_period = 0
+        self.version += 1
+        for event in self.events:
+            self._index(event)
+
+    # --- queries ---
+    def iter_events(self, start=0, end=None):
+        """Events ``start`` to ``end`` in order, without copying the log."""
+        end = len(self.events) if end is None else min(end, len(self.events))
+        return (self.events[i] for i in range(start, end))
+
+    def games(self, player=None):
+        if player is not None:
+            return list(self._games.get(player, []))
+        seen = {}
+        for ids in self._games.values():
+            for game_id in ids:
+                seen.setdefault(game_id, None)
+        return list(seen)
+
+    def players(self):
+        return list(self._games)
+
+    def window(self, player, start, end, game_id=None):
+        """Summed counter changes for ``player`` between two timeline positions.
+
+        ``game_id=None`` adds up the same window over every game played.
+        """
+        games = [game_id] if game_id is not None else self._games.get(player, [])
+        total = array("q")
+        for gid in games:
+            timeline = self._timelines.get((player, str(gid)))
+            if timeline is None:
+                continue
+            part = timeline.totals(start, end)
+            if len(part) > len(total):
+                total.extend([0] * (len(part) - len(total)))
+            for i, amount in enumerate(part):
+                total[i] += amount
+        return {self.fields[i]: amount for i, amount in enumerate(total) if amount}
+
+    def period_totals(self, player, period, game_id=None):
+        start = self.position(period, self.period_length(period))
+        return self.window(player, start, self.position(period, 0), game_id)
+
+    def half_totals(self, player, half, game_id=None):
+        per_half = max(1, self.regulation_periods // 2)
+        first = (half - 1) * per_half + 1
+        last = first + per_half - 1
+        start = self.position(first, self.period_length(first))
+        return self.window(player, start, self.position(last, 0), game_id)
+
+    def clock_range(self, player, period, from_clock, to_clock=0, game_id=None):
+        """e.g. ``clock_range(name, 4, "5:00")`` for the last five minutes of the 4th."""
+        start = self.position(period, parse_clock(from_clock))
+        end = self.position(period, parse_clock(to_clock))
+        return self.window(player, min(start, end), max(start, end), game_id)
+
+    @staticmethod
+    def as_player(name, totals):
+        """A Player holding ``totals`` so calc_ts() etc. work on a window."""
+        from basketball_model import Player  # basketball_model imports this module
+
+        return Player.from_dict(name, unflatten_counters(totals))
+
+    # --- edits ---
+    def snapshot(self):
+        """Cheap copy for undo; events are never changed in place."""
+        return list(self.events)
+
+    def restore(self, events):
+        self.events = list(events)
+        self._reindex()
+
+    def rename_player(self, old, new):
+        self.events = [
+            PlayEvent(e.game_id, e.period, e.clock, new, e.kind, e.delta) if e.player == old else e
+            for e in self.events
+        ]
+        self._reindex()
+
+    def remove_player(self, name):
+        self.events = [e for e in self.events if e.player != name]
+        self._reindex()
+
+    # --- persistence ---
+    def to_dict(self):
+        return {
+            "period_seconds": self.period_seconds,
+            "regulation_periods": self.regulation_periods,
+            "overtime_seconds": self.overtime_seconds,
+            "events": [e.to_dict() for e in self.events],
+        }
+
+    @staticmethod
+    def from_dict(data):
+        log = PlayByPlay(
+            data.get("period_seconds", PERIOD_SECONDS),
+            data.get("regulation_periods", REGULATION_PERIODS),
+            data.get("overtime_seconds", OVERTIME_SECONDS),
+        )
+        log.events = [PlayEvent.from_dict(e) for e in data.get("events") or []]
+        log._reindex()
+        return log
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle)
+
+    @staticmethod
+    def load(path):
+        """From ``save``'s JSON, or from JSON lines (``event_lines``) if ``path`` ends in .jsonl."""
+        if not os.path.exists(path):
+            return PlayByPlay()
+        if os.fspath(path).endswith(".jsonl"):
+            with open(path, "rb") as handle:
+                log = PlayByPlay()
+                log.restore(parse_event_lines(handle.read()))
+                return log
+        with open(path, "r", encoding="utf-8") as handle:
+            return PlayByPlay.from_dict(json.load(handle))
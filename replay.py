@@ -0,0 +1,186 @@
+"""Team state at any point of the play-by-play log.
+
+The log (play_by_play.PlayByPlay) is the source of truth: the team after
+event ``i`` is the base counters (whatever was recorded before logging
+started) plus the deltas of ``events[:i]``. Every CHECKPOINT_EVERY events
+the replay keeps a copy of every player's counters, so any point is one
+copy of the nearest earlier checkpoint and at most CHECKPOINT_EVERY - 1
+events replayed forward -- dragging a slider through a game never replays
+the game from the start. The checkpoints can live in a temporary file
+(CheckpointFile), and the clock lookup keeps one entry per game per
+block of events, so with a log that reads its events from disk
+(event_history.SpilledLog) the replay's memory doesn't grow with the
+log.
+
+    replay = Replay.from_totals(PLAYS, {name: flatten_counters(p) for name, p in TEAM.items()})
+    replay.state_at(120)                   # {name: {"points": 14, ...}}
+    replay.state_at_clock("G3", 4, "5:00")  # 5:00 left in the 4th of game G3
+
+Like LineupIndex, it follows the log: new events are folded in on the next
+query, and rewritten events (undo, rename) start it over. An event entered
+late (clock earlier than one already logged in that game) counts from the
+moment it was entered when looking up a clock.
+"""
+import bisect
+import json
+import tempfile
+from array import array
+
+from play_by_play import LINEUP_KINDS, flatten_counters, parse_clock
+
+CHECKPOINT_EVERY = 64
+
+
+def _copy(state):
+    return {name: dict(counters) for name, counters in state.items()}
+
+
+def _apply(state, event):
+    if event.kind in LINEUP_KINDS:
+        return
+    counters = state.get(event.player)
+    if counters is None:
+        counters = state[event.player] = {}
+    for field, amount in event.delta.items():
+        counters[field] = counters.get(field, 0) + amount
+
+
+def set_counters(obj, counters):
+    """Make ``obj``'s int counters equal the flattened ``counters``; any not listed become 0."""
+    for path in set(flatten_counters(obj)) | set(counters):
+        node = obj
+        *parents, leaf = path.split(".")
+        for part in parents:
+            node = node[part] if isinstance(node, dict) else getattr(node, part)
+        if isinstance(node, dict):
+            node[leaf] = counters.get(path, 0)
+        else:
+            setattr(node, leaf, counters.get(path, 0))
+
+
+class CheckpointFile:
+    """Checkpoints kept in an unnamed temporary file instead of memory.
+
+    Pass ``checkpoints=CheckpointFile`` to Replay when the log is too long
+    to hold a team copy per CHECKPOINT_EVERY events: only each checkpoint's
+    byte offset stays in memory, and ``checkpoints[k]`` reads one back.
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._offsets = array("q")
+        self._end = 0
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def append(self, state):
+        data = json.dumps(state, separators=(",", ":")).encode("utf-8")
+        self._file.seek(self._end)
+        self._file.write(data)
+        self._offsets.append(self._end)
+        self._end += len(data)
+
+    def __getitem__(self, k):
+        k = range(len(self._offsets))[k]
+        end = self._offsets[k + 1] if k + 1 < len(self._offsets) else self._end
+        self._file.seek(self._offsets[k])
+        return json.loads(self._file.read(end - self._offsets[k]))
+
+
+class Replay:
+    def __init__(self, log, base=None, every=CHECKPOINT_EVERY, checkpoints=list):
+        self.log = log
+        self.every = every
+        self.base = _copy(base or {})
+        self._new_checkpoints = checkpoints
+        self._reset()
+
+    @staticmethod
+    def from_totals(log, totals, every=CHECKPOINT_EVERY, checkpoints=list):
+        """A replay whose final state is ``totals`` ({name: flattened counters}), e.g. as loaded from disk."""
+        replay = Replay(log, every=every, checkpoints=checkpoints)
+        logged = replay.state_at(len(log))
+        base = {}
+        for name in set(totals) | set(logged):
+            before = dict(totals.get(name, {}))
+            for field, amount in logged.get(name, {}).items():
+                before[field] = before.get(field, 0) - amount
+            base[name] = {field: value for field, value in before.items() if value}
+        replay.base = base
+        replay._reset()
+        return replay
+
+    def _reset(self):
+        self.checkpoints = self._new_checkpoints()  # checkpoints[k] = state after k * every events
+        self.checkpoints.append(_copy(self.base))
+        self._current = _copy(self.base)  # state after the first _seen events
+        # game id -> [first event index, running max position,
+        #             running max at the game's first event in each block, those blocks]
+        self._games = {}
+        self._seen = 0
+        self._version = self.log.version
+
+    def sync(self):
+        if self._version != self.log.version:
+            self._reset()
+        position = self.log.position
+        index = self._seen
+        for event in self.log.iter_events(self._seen):
+            _apply(self._current, event)
+            at = position(event.period, event.clock)
+            game = self._games.get(event.game_id)
+            if game is None:
+                game = self._games[event.game_id] = [index, at, array("d"), array("q")]
+            game[1] = max(game[1], at)
+            block = index // self.every
+            if not game[3] or game[3][-1] != block:
+                game[2].append(game[1])
+                game[3].append(block)
+            index += 1
+            if index % self.every == 0:
+                self.checkpoints.append(_copy(self._current))
+        self._seen = index
+
+    def __len__(self):
+        self.sync()
+        return self._seen
+
+    def state_at(self, index):
+        """Every player's counters after the first ``index`` events."""
+        self.sync()
+        index = min(max(int(index), 0), self._seen)
+        if index == self._seen:
+            return _copy(self._current)
+        checkpoint = index // self.every
+        state = _copy(self.checkpoints[checkpoint])
+        for event in self.log.iter_events(checkpoint * self.every, index):
+            _apply(state, event)
+        return state
+
+    def index_at(self, game_id, period, clock):
+        """Number of events logged up to ``clock`` (time left) in ``period`` of ``game_id``."""
+        self.sync()
+        game_id = str(game_id)
+        game = self._games.get(game_id)
+        if game is None:
+            return self._seen
+        first, _, starts, blocks = game
+        target = self.log.position(int(period), parse_clock(clock))
+        found = bisect.bisect_right(starts, target)
+        if not found:
+            return first
+        # the answer is in this block: walk its events of the game until the clock passes ``target``
+        running, last = starts[found - 1], first
+        start = blocks[found - 1] * self.every
+        for index, event in enumerate(self.log.iter_events(start, start + self.every), start):
+            if event.game_id != game_id:
+                continue
+            running = max(running, self.log.position(event.period, event.clock))
+            if running > target:
+                break
+            last = index
+        return last + 1
+
+    def state_at_clock(self, game_id, period, clock):
+        return self.state_at(self.index_at(game_id, period, clock))
@@ -0,0 +1,294 @@
+"""Background restore of data.json backups.
+
+The upload is read player by player instead of with json.load, validated,
+and written in executemany batches so memory stays flat for multi-season
+files. Each restore runs as a job the browser can poll by id. The job
+object lives in the worker process that took the upload; ``on_change``
+lets the caller copy its state somewhere every worker can read.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+from sqlalchemy import insert
+
+from basketball_model import Player
+from shot_chart import decode_locations
+
+RESTORE_BATCH_SIZE = 500
+READ_CHUNK_SIZE = 64 * 1024
+# Only keep the first few problems, a broken file could otherwise fill memory
+MAX_REPORTED_ERRORS = 20
+# A decode error this far before the end of the buffer is not a member cut
+# off by the chunk boundary, more data will not fix it
+DECODE_ERROR_MARGIN = 64
+# No single player record is this big, a stray quote would otherwise
+# pull the rest of the file into memory looking for the closing one
+MAX_MEMBER_CHARS = 16 * 1024 * 1024
+# Finished jobs are kept for polling, then dropped
+JOB_TTL_SECONDS = 3600
+MAX_FINISHED_JOBS = 50
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+def iter_json_object(handle, chunk_size=READ_CHUNK_SIZE):
+    """Yield ``(key, value)`` pairs of a top-level JSON object from a text stream.
+
+    Only the current member is held in memory, so a backup with thousands
+    of players parses in roughly the space of one player.
+    """
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill(size=chunk_size):
+        nonlocal buf, pos, eof
+        chunk = handle.read(size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    def expect(char):
+        nonlocal pos
+        skip_ws()
+        if pos >= len(buf) or buf[pos] != char:
+            raise ValueError(f"expected {char!r} in backup file")
+        pos += 1
+
+    def grow():
+        # double the member buffer so a big member is re-decoded O(log n) times
+        if len(buf) - pos >= MAX_MEMBER_CHARS:
+            raise ValueError("backup entry is too large")
+        fill(max(chunk_size, len(buf) - pos))
+
+    def decode():
+        nonlocal pos
+        skip_ws()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as error:
+                # an unterminated string reports where it starts, not where it was cut
+                cut = error.msg.startswith("Unterminated string") or error.pos + DECODE_ERROR_MARGIN >= len(buf)
+                if eof or not cut:
+                    raise
+                grow()
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(buf) and not eof:
+                grow()
+                continue
+            pos = end
+            return value
+
+    expect("{")
+    skip_ws()
+    if pos < len(buf) and buf[pos] == "}":
+        return
+    while True:
+        key = decode()
+        if not isinstance(key, str):
+            raise ValueError("player names must be strings")
+        expect(":")
+        yield key, decode()
+        skip_ws()
+        if pos < len(buf) and buf[pos] == ",":
+            pos += 1
+            continue
+        expect("}")
+        return
+
+
+def _is_count(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def validate_player(name, payload):
+    """Return a reason string if ``payload`` is not a usable player record."""
+    if not name.strip():
+        return "empty name"
+    if not isinstance(payload, dict):
+        return "record is not an object"
+    for key in ("assists", "turnovers", "rebounds", "points"):
+        if key in payload and not _is_count(payload[key]):
+            return f"{key} must be a whole number"
+    shots = payload.get("shots") or {}
+    if not isinstance(shots, dict):
+        return "shots must be an object"
+    groups = [("shots." + k, v) for k, v in shots.items()]
+    groups += [(k, payload.get(k)) for k in ("strike_zone", "cuts", "paint_touches", "defense")]
+    for label, group in groups:
+        if group is None:
+            continue
+        if not isinstance(group, dict):
+            return f"{label} must be an object"
+        for key, value in group.items():
+            if not _is_count(value):
+                return f"{label}.{key} must be a whole number"
+    locations = payload.get("shot_locations")
+    if locations:
+        try:
+            decode_locations(locations)
+        except (TypeError, ValueError):
+            return "shot_locations must be base64 packed shots"
+    return None
+
+
+class RestoreJob:
+    def __init__(self, total_bytes=0, on_change=None):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.total_bytes = total_bytes
+        self.bytes_read = 0
+        self.players = 0
+        self.inserted = 0
+        self.skipped = 0
+        self.errors = []
+        self.finished_at = None
+        self.on_change = on_change  # called as on_change(job) when the state moves on
+        self._done = threading.Event()
+
+    def changed(self):
+        if self.on_change is not None:
+            self.on_change(self)
+
+    def skip(self, name, reason):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"{name}: {reason}")
+
+    def finish(self, status, error=None):
+        self.status = status
+        if error and len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(error)
+        self.finished_at = time.monotonic()
+        try:
+            self.changed()
+        finally:
+            self._done.set()
+
+    def finished(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        percent = 100.0 if self.status == "done" else 0.0
+        if self.total_bytes and self.status != "done":
+            percent = round(100.0 * self.bytes_read / self.total_bytes, 1)
+        return {
+            "id": self.id,
+            "status": self.status,
+            "percent": percent,
+            "players": self.players,
+            "inserted": self.inserted,
+            "skipped": self.skipped,
+            "errors": list(self.errors),
+        }
+
+
+_JOBS = {}
+_JOBS_LOCK = threading.Lock()
+
+
+def _prune_jobs(now):
+    """Drop finished jobs past their TTL and all but the newest few. Call with the lock held."""
+    finished = sorted((job for job in _JOBS.values() if job.finished()), key=lambda job: job.finished_at)
+    excess = len(finished) - MAX_FINISHED_JOBS
+    for count, job in enumerate(finished):
+        if count < excess or now - job.finished_at > JOB_TTL_SECONDS:
+            del _JOBS[job.id]
+
+
+def new_job(total_bytes=0, on_change=None):
+    job = RestoreJob(total_bytes, on_change)
+    with _JOBS_LOCK:
+        _prune_jobs(time.monotonic())
+        _JOBS[job.id] = job
+    return job
+
+
+def get_job(job_id):
+    with _JOBS_LOCK:
+        return _JOBS.get(job_id)
+
+
+class _CountingReader:
+    """Text reader that records how far into the file the job has got."""
+
+    def __init__(self, handle, job):
+        self.handle = handle
+        self.job = job
+
+    def read(self, size):
+        chunk = self.handle.read(size)
+        self.job.bytes_read += len(chunk.encode("utf-8"))
+        return chunk
+
+
+def restore_players(job, path, session, table, batch_size=RESTORE_BATCH_SIZE, after_insert=None):
+    """Replace every row of ``table`` with the players in the backup at ``path``.
+
+    Runs in a single transaction, a failure part way leaves the old data.
+    ``after_insert`` is called inside that transaction once every row is in,
+    e.g. to rebuild derived tables.
+    """
+    job.status = "running"
+    job.changed()
+    seen = set()
+    batch = []
+    try:
+        session.execute(table.delete())
+        with open(path, "r", encoding="utf-8") as handle:
+            for name, payload in iter_json_object(_CountingReader(handle, job)):
+                job.players += 1
+                reason = validate_player(name, payload)
+                if reason is None and name in seen:
+                    reason = "duplicate name"
+                if reason:
+                    job.skip(name, reason)
+                    continue
+                seen.add(name)
+                batch.append(Player.from_dict(name, payload).to_dict())
+                if len(batch) >= batch_size:
+                    session.execute(insert(table), batch)
+                    job.inserted += len(batch)
+                    batch = []
+                    job.changed()
+        if batch:
+            session.execute(insert(table), batch)
+            job.inserted += len(batch)
+        if after_insert is not None:
+            after_insert()
+        session.commit()
+    except (OSError, ValueError) as error:
+        session.rollback()
+        job.inserted = 0
+        job.finish("failed", f"Could not read backup: {error}")
+    except Exception as error:
+        session.rollback()
+        job.inserted = 0
+        job.finish("failed", f"Restore failed: {error}")
+        raise
+    else:
+        job.finish("done")
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,271 @@
+"""Game -> season -> career rollups of every player counter.
+
+Closing a game records one ``GameLine`` per player: every counter
+(``flatten_counters``) that changed since their previous close. The line
+is then folded once into that player's season and career rollups and into
+the team's, so a season or career report reads a handful of precomputed
+rows instead of adding up games.
+
+A player's career rollup is exactly their totals at the last close, so
+"now minus career" is the next game's line and no separate baseline is
+kept. Players with nothing recorded since the last close get no line.
+
+The raw lines are kept; ``rebuild_rollups`` recomputes every season and
+career from them, splitting the players over a process (or thread) pool.
+
+    store = RollupStore()
+    store.close_game("2025-26", "vs Colby", TEAM.values())
+    store.row("season", "Ann", "2025-26")["PPG"]
+    store.report("career")
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+
+from basketball_model import Player
+from play_by_play import counter_delta, flatten_counters, unflatten_counters
+
+LEVELS = ("game", "season", "career")
+TEAM_ROLLUP = ""  # name of the team's rollups
+GAMES = "games"  # rollup counter: games folded in
+
+ROLLUP_FIELDS = ["name", "games", "points", "PPG", "assists", "rebounds", "turnovers", "FGM", "FGA", "PER", "TS%", "A/T", "BPM"]
+
+
+def default_season():
+    return str(date.today().year)
+
+
+class GameLine:
+    __slots__ = ("season", "game_id", "name", "counters")
+
+    def __init__(self, season, game_id, name, counters):
+        self.season = str(season)
+        self.game_id = str(game_id)
+        self.name = name
+        self.counters = counters
+
+    def to_dict(self):
+        return {"season": self.season, "game": self.game_id, "name": self.name, "counters": self.counters}
+
+    @staticmethod
+    def from_dict(data):
+        return GameLine(data["season"], data["game"], data["name"], dict(data["counters"]))
+
+
+def add_counters(into, counters, sign=1):
+    for field, amount in counters.items():
+        total = into.get(field, 0) + sign * amount
+        if total:
+            into[field] = total
+        else:
+            into.pop(field, None)
+    return into
+
+
+def game_line(player, career):
+    """Counters ``player`` changed since the close that left ``career``."""
+    before = dict(career or {})
+    before.pop(GAMES, None)
+    return counter_delta(before, flatten_counters(player))
+
+
+def fold_line(seasons, careers, line):
+    """Add one player's game to their season and career rollups."""
+    for rollups, key in ((seasons, (line.season, line.name)), (careers, line.name)):
+        rollup = rollups.setdefault(key, {})
+        add_counters(rollup, line.counters)
+        rollup[GAMES] = rollup.get(GAMES, 0) + 1
+
+
+def _sum_lines(lines):
+    seasons, careers = {}, {}
+    for line in lines:
+        fold_line(seasons, careers, line)
+    return seasons, careers
+
+
+def team_rollups(seasons, lines):
+    """Team season and career rollups: player rollups summed, games counted once per game."""
+    team_seasons, career = {}, {}
+    for (season, name), counters in seasons.items():
+        if name == TEAM_ROLLUP:
+            continue
+        add_counters(team_seasons.setdefault(season, {}), counters)
+        add_counters(career, counters)
+    games = {(line.season, line.game_id) for line in lines}
+    for season, rollup in team_seasons.items():
+        rollup[GAMES] = sum(1 for s, _ in games if s == season)
+    if games:
+        career[GAMES] = len(games)
+    return team_seasons, career
+
+
+def rebuild_rollups(lines, workers=1, mode="process"):
+    """``(seasons, careers)`` recomputed from raw game lines.
+
+    ``seasons`` is keyed by ``(season, name)`` and ``careers`` by name,
+    both including the TEAM_ROLLUP entries. Each worker sums all the games
+    of its share of the players, so the partial results never overlap.
+    """
+    lines = list(lines)
+    names = sorted({line.name for line in lines})
+    if workers <= 1 or len(names) < 2:
+        seasons, careers = _sum_lines(lines)
+    else:
+        share = {name: i % workers for i, name in enumerate(names)}
+        parts = [[] for _ in range(workers)]
+        for line in lines:
+            parts[share[line.name]].append(line)
+        pool = ProcessPoolExecutor if mode == "process" else ThreadPoolExecutor
+        with pool(max_workers=workers) as executor:
+            results = list(executor.map(_sum_lines, [part for part in parts if part]))
+        seasons, careers = {}, {}
+        for part_seasons, part_careers in results:
+            seasons.update(part_seasons)
+            careers.update(part_careers)
+    team_seasons, team_career = team_rollups(seasons, lines)
+    for season, rollup in team_seasons.items():
+        seasons[(season, TEAM_ROLLUP)] = rollup
+    if team_career:
+        careers[TEAM_ROLLUP] = team_career
+    return seasons, careers
+
+
+def rollup_player(name, counters):
+    """A Player holding ``counters`` so the usual metrics work on a rollup."""
+    counters = dict(counters)
+    counters.pop(GAMES, None)
+    return Player.from_dict(name, unflatten_counters(counters))
+
+
+def rollup_row(name, counters, games=None):
+    player = rollup_player(name, counters)
+    games = counters.get(GAMES, 0) if games is None else games
+    return {
+        "name": name or "TEAM",
+        "games": games,
+        "points": player.points,
+        "PPG": round(player.points / games, 1) if games else 0.0,
+        "assists": player.assists,
+        "rebounds": player.rebounds,
+        "turnovers": player.turnovers,
+        "FGM": player.shots_made(),
+        "FGA": player.total_shots(),
+        "PER": player.calc_per(),
+        "TS%": player.calc_ts(),
+        "A/T": player.calc_ast_to_tov(),
+        "BPM": player.calc_bpm(),
+    }
+
+
+class RollupStore:
+    def __init__(self):
+        self.games = []  # GameLine, in close order
+        self.seasons = {}  # (season, name) -> counters
+        self.careers = {}  # name -> counters
+
+    def has_game(self, season, game_id):
+        return any(line.season == str(season) and line.game_id == str(game_id) for line in self.games)
+
+    def close_game(self, season, game_id, players):
+        """Fold everything each player did since their last close into one game."""
+        if self.has_game(season, game_id):
+            raise ValueError(f"{game_id} is already closed for {season}")
+        lines = []
+        for player in players:
+            counters = game_line(player, self.careers.get(player.name))
+            if counters:
+                lines.append(GameLine(season, game_id, player.name, counters))
+        if not lines:
+            return lines
+        team_line = {}
+        for line in lines:
+            self.games.append(line)
+            fold_line(self.seasons, self.careers, line)
+            add_counters(team_line, line.counters)
+        team = GameLine(season, game_id, TEAM_ROLLUP, team_line)
+        fold_line(self.seasons, self.careers, team)
+        return lines
+
+    def rebuild(self, workers=1, mode="process"):
+        self.seasons, self.careers = rebuild_rollups(self.games, workers, mode)
+
+    def season_names(self):
+        return sorted({season for season, _ in self.seasons})
+
+    def row(self, level, name, season=None, game_id=None):
+        """Metrics of one rollup (``name`` TEAM_ROLLUP for the team), None if it doesn't exist."""
+        if level == "career":
+            counters = self.careers.get(name)
+        elif level == "season":
+            counters = self.seasons.get((str(season), name))
+        elif level == "game":
+            counters = self.game(name, season, game_id)
+            return rollup_row(name, counters, games=1) if counters is not None else None
+        else:
+            raise ValueError(f"unknown level {level!r}")
+        return rollup_row(name, counters) if counters is not None else None
+
+    def game(self, name, season, game_id):
+        if name == TEAM_ROLLUP:
+            lines = [l.counters for l in self.games if l.season == str(season) and l.game_id == str(game_id)]
+            return _merge(lines) if lines else None
+        for line in self.games:
+            if line.name == name and line.season == str(season) and line.game_id == str(game_id):
+                return line.counters
+        return None
+
+    def report(self, level="season", season=None):
+        """Player rows (team last) for one season or for careers."""
+        if level == "career":
+            rollups = self.careers.items()
+        elif level == "season":
+            rollups = ((name, c) for (s, name), c in self.seasons.items() if s == str(season))
+        else:
+            raise ValueError("report level must be 'season' or 'career'")
+        rows = sorted((rollup_row(name, c) for name, c in rollups if name != TEAM_ROLLUP), key=lambda r: r["name"])
+        team = self.careers.get(TEAM_ROLLUP) if level == "career" else self.seasons.get((str(season), TEAM_ROLLUP))
+        if team is not None:
+            rows.append(rollup_row(TEAM_ROLLUP, team))
+        return rows
+
+    def rename_player(self, old, new):
+        for line in self.games:
+            if line.name == old:
+                line.name = new
+        self.seasons = {(s, new if n == old else n): c for (s, n), c in self.seasons.items()}
+        if old in self.careers:
+            self.careers[new] = self.careers.pop(old)
+
+    def remove_player(self, name):
+        self.games = [line for line in self.games if line.name != name]
+        self.rebuild()
+
+    def to_dict(self):
+        return {
+            "games": [line.to_dict() for line in self.games],
+            "seasons": [[season, name, dict(counters)] for (season, name), counters in self.seasons.items()],
+            "careers": {name: dict(counters) for name, counters in self.careers.items()},
+        }
+
+    def restore(self, data):
+        """Replace everything with a ``to_dict()`` snapshot."""
+        self.games = [GameLine.from_dict(line) for line in data.get("games") or []]
+        if "seasons" in data:
+            self.seasons = {(season, name): dict(c) for season, name, c in data["seasons"]}
+            self.careers = {name: dict(c) for name, c in (data.get("careers") or {}).items()}
+        else:
+            self.rebuild()
+
+    @staticmethod
+    def from_dict(data):
+        store = RollupStore()
+        store.restore(data)
+        return store
+
+
+def _merge(counter_dicts):
+    total = {}
+    for counters in counter_dicts:
+        add_counters(total, counters)
+    return total
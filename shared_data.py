@@ -0,0 +1,244 @@
+"""Several app windows (or the app and a script) sharing one data directory.
+
+app.py saves after every change. Two windows used to overwrite each
+other's files, so one window's events disappeared at the other's next
+save. Now:
+
+- Saves hold an exclusive DataLock (a lock file in the data directory,
+  ``fcntl.flock``, or ``msvcrt.locking`` on Windows); loads hold a shared
+  one. The locks are advisory: only code that asks for them waits.
+- SharedFiles remembers each file's bytes as last read or written -- the
+  merge base -- and polls (mtime, size, inode) to see which files someone
+  else rewrote since. A save only re-reads those files, and only rewrites
+  files whose bytes changed.
+- Append-only logs (the play-by-play file) are appended to rather than
+  rewritten. For them only the size is remembered, and a save reads just
+  what other windows appended since -- the tail from that size -- unless
+  the file was replaced (a new inode) or cut short.
+- What was re-read is merged three ways with what this window has:
+  counters add up what each side did since the base, events and closed
+  games appended on either side are all kept, and anything deleted or
+  renamed on one side stays gone.
+
+    SHARED = SharedFiles(DATA_DIR, [COMPACT_FILE, PLAYS_FILE, TRENDS_FILE], logs=[PLAYS_FILE])
+    with SHARED.lock():
+        for path in SHARED.changed():
+            ...merge_players(base, ours, theirs)...
+        SHARED.write(path, data)
+"""
+import contextlib
+import os
+from collections import Counter
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+from basketball_model import Player
+from play_by_play import flatten_counters
+from replay import set_counters
+
+LOCK_NAME = ".lock"
+POLL_MS = 1000  # how often a window checks for other windows' saves
+
+
+class DataLock:
+    """Advisory lock on a file; re-entrant within the process."""
+
+    def __init__(self, path):
+        self.path = path
+        self._handle = None
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def __call__(self, shared=False):
+        if self._depth:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+        handle = open(self.path, "a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            elif msvcrt is not None:  # no shared locks: readers wait for each other too
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            self._handle, self._depth = handle, 1
+            yield
+        finally:
+            self._depth = 0
+            self._handle = None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            except OSError:
+                pass
+            handle.close()
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class SharedFiles:
+    def __init__(self, directory, paths, logs=()):
+        self.lock = DataLock(os.path.join(directory, LOCK_NAME))
+        self.paths = list(paths)
+        self.logs = set(logs)  # append-only paths: their size is remembered, not their bytes
+        self.base = {}  # path -> bytes as last read or written (None: no file)
+        self.sizes = {}  # log path -> bytes as last read or written
+        self._seen = {}  # path -> stat signature when base was taken
+
+    def changed(self):
+        """Paths rewritten (or removed) by someone else since this process last read or wrote them."""
+        return [path for path in self.paths if _signature(path) != self._seen.get(path)]
+
+    def read(self, path):
+        """The file's bytes (None if it doesn't exist), remembered as the merge base."""
+        try:
+            with open(path, "rb") as handle:
+                data = handle.read()
+        except FileNotFoundError:
+            data = None
+        if path in self.logs:
+            self.sizes[path] = len(data or b"")
+        else:
+            self.base[path] = data
+        self._seen[path] = _signature(path)
+        return data
+
+    def read_tail(self, path):
+        """What was appended to log ``path`` since this process last read or wrote it.
+
+        None if it can't be read as a tail -- never read, removed, replaced
+        or cut short -- and the caller should ``read`` it whole.
+        """
+        seen, now = self._seen.get(path), _signature(path)
+        if seen is None or now is None or now[2] != seen[2] or now[1] < self.sizes.get(path, 0):
+            return None
+        with open(path, "rb") as handle:
+            handle.seek(self.sizes[path])
+            data = handle.read()
+        self.sizes[path] += len(data)
+        self._seen[path] = _signature(path)
+        return data
+
+    def append(self, path, data):
+        """Append to log ``path`` (read or written before, with what others appended merged); returns whether anything was written."""
+        if not data:
+            return False
+        with open(path, "ab") as handle:
+            handle.write(data)
+        self.sizes[path] = self.sizes.get(path, 0) + len(data)
+        self._seen[path] = _signature(path)
+        return True
+
+    def write(self, path, data):
+        """Atomically replace the file, unless it already holds ``data``; returns whether it was written."""
+        is_log = path in self.logs
+        if not is_log and self.base.get(path) == data and self._seen.get(path) == _signature(path) is not None:
+            return False
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp, path)
+        if is_log:
+            self.sizes[path] = len(data)
+        else:
+            self.base[path] = data
+        self._seen[path] = _signature(path)
+        return True
+
+
+# --- three-way merges: base is the common ancestor, theirs is on disk, ours in memory ---
+
+def merge_counters(base, ours, theirs):
+    """Flattened counters: theirs plus whatever ours changed since base."""
+    merged = dict(theirs)
+    for field in set(base) | set(ours):
+        delta = ours.get(field, 0) - base.get(field, 0)
+        if delta:
+            merged[field] = merged.get(field, 0) + delta
+    return merged
+
+
+def _merge_player(base, ours, theirs):
+    if base is None:  # added on both sides under the same name
+        base = Player(ours.name)
+    player = Player.from_dict(theirs.name, theirs.to_dict())
+    set_counters(player, merge_counters(flatten_counters(base), flatten_counters(ours), flatten_counters(theirs)))
+    grown = len(ours.shot_locations) - len(base.shot_locations)
+    if grown >= 0:
+        player.shot_locations.extend(ours.shot_locations[len(base.shot_locations):])
+    else:  # ours undid located shots
+        del player.shot_locations[max(0, len(player.shot_locations) + grown):]
+    return player
+
+
+def merge_by_name(base, ours, theirs, merge):
+    """Three-way merge of dicts keyed by player name.
+
+    A name removed (or renamed away) on either side stays removed, a name
+    added on one side is kept, and a name on both sides is combined with
+    ``merge(base or None, ours, theirs)``.
+    """
+    merged = {}
+    for name in list(theirs) + [name for name in ours if name not in theirs]:
+        b, o, t = base.get(name), ours.get(name), theirs.get(name)
+        if b is not None and (o is None or t is None):
+            continue
+        if o is None or t is None:
+            merged[name] = t if o is None else o
+        else:
+            merged[name] = merge(b, o, t)
+    return merged
+
+
+def merge_players(base, ours, theirs):
+    """``{name: Player}`` merged; counters and located shots from both sides add up."""
+    return merge_by_name(base, ours, theirs, _merge_player)
+
+
+def merge_appends(base, ours, theirs, key):
+    """Lists both sides append to (play-by-play events, closed games).
+
+    Items ours added since base are appended to theirs; items ours removed
+    (undo) are taken out of theirs. ``key(item)`` identifies equal items.
+    """
+    base_counts = Counter(map(key, base))
+    ours_counts = Counter(map(key, ours))
+    removed = base_counts - ours_counts
+    merged = []
+    for item in theirs:
+        k = key(item)
+        if removed[k] > 0:
+            removed[k] -= 1
+        else:
+            merged.append(item)
+    seen = Counter()
+    for item in ours:
+        k = key(item)
+        seen[k] += 1
+        if seen[k] > base_counts[k]:
+            merged.append(item)
+    return merged
+
+
+def prefer_changed(base, ours, theirs):
+    """For values that can't be added up (e.g. a trend): ours if we changed it, else theirs."""
+    return ours if ours != base else theirs
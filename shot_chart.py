@@ -0,0 +1,313 @@
+"""Shot locations and make-rate heatmaps.
+
+Court coordinates are feet on a half court: ``x`` runs from -25 (left
+sideline) to 25, ``y`` from the baseline (0) towards half court (47), and
+the basket is at (0, 5.25). A located shot is packed into one 32-bit int
+(0.1 ft resolution plus made/contested bits) so a player's shots are a
+flat ``array("I")``, saved as base64.
+
+A ``ShotChart`` keeps made/attempt counts per bin and takes one shot at a
+time, so the heatmaps are updated as shots are recorded and drawing one is
+a pass over the bins, not over every shot. Bins are either square
+(``GridBins``) or hexagons centred on the basket (``HexBins``).
+
+    charts = ShotCharts()
+    charts.rebuild(TEAM.values())
+    charts.add("Ann", 3.5, 21.0, True)
+    charts.chart("Ann").cells()   # [{"x", "y", "made", "attempts", "pct"}, ...]
+"""
+import base64
+import math
+import sys
+from array import array
+
+COURT_WIDTH = 50.0
+HALF_COURT = 47.0
+BASKET_Y = 5.25
+THREE_RADIUS = 23.75
+CORNER_THREE_X = 22.0
+LAYUP_RADIUS = 4.0
+
+_SCALE = 10  # 0.1 ft
+_Y_SHIFT = 9
+_MADE_BIT = 1 << 18
+_CONTESTED_BIT = 1 << 19
+
+DEFAULT_BINNING = "hex"
+
+
+def _clamp(value, low, high):
+    return min(max(value, low), high)
+
+
+def pack_shot(x, y, made, contested=False):
+    xq = round(_clamp(x + COURT_WIDTH / 2, 0, COURT_WIDTH) * _SCALE)
+    yq = round(_clamp(y, 0, HALF_COURT) * _SCALE)
+    return xq | yq << _Y_SHIFT | (_MADE_BIT if made else 0) | (_CONTESTED_BIT if contested else 0)
+
+
+def unpack_shot(code):
+    """``(x, y, made, contested)`` for a packed shot."""
+    x = (code & (1 << _Y_SHIFT) - 1) / _SCALE - COURT_WIDTH / 2
+    y = (code >> _Y_SHIFT & (1 << _Y_SHIFT) - 1) / _SCALE
+    return x, y, bool(code & _MADE_BIT), bool(code & _CONTESTED_BIT)
+
+
+def encode_locations(codes):
+    data = array("I", codes)
+    if sys.byteorder == "big":
+        data.byteswap()  # always stored little-endian
+    return base64.b64encode(data.tobytes()).decode("ascii")
+
+
+def decode_locations(text):
+    data = array("I")
+    if text:
+        data.frombytes(base64.b64decode(text, validate=True))
+        if sys.byteorder == "big":
+            data.byteswap()
+    return data
+
+
+def shot_distance(x, y):
+    return math.hypot(x, y - BASKET_Y)
+
+
+def classify_shot(x, y):
+    """The SHOT_TYPES bucket a location falls in."""
+    if abs(x) >= CORNER_THREE_X or shot_distance(x, y) >= THREE_RADIUS:
+        return "3pt"
+    if shot_distance(x, y) <= LAYUP_RADIUS:
+        return "layup"
+    return "midrange"
+
+
+class GridBins:
+    name = "grid"
+
+    def __init__(self, cell=3.0):
+        self.cell = cell
+
+    def key(self, x, y):
+        return int((x + COURT_WIDTH / 2) // self.cell), int(y // self.cell)
+
+    def center(self, key):
+        col, row = key
+        return (col + 0.5) * self.cell - COURT_WIDTH / 2, (row + 0.5) * self.cell
+
+    def outline(self, key, scale=1.0):
+        """Corner points of the bin, shrunk around its centre by ``scale``."""
+        cx, cy = self.center(key)
+        h = self.cell / 2 * scale
+        return [(cx - h, cy - h), (cx + h, cy - h), (cx + h, cy + h), (cx - h, cy + h)]
+
+
+class HexBins:
+    """Pointy-top hexagons of circumradius ``size``, one centred on the basket."""
+
+    name = "hex"
+
+    def __init__(self, size=2.0):
+        self.size = size
+
+    def key(self, x, y):
+        y -= BASKET_Y
+        q = (math.sqrt(3) / 3 * x - y / 3) / self.size
+        r = 2 / 3 * y / self.size
+        # cube rounding
+        s = -q - r
+        rq, rr, rs = round(q), round(r), round(s)
+        dq, dr, ds = abs(rq - q), abs(rr - r), abs(rs - s)
+        if dq > dr and dq > ds:
+            rq = -rr - rs
+        elif dr > ds:
+            rr = -rq - rs
+        return int(rq), int(rr)
+
+    def center(self, key):
+        q, r = key
+        return self.size * math.sqrt(3) * (q + r / 2), self.size * 1.5 * r + BASKET_Y
+
+    def outline(self, key, scale=1.0):
+        cx, cy = self.center(key)
+        radius = self.size * scale
+        return [
+            (cx + radius * math.cos(math.radians(30 + 60 * i)), cy + radius * math.sin(math.radians(30 + 60 * i)))
+            for i in range(6)
+        ]
+
+
+BINNINGS = {"grid": GridBins(), "hex": HexBins()}
+
+
+class ShotChart:
+    def __init__(self, binning=DEFAULT_BINNING):
+        self.bins = BINNINGS[binning]
+        self.counts = {}  # bin key -> [made, attempts]
+        self.made = 0
+        self.attempts = 0
+
+    def add(self, x, y, made, sign=1):
+        key = self.bins.key(x, y)
+        cell = self.counts.get(key)
+        if cell is None:
+            cell = self.counts[key] = [0, 0]
+        cell[0] += sign if made else 0
+        cell[1] += sign
+        self.made += sign if made else 0
+        self.attempts += sign
+        if not cell[1]:
+            del self.counts[key]
+
+    def add_codes(self, codes, sign=1):
+        for code in codes:
+            x, y, made, _ = unpack_shot(code)
+            self.add(x, y, made, sign)
+
+    def max_attempts(self):
+        return max((cell[1] for cell in self.counts.values()), default=0)
+
+    def cells(self):
+        out = []
+        for key in sorted(self.counts):
+            made, attempts = self.counts[key]
+            x, y = self.bins.center(key)
+            out.append({
+                "x": round(x, 2), "y": round(y, 2), "made": made, "attempts": attempts,
+                "pct": round(made / attempts, 3),
+            })
+        return out
+
+    def to_dict(self):
+        return {
+            "binning": self.bins.name,
+            "made": self.made,
+            "attempts": self.attempts,
+            "pct": round(self.made / self.attempts, 3) if self.attempts else 0.0,
+            "cells": self.cells(),
+        }
+
+
+class ShotCharts:
+    """Per-player charts plus the team chart, kept in step shot by shot."""
+
+    def __init__(self, binning=DEFAULT_BINNING):
+        self.binning = binning
+        self.players = {}
+        self.team = ShotChart(binning)
+
+    def chart(self, name=None):
+        if name is None:
+            return self.team
+        return self.players.get(name) or ShotChart(self.binning)
+
+    def add(self, name, x, y, made):
+        # bin the stored, quantized and clamped point so a live chart matches a rebuilt one
+        x, y, made, _ = unpack_shot(pack_shot(x, y, made))
+        chart = self.players.get(name)
+        if chart is None:
+            chart = self.players[name] = ShotChart(self.binning)
+        chart.add(x, y, made)
+        self.team.add(x, y, made)
+
+    def add_player(self, player):
+        self.remove(player.name)
+        if not player.shot_locations:
+            return
+        chart = self.players[player.name] = ShotChart(self.binning)
+        chart.add_codes(player.shot_locations)
+        self.team.add_codes(player.shot_locations)
+
+    def remove(self, name):
+        chart = self.players.pop(name, None)
+        if chart is None:
+            return
+        for key, (made, attempts) in chart.counts.items():
+            cell = self.team.counts[key]
+            cell[0] -= made
+            cell[1] -= attempts
+            if not cell[1]:
+                del self.team.counts[key]
+        self.team.made -= chart.made
+        self.team.attempts -= chart.attempts
+
+    def rename(self, old, new):
+        if old in self.players:
+            self.players[new] = self.players.pop(old)
+
+    def rebuild(self, players):
+        self.players = {}
+        self.team = ShotChart(self.binning)
+        for player in players:
+            self.add_player(player)
+
+
+# --- drawing (shared by the Tk canvas and the web SVG) ---
+
+def court_lines():
+    """Half-court markings as polylines of (x, y) feet."""
+    def arc(cx, cy, radius, start, end, steps=48):
+        return [
+            (cx + radius * math.cos(math.radians(a)), cy + radius * math.sin(math.radians(a)))
+            for a in (start + (end - start) * i / steps for i in range(steps + 1))
+        ]
+
+    half = COURT_WIDTH / 2
+    corner_y = BASKET_Y + math.sqrt(THREE_RADIUS ** 2 - CORNER_THREE_X ** 2)
+    corner_angle = math.degrees(math.atan2(corner_y - BASKET_Y, CORNER_THREE_X))
+    three = [(-CORNER_THREE_X, 0.0)] + arc(0, BASKET_Y, THREE_RADIUS, 180 - corner_angle, corner_angle) + [(CORNER_THREE_X, 0.0)]
+    return [
+        [(-half, 0.0), (half, 0.0), (half, HALF_COURT), (-half, HALF_COURT), (-half, 0.0)],
+        [(-8.0, 0.0), (-8.0, 19.0), (8.0, 19.0), (8.0, 0.0)],
+        arc(0, 19.0, 6.0, 0, 180),
+        arc(0, BASKET_Y, 0.75, 0, 360, steps=16),
+        [(-3.0, 4.0), (3.0, 4.0)],
+        three,
+    ]
+
+
+def heat_color(pct):
+    """Blue (cold, 20% or less) through pale yellow (40%) to red (60% or more)."""
+    stops = ((0.2, (44, 123, 182)), (0.4, (255, 255, 191)), (0.6, (215, 25, 28)))
+    pct = _clamp(pct, stops[0][0], stops[-1][0])
+    for (lo, lo_rgb), (hi, hi_rgb) in zip(stops, stops[1:]):
+        if pct <= hi:
+            t = (pct - lo) / (hi - lo)
+            rgb = [round(a + (b - a) * t) for a, b in zip(lo_rgb, hi_rgb)]
+            return "#{:02x}{:02x}{:02x}".format(*rgb)
+    return "#d7191c"
+
+
+def bin_scale(attempts, most):
+    """Drawn size of a bin: area grows with its share of the busiest bin's attempts."""
+    return 0.35 + 0.65 * math.sqrt(attempts / most) if most else 0.0
+
+
+def chart_svg(chart, title="", px_per_foot=10):
+    """The chart as a standalone SVG image (baseline at the top)."""
+    s = px_per_foot
+    width, height = COURT_WIDTH * s, HALF_COURT * s
+
+    def pt(x, y):
+        return f"{(x + COURT_WIDTH / 2) * s:.1f},{y * s:.1f}"
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" '
+        f'viewBox="0 0 {width:.0f} {height:.0f}">',
+        f'<rect width="{width:.0f}" height="{height:.0f}" fill="#f4ead8"/>',
+    ]
+    most = chart.max_attempts()
+    for key, (made, attempts) in sorted(chart.counts.items()):
+        points = " ".join(pt(x, y) for x, y in chart.bins.outline(key, bin_scale(attempts, most)))
+        parts.append(
+            f'<polygon points="{points}" fill="{heat_color(made / attempts)}" fill-opacity="0.9">'
+            f"<title>{made}/{attempts}</title></polygon>"
+        )
+    for line in court_lines():
+        points = " ".join(pt(x, y) for x, y in line)
+        parts.append(f'<polyline points="{points}" fill="none" stroke="#5a4a3a" stroke-width="2"/>')
+    if title:
+        escaped = title.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        parts.append(f'<text x="10" y="{height - 12:.0f}" font-family="sans-serif" font-size="16">{escaped}</text>')
+    parts.append("</svg>")
+    return "\n".join(parts)
@@ -0,0 +1,256 @@
+"""\"Players most like X\" over per-possession stat vectors.
+
+Every player-season (a season rollup, see rollups.py) becomes a vector of
+rates per used possession (FGA + assists + turnovers, as in calc_usage):
+attempts by shot type, makes, contested attempts, strike-zone passes,
+cuts, paint touches, defensive contests, assists, rebounds and turnovers.
+Similar players are the nearest vectors by Euclidean distance.
+
+The base index is a KD-tree, or with numpy installed a matrix scanned in
+one vectorised pass. Entries changed since it was built (games closed,
+players renamed) sit in a small pending set that is scanned directly and
+masked out of the base; the base is rebuilt once the pending set passes
+REBUILD_FRACTION of the index, so closing a game never rebuilds
+everything.
+
+    index = SimilarityIndex()
+    index.rebuild(season_entries(ROLLUPS.seasons))
+    index.similar("Ann", k=5)   # [((season, name), distance), ...]
+"""
+import heapq
+import math
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python fallback
+    np = None
+
+from rollups import GAMES, TEAM_ROLLUP
+
+SHOT_KINDS = ("layup", "midrange", "3pt")
+
+# (feature, counters summed) -- divided by used possessions
+FEATURES = (
+    [(kind, (f"shots.{kind}.made", f"shots.{kind}.missed")) for kind in SHOT_KINDS]
+    + [
+        ("made", tuple(f"shots.{kind}.made" for kind in SHOT_KINDS)),
+        ("contested", tuple(f"shots.{kind}.contested_{r}" for kind in SHOT_KINDS for r in ("made", "missed"))),
+        ("strike_zone_balls", ("strike_zone.balls",)),
+        ("strike_zone_strikes", ("strike_zone.strikes",)),
+        ("cuts", ("cuts.total",)),
+        ("cut_passes", ("cuts.pass_to_cutter",)),
+        ("paint_touches", ("paint_touches.total",)),
+        ("kick_outs", ("paint_touches.kick_out",)),
+        ("defense_contested", ("defense.contested_made", "defense.contested_missed")),
+        ("defense_uncontested", ("defense.uncontested_made", "defense.uncontested_missed")),
+        ("assists", ("assists",)),
+        ("rebounds", ("rebounds",)),
+        ("turnovers", ("turnovers",)),
+    ]
+)
+FEATURE_NAMES = [name for name, _ in FEATURES]
+
+LEAF_SIZE = 8
+REBUILD_FRACTION = 0.1
+MIN_PENDING = 32  # never rebuild for fewer changes than this
+
+
+def used_possessions(counters):
+    attempts = sum(v for k, v in counters.items() if k.startswith("shots.") and k.endswith((".made", ".missed")))
+    return attempts + counters.get("assists", 0) + counters.get("turnovers", 0)
+
+
+def stat_vector(counters):
+    """Per-possession feature vector for flattened counters, None if nothing is recorded."""
+    raw = [sum(counters.get(key, 0) for key in keys) for _, keys in FEATURES]
+    if not any(raw):
+        return None
+    possessions = max(1, used_possessions(counters))
+    return tuple(value / possessions for value in raw)
+
+
+def season_counters(rollup):
+    return {k: v for k, v in rollup.items() if k != GAMES}
+
+
+def season_entries(seasons):
+    """``((season, name), counters)`` for every player-season in a rollup ``seasons`` dict."""
+    for (season, name), counters in seasons.items():
+        if name != TEAM_ROLLUP:
+            yield (season, name), season_counters(counters)
+
+
+def _distance2(a, b):
+    return sum((x - y) * (x - y) for x, y in zip(a, b))
+
+
+class KDTree:
+    """Static KD-tree; leaves hold up to LEAF_SIZE point indexes."""
+
+    def __init__(self, keys, points):
+        self.keys = keys
+        self.points = points
+        self.root = self._build(list(range(len(points))))
+
+    def _build(self, indexes):
+        if len(indexes) <= LEAF_SIZE:
+            return indexes
+        points = self.points
+        dims = len(points[indexes[0]])
+        spreads = [
+            max(points[i][d] for i in indexes) - min(points[i][d] for i in indexes) for d in range(dims)
+        ]
+        dim = max(range(dims), key=spreads.__getitem__)
+        if not spreads[dim]:
+            return indexes  # all the same point
+        indexes.sort(key=lambda i: points[i][dim])
+        middle = len(indexes) // 2
+        split = points[indexes[middle]][dim]
+        return (dim, split, self._build(indexes[:middle]), self._build(indexes[middle:]))
+
+    def nearest(self, query, k, skip=None):
+        """``[(squared distance, key)]`` of the k nearest points whose key ``skip`` doesn't reject."""
+        best = []  # max-heap of (-distance2, index)
+        keys, points = self.keys, self.points
+
+        def visit(node):
+            if isinstance(node, list):
+                for i in node:
+                    if skip is not None and skip(keys[i]):
+                        continue
+                    d2 = _distance2(query, points[i])
+                    if len(best) < k:
+                        heapq.heappush(best, (-d2, i))
+                    elif d2 < -best[0][0]:
+                        heapq.heapreplace(best, (-d2, i))
+                return
+            dim, split, left, right = node
+            diff = query[dim] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            if len(best) < k or diff * diff < -best[0][0]:
+                visit(far)
+
+        if k > 0 and points:
+            visit(self.root)
+        return sorted((-d2, keys[i]) for d2, i in best)
+
+
+class MatrixScan:
+    """Brute-force k-NN over a numpy matrix, same interface as KDTree."""
+
+    def __init__(self, keys, points):
+        self.keys = keys
+        self.matrix = np.array(points, dtype=np.float64).reshape(len(points), len(FEATURES))
+        self.norms = (self.matrix ** 2).sum(axis=1)
+
+    def nearest(self, query, k, skip=None):
+        if k <= 0 or not self.keys:
+            return []
+        query = np.asarray(query, dtype=np.float64)
+        # |p - q|^2 = |p|^2 - 2 p.q + |q|^2: one matrix-vector product per query
+        d2 = np.maximum(self.norms - 2 * (self.matrix @ query) + query @ query, 0.0)
+        # a few spare candidates for the ones ``skip`` rejects; scan everything if that isn't enough
+        for limit in (min(len(d2), k + 16), len(d2)):
+            if limit < len(d2):
+                candidates = np.argpartition(d2, limit - 1)[:limit]
+                candidates = candidates[np.argsort(d2[candidates])]
+            else:
+                candidates = np.argsort(d2)
+            found = []
+            for i in candidates:
+                key = self.keys[i]
+                if skip is None or not skip(key):
+                    found.append((float(d2[i]), key))
+                    if len(found) == k:
+                        return found
+        return found
+
+
+class SimilarityIndex:
+    def __init__(self, use_numpy=True):
+        self.use_numpy = use_numpy and np is not None
+        self.vectors = {}  # key -> vector
+        self.pending = set()  # keys added, changed or removed since the base was built
+        self.base = None
+        self.rebuilds = 0
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def update(self, key, counters):
+        vector = stat_vector(counters)
+        if vector is None:
+            self.remove(key)
+        elif self.vectors.get(key) != vector:
+            self.vectors[key] = vector
+            self.pending.add(key)
+
+    def remove(self, key):
+        if self.vectors.pop(key, None) is not None:
+            self.pending.add(key)
+
+    def rebuild(self, entries=None):
+        """Rebuild the base index, first replacing every entry if ``entries`` is given."""
+        if entries is not None:
+            self.vectors = {}
+            for key, counters in entries:
+                vector = stat_vector(counters)
+                if vector is not None:
+                    self.vectors[key] = vector
+        keys = list(self.vectors)
+        points = [self.vectors[key] for key in keys]
+        self.base = (MatrixScan if self.use_numpy else KDTree)(keys, points)
+        self.pending = set()
+        self.rebuilds += 1
+
+    def sync(self, entries):
+        """Bring the index in line with ``entries``, touching only what changed; returns the number changed."""
+        seen = set()
+        changed = 0
+        for key, counters in entries:
+            seen.add(key)
+            had = self.vectors.get(key)
+            self.update(key, counters)
+            changed += self.vectors.get(key) != had
+        for key in [key for key in self.vectors if key not in seen]:
+            self.remove(key)
+            changed += 1
+        return changed
+
+    def _maybe_rebuild(self):
+        if self.base is None or len(self.pending) > max(MIN_PENDING, REBUILD_FRACTION * len(self.vectors)):
+            self.rebuild()
+
+    def nearest(self, vector, k=5, exclude=None):
+        """``[(key, distance)]`` nearest first; ``exclude(key)`` drops candidates."""
+        self._maybe_rebuild()
+        pending = self.pending
+
+        def skip(key):
+            return key in pending or (exclude is not None and exclude(key))
+
+        found = self.base.nearest(vector, k, skip)
+        for key in pending:
+            if key in self.vectors and (exclude is None or not exclude(key)):
+                found.append((_distance2(vector, self.vectors[key]), key))
+        found.sort()
+        return [(key, round(math.sqrt(d2), 4)) for d2, key in found[:k]]
+
+    def seasons_of(self, name):
+        return sorted(season for season, n in self.vectors if n == name)
+
+    def similar(self, name, season=None, k=5, vector=None):
+        """Player-seasons most like ``name``'s ``season`` (latest by default), other players only.
+
+        ``vector`` (e.g. the current, unclosed totals) is used when given or
+        when the player has no indexed season.
+        """
+        if vector is None:
+            seasons = self.seasons_of(name)
+            if season is None and seasons:
+                season = seasons[-1]
+            vector = self.vectors.get((season, name))
+        if vector is None:
+            return []
+        return self.nearest(vector, k, exclude=lambda key: key[1] == name)
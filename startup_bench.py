@@ -0,0 +1,103 @@
+"""Cold and warm launch time of the desktop app builds.
+
+    python build.py && python build.py --profile fast
+    python startup_bench.py                        # both builds in dist/, 5 warm runs each
+    python startup_bench.py app.py dist/BasketballAnalytics --runs 10
+
+Each launch runs with BASKETBALL_EXIT_AFTER_START set, so app.py quits as
+soon as its window is up, and a throwaway home folder, so the real data
+isn't touched; the time is from starting the process until it exits. The
+cold run comes first, after dropping the OS file cache if this user can
+(``/proc/sys/vm/drop_caches`` on Linux as root, ``purge`` on macOS);
+otherwise it is just the first launch, which is marked in the output.
+Warm runs follow back to back.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from build import NAME
+
+DEFAULT_TARGETS = [
+    os.path.join("dist", NAME + (".exe" if os.name == "nt" else "")),
+    os.path.join("dist", f"{NAME}-fast", f"{NAME}-fast" + (".exe" if os.name == "nt" else "")),
+]
+
+
+def command(target):
+    if target.endswith(".py"):
+        return [sys.executable, target]
+    if target.endswith(".app"):  # macOS bundle: run the executable inside
+        name = os.path.splitext(os.path.basename(target))[0]
+        return [os.path.join(target, "Contents", "MacOS", name)]
+    return [os.path.abspath(target)]
+
+
+def drop_caches():
+    """Empty the OS file cache; False if this platform or user can't."""
+    try:
+        if sys.platform.startswith("linux"):
+            os.sync()
+            with open("/proc/sys/vm/drop_caches", "w") as handle:
+                handle.write("3\n")
+            return True
+        if sys.platform == "darwin":
+            return subprocess.run(["purge"], capture_output=True).returncode == 0
+    except OSError:
+        pass
+    return False
+
+
+def launch(cmd, home, timeout=120):
+    env = dict(os.environ, BASKETBALL_EXIT_AFTER_START="1", HOME=home, USERPROFILE=home)
+    start = time.perf_counter()
+    subprocess.run(cmd, env=env, check=True, timeout=timeout, capture_output=True)
+    return time.perf_counter() - start
+
+
+def measure(target, runs=5):
+    """``{"cold": s, "dropped": bool, "warm": [s, ...]}`` for one build."""
+    cmd = command(target)
+    with tempfile.TemporaryDirectory() as home:
+        dropped = drop_caches()
+        cold = launch(cmd, home)
+        warm = [launch(cmd, home) for _ in range(runs)]
+    return {"cold": cold, "dropped": dropped, "warm": warm}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare launch times of desktop app builds.")
+    parser.add_argument("targets", nargs="*", help="executables, .app bundles or app.py (default: both dist/ builds)")
+    parser.add_argument("--runs", type=int, default=5, help="warm launches per target")
+    args = parser.parse_args(argv)
+
+    targets = args.targets or [t for t in DEFAULT_TARGETS if os.path.exists(t)]
+    if not targets:
+        print("no builds found in dist/; run build.py (and build.py --profile fast) first", file=sys.stderr)
+        return 1
+    print(f"{'target':<50} {'cold':>8} {'warm med':>9} {'warm min':>9}")
+    marked = False
+    for target in targets:
+        try:
+            result = measure(target, args.runs)
+        except subprocess.CalledProcessError as error:
+            last = error.stderr.decode("utf-8", "replace").strip().splitlines()[-1:]
+            print(f"{target:<50} failed: {last[0] if last else error}")
+            continue
+        except (OSError, subprocess.SubprocessError) as error:
+            print(f"{target:<50} failed: {error}")
+            continue
+        cold = f"{result['cold']:.2f}s" + ("" if result["dropped"] else "*")
+        marked = marked or not result["dropped"]
+        print(f"{target:<50} {cold:>8} {statistics.median(result['warm']):>8.2f}s {min(result['warm']):>8.2f}s")
+    if marked:
+        print("* first launch; the file cache couldn't be dropped (needs root on Linux)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# The apps are plain top-level modules, make them importable from tests/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def web_app(tmp_path):
+    import basketball_web
+
+    app = basketball_web.create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+    })
+    with app.app_context():
+        basketball_web.init_db()
+        yield app
+        basketball_web.db.session.remove()
+        basketball_web.db.engine.dispose()
@@ -0,0 +1,50 @@
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+
+import basketball_cli
+import compact_format
+from basketball_model import Player
+
+
+def write_teams(tmp_path):
+    ann, ben, cal = Player("Ann"), Player("Ben"), Player("Cal")
+    for _ in range(5):
+        ann.record_shot("3pt", True)
+    ben.record_shot("layup", True)
+    ben.record_stat("assists")
+    compact_format.save(str(tmp_path / "varsity.bbd"), [ann, ben])
+    # basketball_app.py's nested shape, read through legacy_import
+    legacy = {"Cal": {"points": 4, "shots": {"layup": {"made": 2, "missed": 1}}, "assists": 1, "turnovers": 0, "rebounds": 3,
+                      "strike_zone": {"balls": {"total": 2, "made": 1, "missed": 1}, "strikes": {"total": 0, "made": 0, "missed": 0}},
+                      "games_played": 2}}
+    (tmp_path / "summer.json").write_text(json.dumps(legacy))
+    return [str(tmp_path / "varsity.bbd"), str(tmp_path / "summer.json")]
+
+
+def test_report_filters_sorts_and_formats(tmp_path, capsys):
+    paths = write_teams(tmp_path)
+    out = tmp_path / "report.csv"
+    assert basketball_cli.main(["report", *paths, "--sort", "points", "--stat", "points", "--stat", "layup_made",
+                                "--format", "csv", "--out", str(out)]) == 0
+    rows = list(csv.DictReader(io.StringIO(out.read_text())))
+    assert [(r["name"], r["points"], r["layup_made"]) for r in rows] == [("Ann", "15", "0"), ("Cal", "4", "2"), ("Ben", "2", "1")]
+    assert rows[0]["source"].endswith("varsity.bbd")
+
+    assert basketball_cli.main(["report", paths[0], "--player", "ben", "--format", "json", "--profile"]) == 0
+    captured = capsys.readouterr()
+    assert [row["name"] for row in json.loads(captured.out)] == ["Ben"] and "profile: 1 files" in captured.err
+
+    assert basketball_cli.main(["teams", str(tmp_path), str(tmp_path / "missing.json"), "--parallel", "2"]) == 1
+    captured = capsys.readouterr()
+    assert "varsity.bbd" in captured.out and "skipped" in captured.err
+
+
+def test_cli_does_not_import_tkinter():
+    code = "import sys, basketball_cli; print('tkinter' in sys.modules)"
+    here = os.path.dirname(os.path.abspath(basketball_cli.__file__))
+    result = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
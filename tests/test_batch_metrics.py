@@ -0,0 +1,60 @@
+import csv
+import json
+import random
+
+import batch_metrics
+import compact_format
+from basketball_model import SUMMARY_FIELDS, Player, calc_team_percentage, get_team_possessions, summary_row
+
+
+def make_team(rng, prefix, size):
+    players = []
+    for i in range(size):
+        player = Player(f"{prefix} {i}")
+        for _ in range(rng.randint(0, 30)):
+            player.record_shot(rng.choice(["layup", "midrange", "3pt"]), rng.random() < 0.45, rng.random() < 0.3)
+        player.assists, player.turnovers, player.rebounds = rng.randint(0, 9), rng.randint(0, 6), rng.randint(0, 12)
+        players.append(player)
+    return players
+
+
+def test_batch_matches_per_file_metrics(tmp_path, web_app, capsys):
+    import basketball_web
+
+    rng = random.Random(2)
+    teams = {}
+    for label in ("varsity", "jv", "summer"):
+        players = make_team(rng, label, rng.randint(3, 9))
+        if label == "summer":  # the desktop app's compact file
+            path = tmp_path / f"{label}.bbd"
+            compact_format.save(str(path), players)
+        else:
+            path = tmp_path / f"{label}.json"
+            path.write_text(json.dumps({p.name: p.to_dict() for p in players}))
+        teams[str(path)] = players
+    # the web app's sqlite database
+    db_players = make_team(rng, "web", 4)
+    for player in db_players:
+        record = basketball_web.PlayerRecord(name=player.name)
+        record.update_from(player)
+        basketball_web.db.session.add(record)
+    basketball_web.db.session.commit()
+    teams[str(tmp_path / "test.db")] = db_players
+    (tmp_path / "broken.json").write_text("{not json")
+
+    out, team_csv = tmp_path / "players.csv", tmp_path / "teams.csv"
+    status = batch_metrics.main([str(tmp_path), "--out", str(out), "--teams", str(team_csv), "--workers", "2"])
+    assert status == 1  # broken.json
+    assert "skipped" in capsys.readouterr().err
+
+    rows = list(csv.DictReader(out.open()))
+    assert list(rows[0]) == ["source"] + SUMMARY_FIELDS
+    team_rows = {row["source"]: row for row in csv.DictReader(team_csv.open())}
+    assert set(team_rows) == set(teams)
+    for source, players in teams.items():
+        team_pos = get_team_possessions(players)
+        expected = [{k: str(v) for k, v in summary_row(p, team_pos).items()} for p in sorted(players, key=lambda p: p.name)]
+        got = sorted(({k: v for k, v in row.items() if k != "source"} for row in rows if row["source"] == source),
+                     key=lambda r: r["name"])
+        assert got == expected
+        assert float(team_rows[source]["team_percentage"]) == calc_team_percentage(players)
@@ -0,0 +1,23 @@
+import os
+import sys
+
+from build import EXCLUDE_CANDIDATES, pyinstaller_args, unused_modules
+from startup_bench import command
+
+
+def test_fast_profile_excludes_only_untraced_modules():
+    trace = {"tkinter", "json", "multiprocessing", "numpy"}
+    excludes = unused_modules(trace)
+    assert "numpy" not in excludes and "multiprocessing" not in excludes
+    assert "unittest" in excludes and set(excludes) < set(EXCLUDE_CANDIDATES)
+
+    fast = pyinstaller_args("fast", excludes)
+    assert "--onedir" in fast and "--noupx" in fast and "--exclude-module=unittest" in fast
+    onefile = pyinstaller_args("onefile", excludes)
+    assert "--onefile" in onefile and not any(arg.startswith("--exclude-module") for arg in onefile)
+
+
+def test_bench_commands():
+    assert command("app.py") == [sys.executable, "app.py"]
+    assert command("dist/Fast.app") == [os.path.join("dist/Fast.app", "Contents", "MacOS", "Fast")]
+    assert command("dist/BasketballAnalytics") == [os.path.abspath("dist/BasketballAnalytics")]
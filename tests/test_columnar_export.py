@@ -0,0 +1,85 @@
+import pytest
+
+import columnar_export
+import compact_format
+from basketball_model import Player, get_team_possessions, summary_row
+from columnar_export import event_table, export_season, main, read_npz
+from play_by_play import PlayByPlay
+
+
+def season():
+    log = PlayByPlay()
+    ann, ben = Player("Ann"), Player.from_dict("Ben", {"shots": {"2pt": {"made": 2, "missed": 1}}, "points": 4})
+    ann.record_shot("3pt", True, when=log.stamp("G1", 1, "9:30"))
+    ann.record_shot("layup", False, True, when=log.stamp("G1", 1, "8:02"))
+    ben.record_stat("assists", when=log.stamp("G1", 2, 300))
+    log.substitute(log.stamp("G2", 1, "10:00"), players_in=["Ann"])
+    log.opponent_possession(log.stamp("G2", 1, "9:41"), points=2)
+    return [ben, ann], log.events
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_npz_columns_are_typed_and_dictionary_encoded(tmp_path, monkeypatch, use_numpy):
+    if use_numpy and columnar_export.np is None:
+        pytest.skip("numpy not installed")
+    if not use_numpy:
+        monkeypatch.setattr(columnar_export, "np", None)
+    players, events = season()
+    paths = export_season(players, events, str(tmp_path / "season"), "npz")
+    assert paths == [str(tmp_path / "season_players.npz"), str(tmp_path / "season_events.npz")]
+
+    table = read_npz(paths[0])
+    names = [table["name.categories"][code] for code in table["name.codes"]]
+    assert names == ["Ann", "Ben"]
+    assert table["points"].typecode == "q" and table["ts_pct"].typecode == "d"
+    rows = [summary_row(p, get_team_possessions(players)) for p in sorted(players, key=lambda p: p.name)]
+    assert list(table["ts_pct"]) == [row["TS%"] for row in rows]
+    assert list(table["2pt_made"]) == [0, 2] and list(table["layup_contested_missed"]) == [1, 0]
+
+    table = read_npz(paths[1])
+    assert [table["kind.categories"][c] for c in table["kind.codes"]] == [
+        "record_shot", "record_shot", "record_stat", "sub_in", "opponent",
+    ]
+    assert table["shot_type.categories"] == ["3pt", "layup", ""]
+    assert list(table["period"]) == [1, 1, 2, 1, 1] and table["period"].typecode == "h"
+    assert list(table["clock"]) == [570.0, 482.0, 300.0, 600.0, 581.0]
+    assert list(table["points"]) == [3, 0, 0, 0, 2] and list(table["assists"]) == [0, 0, 1, 0, 0]
+
+
+def test_numpy_reads_the_pure_python_npz(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    monkeypatch.setattr(columnar_export, "np", None)
+    columnar_export.write_npz(str(tmp_path / "events.npz"), event_table(season()[1]))
+    data = np.load(tmp_path / "events.npz")
+    assert data["player.categories"].tolist() == ["Ann", "Ben", ""]
+    assert data["clock"].dtype == np.float64 and data["3pt_made"].tolist() == [1, 0, 0, 0, 0]
+
+
+def test_arrow_formats(tmp_path):
+    if columnar_export.pa is None:
+        pytest.skip("pyarrow not installed")
+    import pyarrow.feather
+    import pyarrow.parquet
+
+    players, events = season()
+    paths = export_season(players, events, str(tmp_path / "season"), "parquet")
+    events_table = pyarrow.parquet.read_table(paths[1])
+    assert str(events_table.schema.field("player").type) == "dictionary<values=string, indices=int32, ordered=0>"
+    assert events_table.column("points").to_pylist() == [3, 0, 0, 0, 2]
+    paths = export_season(players, events, str(tmp_path / "season"), "arrow")
+    players_table = pyarrow.feather.read_table(paths[0], memory_map=True)
+    assert players_table.column("name").to_pylist() == ["Ann", "Ben"]
+
+
+def test_cli(tmp_path):
+    players, events = season()
+    log = PlayByPlay()
+    log.restore(events)
+    log.save(str(tmp_path / "plays.json"))
+    compact_format.save(str(tmp_path / "data.bbd"), players)
+
+    out = str(tmp_path / "out")
+    assert main([str(tmp_path / "data.bbd"), "--plays", str(tmp_path / "plays.json"), "--out", out, "--format", "npz"]) == 0
+    assert len(read_npz(out + "_events.npz")["clock"]) == 5
+    assert len(read_npz(out + "_players.npz")["name.codes"]) == 2
+    assert main([str(tmp_path / "missing.json"), "--out", out]) == 1
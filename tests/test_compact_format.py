@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+import compact_format
+from basketball_model import Player
+from compact_format import FORMAT_VERSION, MAGIC, dumps, load_team, loads, synthetic_season
+from play_by_play import flatten_counters
+from rollups import GameLine, RollupStore
+
+
+def nonzero(player):
+    return {k: v for k, v in flatten_counters(player).items() if v}
+
+
+def test_round_trip_matches_the_json_files():
+    players, rollups = synthetic_season(players=6, games=8, seed=3)
+    legacy = Player.from_dict("Old", {"shots": {"2pt": {"made": 4, "missed": 2}}, "points": 8})
+    players.append(legacy)
+    # a corrected game leaves a negative delta
+    rollups.games.append(GameLine("2026", "G9", "Player 0", {"assists": -2, "shots.layup.made": 300}))
+
+    data = dumps(players, rollups)
+    assert data.startswith(MAGIC)
+    loaded, store = loads(data)
+    assert [p.name for p in loaded] == [p.name for p in players]
+    for before, after in zip(players, loaded):
+        assert nonzero(after) == nonzero(before)
+        assert list(after.shot_locations) == list(before.shot_locations)
+    assert loaded[-1].shots["2pt"]["made"] == 4
+    assert [line.to_dict() for line in store.games] == [line.to_dict() for line in rollups.games]
+    assert store.seasons == {k: {f: v for f, v in c.items() if v} for k, c in rollups.seasons.items()}
+    assert store.careers.keys() == rollups.careers.keys()
+
+    json_size = len(json.dumps({p.name: p.to_dict() for p in players}, indent=2)) + len(json.dumps(rollups.to_dict()))
+    assert len(data) * 5 < json_size
+
+
+def test_newer_versions_and_other_files_are_rejected():
+    with pytest.raises(ValueError):
+        loads(b'{"Ann": {}}')
+    data = bytearray(dumps([Player("Ann")]))
+    data[len(MAGIC)] = FORMAT_VERSION + 1
+    with pytest.raises(ValueError, match="newer"):
+        loads(bytes(data))
+
+
+def test_load_team_upgrades_json_files(tmp_path):
+    players, rollups = synthetic_season(players=3, games=4)
+    json_path, rollups_path, compact_path = (str(tmp_path / n) for n in ("data.json", "rollups.json", "data.bbd"))
+    with open(json_path, "w", encoding="utf-8") as handle:
+        json.dump({p.name: p.to_dict() for p in players}, handle)
+    with open(rollups_path, "w", encoding="utf-8") as handle:
+        json.dump(rollups.to_dict(), handle)
+
+    store = RollupStore()
+    upgraded, same = load_team(compact_path, json_path, rollups_path, rollups=store)
+    assert same is store and len(store.games) == len(rollups.games)
+    compact_format.save(compact_path, upgraded, store)
+    assert compact_format.is_compact(compact_path) and not compact_format.is_compact(json_path)
+
+    reloaded, reloaded_store = load_team(compact_path, json_path, rollups_path)
+    assert [nonzero(p) for p in reloaded] == [nonzero(p) for p in players]
+    assert reloaded_store.row("career", "Player 1") == rollups.row("career", "Player 1")
+
+
+def test_convert_reads_the_json_source(tmp_path):
+    players, rollups = synthetic_season(players=3, games=2)
+    json_path, rollups_path, compact_path = (str(tmp_path / n) for n in ("data.json", "rollups.json", "data.bbd"))
+    with open(json_path, "w", encoding="utf-8") as handle:
+        json.dump({p.name: p.to_dict() for p in players}, handle)
+    with open(rollups_path, "w", encoding="utf-8") as handle:
+        json.dump(rollups.to_dict(), handle)
+    # a compact file sitting next to the source must not be picked up instead
+    compact_format.save(json_path + ".missing", [], RollupStore())
+
+    assert compact_format.main(["convert", json_path, compact_path, "--rollups", rollups_path]) == 0
+    converted, store = compact_format.load(compact_path)
+    assert [nonzero(p) for p in converted] == [nonzero(p) for p in players]
+    assert len(store.games) == len(rollups.games)
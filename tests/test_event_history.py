@@ -0,0 +1,88 @@
+import json
+import random
+
+from basketball_model import Player
+from event_history import SpilledHistory, SpilledLog, segment_name
+from play_by_play import PlayByPlay
+from replay import CheckpointFile, Replay
+
+
+def event(i):
+    return {"Event": "Shot", "Detail": "3pt", "Result": "Made" if i % 2 else "Missed", "n": i}
+
+
+def test_old_events_spill_to_the_segment_and_iterate_in_order(tmp_path):
+    history = SpilledHistory(str(tmp_path), "Ann O'Neil", window=8)
+    for i in range(50):
+        history.append(event(i))
+    assert len(history.recent) <= 8 and history.spilled + len(history.recent) == len(history) == 50
+    lines = (tmp_path / segment_name("Ann O'Neil")).read_text().splitlines()
+    assert len(lines) == history.spilled and json.loads(lines[0]) == event(0)
+    assert list(history) == [event(i) for i in range(50)]
+
+    # undo reaches back into the segment once memory is empty
+    popped = [history.pop() for _ in range(len(history.recent) + 3)]
+    assert [e["n"] for e in popped] == list(range(49, 49 - len(popped), -1))
+    assert list(history) == [event(i) for i in range(50 - len(popped))]
+    history.append(event(99))
+    assert list(history)[-2:] == [event(49 - len(popped)), event(99)]
+
+
+def test_restore_cuts_back_events_spilled_after_the_save(tmp_path):
+    history = SpilledHistory(str(tmp_path), "Ben", window=4)
+    for i in range(10):
+        history.append(event(i))
+    saved = json.loads(json.dumps(history.to_dict()))
+    for i in range(10, 20):  # spilled, then the app dies before saving again
+        history.append(event(i))
+
+    restored = SpilledHistory.restore(saved, str(tmp_path), "Ben", window=4)
+    assert list(restored) == [event(i) for i in range(10)]
+    restored.append(event(10))
+    assert list(restored) == [event(i) for i in range(11)]
+
+    old = SpilledHistory.restore([event(0), event(1)], str(tmp_path), "Cat", window=4)
+    assert list(old) == [event(0), event(1)] and old.spilled == 0
+    restored.discard()
+    assert not restored and not (tmp_path / segment_name("Ben")).exists()
+
+
+def test_spilled_log_replays_like_the_in_memory_log(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    spilled, memory = SpilledLog(path, window=10, block=4), PlayByPlay()
+    rng = random.Random(5)
+    for log in (spilled, memory):
+        players = [Player(f"P{i}") for i in range(3)]
+        rng.seed(5)
+        for i in range(100):
+            when = log.stamp(f"G{i // 40}", 1 + i % 40 // 10, 600 - (i % 10) * 50)
+            rng.choice(players).record_shot(rng.choice(["layup", "3pt"]), rng.random() < 0.5, when=when)
+    assert len(spilled.recent) <= 10 and len(spilled) == len(memory) == 100
+    spilled.flush()
+
+    reloaded = SpilledLog(path, window=10, block=4)
+    reloaded.load()
+    expected = [event.to_dict() for event in memory.events]
+    assert [event.to_dict() for event in reloaded.iter_events()] == expected
+    assert [event.to_dict() for event in reloaded.iter_events(37, 53)] == expected[37:53]
+
+    on_disk, in_memory = Replay(reloaded, every=8, checkpoints=CheckpointFile), Replay(memory, every=8)
+    for index in range(0, 101, 7):
+        assert on_disk.state_at(index) == in_memory.state_at(index)
+    for game, period, clock in [("G0", 2, "5:00"), ("G1", 1, "10:00"), ("G2", 4, "0:00"), ("G9", 1, "1:00")]:
+        assert on_disk.index_at(game, period, clock) == in_memory.index_at(game, period, clock)
+
+    # undo and delete rewrite the file; the replay starts over
+    last = reloaded.last_index("P1")
+    assert last == max(i for i, event in enumerate(memory.events) if event.player == "P1")
+    reloaded.delete(last)
+    memory.restore(memory.events[:last] + memory.events[last + 1:])
+    reloaded.remove_player("P2")
+    memory.remove_player("P2")
+    assert [event.to_dict() for event in reloaded.iter_events()] == [event.to_dict() for event in memory.events]
+    assert on_disk.state_at(len(memory)) == in_memory.state_at(len(memory))
+
+    with open(path, "a") as handle:
+        handle.write('{"game": "G9", "per')  # a crash mid-write
+    reloaded.load()
+    assert len(reloaded) == len(memory) and reloaded.last_index("P2") is None
@@ -0,0 +1,77 @@
+import csv
+import io
+import random
+
+import basketball_web
+from basketball_model import Player, get_team_possessions
+from leaderboards import LEADERBOARD_METRICS, LeaderboardService, metric_values
+
+
+def naive_rank(players, metric, name):
+    value = metric_values(players[name])[metric]
+    return 1 + sum(1 for p in players.values() if metric_values(p)[metric] > value)
+
+
+def test_service_matches_sorting_after_every_change():
+    rng = random.Random(9)
+    players = {f"P{i:02d}": Player(f"P{i:02d}") for i in range(25)}
+    service = LeaderboardService()
+    service.rebuild(players.values())
+    for step in range(400):
+        player = players[rng.choice(sorted(players))]
+        if rng.random() < 0.6:
+            player.record_shot(rng.choice(["layup", "midrange", "3pt"]), rng.random() < 0.5, rng.random() < 0.3)
+        else:
+            player.record_stat(rng.choice(["assists", "rebounds", "turnovers"]))
+        service.update(player)
+        if step % 50 == 0:
+            for metric in LEADERBOARD_METRICS:
+                for name in players:
+                    assert service.rank(metric, name) == naive_rank(players, metric, name)
+
+    expected = sorted(players.values(), key=lambda p: (-p.calc_per(), p.name))[:5]
+    assert [name for name, _ in service.top("PER", 5)] == [p.name for p in expected]
+    # Usage% is indexed by possessions but shown as a percentage
+    top_name, usage = service.top("Usage%", 1, get_team_possessions(players.values()))[0]
+    assert usage == players[top_name].calc_usage(get_team_possessions(players.values()))
+
+    service.remove("P00")
+    assert service.rank("PER", "P00") is None
+    assert len(service.boards["PER"]) == 24
+
+
+def test_percentile_counts_ties_as_half():
+    service = LeaderboardService(["points"])
+    for name, points in (("A", 10), ("B", 5), ("C", 5), ("D", 0)):
+        player = Player(name)
+        player.points = points
+        service.update(player)
+    assert [service.rank("points", n) for n in "ABCD"] == [1, 2, 2, 4]
+    assert [service.percentile("points", n) for n in "ABCD"] == [100.0, 50.0, 50.0, 0.0]
+
+
+def test_web_leaderboard_report_and_ranked_export(web_app):
+    client = web_app.test_client()
+    for name in ("Ann", "Ben", "Cal"):
+        client.post("/add", data={"name": name})
+    shot = {"event": "shot", "shot_type": "3pt", "made": "yes", "contested": "no"}
+    client.post("/player/Ben/event", data=shot)
+    client.post("/player/Ben/event", data=shot)
+    client.post("/player/Cal/event", data=shot)
+
+    body = client.get("/leaderboard.json?metric=points&k=2&player=Cal").get_json()
+    assert body["top"] == [{"name": "Ben", "value": 6}, {"name": "Cal", "value": 3}]
+    assert body["player"] == {"name": "Cal", "rank": 2, "percentile": 50.0}
+    assert client.get("/leaderboard.json?metric=bogus").status_code == 400
+
+    assert "1. Ben (6)" in client.get("/report").get_data(as_text=True)
+    assert "#1 (100.0 percentile)" in client.get("/player/Ben").get_data(as_text=True)
+
+    rows = list(csv.DictReader(io.StringIO(client.get("/export.csv?ranks=1").get_data(as_text=True))))
+    assert {r["name"]: r["points rank"] for r in rows} == {"Ann": "3", "Ben": "1", "Cal": "2"}
+
+    # rebuild-team-stats also rebuilds the leaderboard
+    basketball_web.db.session.execute(basketball_web.LeaderboardEntry.__table__.delete())
+    basketball_web.db.session.commit()
+    assert web_app.test_cli_runner().invoke(args=["rebuild-team-stats"]).exit_code == 0
+    assert basketball_web.leaderboard_position("points", "Ben") == (1, 100.0)
@@ -0,0 +1,81 @@
+import json
+
+from basketball_model import Player
+from legacy_import import detect_format, main, normalize_record, run_import
+
+# basketball_stats.py
+STATS = {"shots": {"2pt": {"made": 3, "missed": 1}, "3pt": {"made": 1, "missed": 2}}, "assists": 2, "turnovers": 1, "rebounds": 5, "points": 9}
+
+# basketball_app.py
+ANALYTICS = {
+    "name": "Ann",
+    "shots": {
+        "layup": {"made": 2, "missed": 1, "contested_made": 1, "contested_missed": 0},
+        "midrange": {"made": 0, "missed": 0, "contested_made": 0, "contested_missed": 0},
+        "3pt": {"made": 1, "missed": 3, "contested_made": 0, "contested_missed": 2},
+    },
+    "points": 9,
+    "strike_zone": {"balls": {"total": 3, "made": 1, "missed": 2}, "strikes": {"total": 1, "made": 0, "missed": 1}},
+    "cuts": {"total": 2, "pass_to_cutter": 1, "made_shot": 1, "missed_shot": 1},
+    "paint_touches": {"total": 3, "made": 1, "missed": 1, "kick": 1},
+    "defense": {"contested": {"made": 1, "missed": 2}, "uncontested": {"made": 0, "missed": 4}},
+    "event_history": [{"event": "shot"}, {"event": "cut"}],
+    "games_played": 4,
+}
+
+
+def app_record(name):
+    player = Player(name)
+    player.record_shot("layup", True, x=0.5, y=6.0)
+    player.record_strike_pass("ball", "made")
+    player.record_stat("assists")
+    payload = player.to_dict()
+    payload["shots"]["2pt"] = {"made": 0, "missed": 0, "contested_made": 0, "contested_missed": 0}  # stray entry
+    return payload
+
+
+def test_formats_normalize_to_the_canonical_shape():
+    assert [detect_format(p) for p in (STATS, ANALYTICS, app_record("Ben"))] == ["stats", "analytics", "app"]
+
+    _, ann = normalize_record("Ann", ANALYTICS)
+    assert set(ann["shots"]) == {"layup", "3pt"}
+    assert ann["strike_zone"] == {"balls": 3, "strikes": 1, "ball_made": 1, "ball_missed": 2, "strike_made": 0, "strike_missed": 1}
+    assert ann["paint_touches"] == {"total": 3, "made_shot": 1, "missed_shot": 1, "kick_out": 1}
+    assert ann["defense"]["uncontested_missed"] == 4 and ann["points"] == 9
+    assert "event_history" not in ann and "games_played" not in ann
+
+    _, ben = normalize_record("Ben", app_record("Ben"))
+    assert "2pt" not in ben["shots"]
+    expected = Player.from_dict("Ben", app_record("Ben")).to_dict()
+    del expected["shots"]["2pt"]
+    assert ben == expected
+    for payload in (STATS, ANALYTICS):
+        _, record = normalize_record("X", payload)
+        assert Player.from_dict("X", record).to_dict() == record
+
+
+def test_import_merges_files(tmp_path):
+    first = tmp_path / "2023.json"
+    first.write_text(json.dumps({"Ann": ANALYTICS, "Cat": STATS}))
+    second = tmp_path / "2024.json"
+    second.write_text(json.dumps({"Ann": dict(STATS, points=4), "Ben": app_record("Ben"), "Bad": {"assists": -1}}))
+    (tmp_path / "broken.json").write_text('{"Dan": ')
+
+    players, report = run_import([str(first), str(second), str(tmp_path / "broken.json")], workers=2)
+    assert list(players) == ["Ann", "Cat", "Ben"]
+    assert report["formats"] == {"analytics": 1, "stats": 2, "app": 1, "skipped": 1}
+    assert (report["records"], report["merged"], report["history_events"]) == (4, 1, 2)
+    assert [path for path, _ in report["errors"]] == [str(tmp_path / "broken.json")]
+    ann = players["Ann"]
+    assert ann["points"] == 13 and ann["shots"]["2pt"]["made"] == 3 and ann["shots"]["layup"]["made"] == 2
+
+    kept, _ = run_import([str(first), str(second)], workers=1, on_duplicate="last")
+    assert kept["Ann"]["points"] == 4 and kept["Ann"]["strike_zone"]["balls"] == 0
+
+    out = tmp_path / "merged.json"
+    assert main([str(tmp_path / "20*.json"), "--out", str(out)]) == 0
+    data = json.loads(out.read_text())
+    assert set(data) == {"Ann", "Ben", "Cat"}
+    ben = Player.from_dict("Ben", data["Ben"])
+    assert len(ben.shot_locations) == 1 and ben.strike_zone["ball_made"] == 1
+    assert main([str(tmp_path), "--out", str(out)]) == 1  # broken.json
@@ -0,0 +1,130 @@
+import itertools
+import random
+
+from basketball_model import Player
+from lineups import LineupIndex, lineup_report, possessions_used
+from play_by_play import OPPONENT, SUB_IN, SUB_OUT, PlayByPlay
+
+ROSTER = [f"P{i}" for i in range(10)]
+
+
+def play_season(log, rng, games=6, events=150, index=None):
+    players = {name: Player(name) for name in ROSTER}
+    for game in range(games):
+        game_id = f"g{game}"
+        on_floor = set(rng.sample(ROSTER, 5))
+        log.substitute(log.stamp(game_id, 1, 600), sorted(on_floor))
+        for step in range(events):
+            period = 1 + step * 4 // events
+            clock = 600 - (step * 4 % events) * 600 // events
+            when = log.stamp(game_id, period, clock)
+            pick = rng.random()
+            if pick < 0.1:
+                out = rng.choice(sorted(on_floor))
+                into = rng.choice(sorted(set(ROSTER) - on_floor))
+                log.substitute(when, [into], [out])
+                on_floor = on_floor - {out} | {into}
+            elif pick < 0.5:
+                log.opponent_possession(when, rng.choice([0, 0, 2, 2, 3]))
+            else:
+                player = players[rng.choice(sorted(on_floor))]
+                player.record_shot(rng.choice(["layup", "3pt"]), rng.random() < 0.5, when=when)
+            if index is not None and rng.random() < 0.2:
+                index.sync()  # fold in as the game goes, like the app does
+
+
+def naive_totals(log):
+    """Walk every game in clock order and add each event to its five's totals."""
+    lineups = {}
+    ordered = sorted(log.events, key=lambda e: (e.game_id, log.position(e.period, e.clock)))
+    on_floor = {}
+    for event in ordered:
+        current = on_floor.setdefault(event.game_id, set())
+        if event.kind == SUB_IN:
+            current.add(event.player)
+            continue
+        if event.kind == SUB_OUT:
+            current.discard(event.player)
+            continue
+        totals = lineups.setdefault(frozenset(current), [0, 0, 0, 0])
+        if event.kind == OPPONENT:
+            totals[1] += event.delta["points"]
+            totals[3] += 1
+        else:
+            totals[0] += event.delta.get("points", 0)
+            totals[2] += possessions_used(event.delta)
+    return lineups
+
+
+def as_tuple(totals):
+    return [totals.points_for, totals.points_against, totals.off_possessions, totals.def_possessions]
+
+
+def test_lineups_combos_and_on_off_match_a_naive_walk():
+    log = PlayByPlay()
+    index = LineupIndex(log)
+    play_season(log, random.Random(11), index=index)
+    expected = naive_totals(log)
+
+    for five, totals in expected.items():
+        assert as_tuple(index.lineup(sorted(five))) == totals
+
+    for size in (1, 2, 3):
+        combos = {}
+        for five, totals in expected.items():
+            for combo in itertools.combinations(sorted(five), size):
+                acc = combos.setdefault(combo, [0, 0, 0, 0])
+                for i in range(4):
+                    acc[i] += totals[i]
+        best = index.best_combos(size, limit=len(combos) + 1)
+        assert {names: as_tuple(t) for names, t in best} == combos
+        ratings = [t.net_rating() for _, t in best]
+        assert ratings == sorted(ratings, reverse=True)
+
+    team = [sum(t[i] for t in expected.values()) for i in range(4)]
+    split = index.on_off("P3")
+    on = [sum(t[i] for five, t in expected.items() if "P3" in five) for i in range(4)]
+    assert as_tuple(split["on"]) == on
+    assert as_tuple(split["off"]) == [a - b for a, b in zip(team, on)]
+
+
+def test_late_substitution_and_undo_rebuild():
+    log = PlayByPlay()
+    index = LineupIndex(log)
+    ann = Player("Ann")
+    log.substitute(log.stamp("g1", 1, 600), ["Ann"])
+    ann.record_shot("3pt", True, when=log.stamp("g1", 1, 300))
+    assert index.lineup(["Ann"]).points_for == 3
+
+    # Scorer enters a sub that happened before the shot: Ben was on, not Ann
+    saved = log.snapshot()
+    log.substitute(log.stamp("g1", 1, 400), ["Ben"], ["Ann"])
+    assert index.lineup(["Ann"]).points_for == 0
+    assert index.lineup(["Ben"]).points_for == 3
+    assert index.on_floor("g1") == ("Ben",)
+
+    log.restore(saved)
+    assert index.lineup(["Ann"]).points_for == 3
+    assert "BEST 3-MAN COMBOS" in lineup_report(index)
+
+
+def test_defensive_counters_are_credited_to_the_lineup_on_the_floor():
+    log = PlayByPlay()
+    index = LineupIndex(log)
+    ann, ben = Player("Ann"), Player("Ben")
+    log.substitute(log.stamp("g1", 1, 600), ["Ann", "Ben"])
+    ann.record_paint_touch("made", when=log.stamp("g1", 1, 590))
+    ben.record_paint_touch("kick", when=log.stamp("g1", 1, 580))
+    ben.record_defense(True, False, when=log.stamp("g1", 1, 570))
+    ann.record_defense(False, True, when=log.stamp("g1", 1, 560))
+    ann.record_shot("3pt", True, contested=True, when=log.stamp("g1", 1, 550))
+    ben.record_shot("layup", False, contested=True, when=log.stamp("g1", 1, 540))
+    log.substitute(log.stamp("g1", 1, 500), [], ["Ben"])
+    ann.record_defense(True, True, when=log.stamp("g1", 1, 450))
+
+    ben_on = index.on_off("Ben")["on"]
+    assert ben_on.paint_touches_allowed() == (2, 1)
+    assert ben_on.contest_outcomes() == {"contested": (0, 1), "uncontested": (1, 0), "own contested": (1, 1)}
+    assert index.on_off("Ann")["on"].contest_outcomes()["contested"] == (1, 1)
+    report = lineup_report(index)
+    assert "paint touches allowed 2 (1 scored)" in report and "vs contested D 0/1" in report
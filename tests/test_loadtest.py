@@ -0,0 +1,34 @@
+import json
+
+import loadtest
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert loadtest.percentile(values, 50) == 50
+    assert loadtest.percentile(values, 95) == 95
+    assert loadtest.percentile(values, 99) == 99
+    assert loadtest.percentile([7], 99) == 7
+    assert loadtest.percentile([], 50) == 0.0
+
+
+def test_short_run_against_local_server(tmp_path):
+    base_url, server = loadtest.serve_local()
+    try:
+        summary = loadtest.run_load(
+            base_url, scorekeepers=2, viewers=2, duration=1.0, players_per_team=2,
+            scorekeeper_think=0.01, viewer_think=0.01, seed=3,
+        )
+    finally:
+        server.shutdown()
+
+    assert summary["total"]["errors"] == 0
+    assert summary["routes"]["add_player"]["requests"] == 4
+    assert {"player_event", "player_page", "index", "report"} <= set(summary["routes"])
+    for stats in summary["routes"].values():
+        assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+
+    out = tmp_path / "run.json"
+    out.write_text(json.dumps(summary))
+    table = loadtest.format_table(summary, baseline=json.loads(out.read_text()))
+    assert "TOTAL" in table and "+0.0%" in table
@@ -0,0 +1,91 @@
+from name_index import NameIndex, fold, main
+
+
+def test_fold_ignores_case_accents_and_punctuation():
+    assert fold("  José O'Neil-Smith ") == "jose o neil smith"
+    assert fold("Müller") == fold("MULLER")
+
+
+def test_search_prefers_whole_name_then_later_words():
+    names = NameIndex(["Ann Lee", "Mary Ann Cho", "Annika Berg", "Ben Ng", "José O'Neil"])
+    assert names.search("ann") == ["Ann Lee", "Annika Berg", "Mary Ann Cho"]
+    assert names.search("ANN L") == ["Ann Lee"]
+    assert names.search("ne") == ["José O'Neil"]
+    assert names.search("jose") == ["José O'Neil"]
+    assert names.search("ann", limit=2) == ["Ann Lee", "Annika Berg"]
+    assert names.search("") == ["Ann Lee", "Annika Berg", "Ben Ng", "José O'Neil", "Mary Ann Cho"]
+    assert names.search("zz") == []
+
+
+def test_search_falls_back_to_trigrams_for_typos():
+    names = NameIndex(["John Smith", "Jane Doe", "Smitty Lane"])
+    assert names.search("smiht")[0] == "John Smith"
+    assert "Jane Doe" not in names.search("smiht")
+    assert names.search("sm") == ["Smitty Lane", "John Smith"]  # short queries never go fuzzy
+
+
+def test_duplicates_catch_reordering_and_near_misses():
+    names = NameIndex(["John Smith", "Ann Lee", "Johanna Smithers"])
+    assert names.duplicates("Smith, John") == ["John Smith"]
+    assert names.duplicates("Jon Smith") == ["John Smith"]
+    assert names.duplicates("ann  LEE") == ["Ann Lee"]
+    assert names.duplicates("Ben Ng") == []
+    assert names.duplicates("Jon Smith", ignore="John Smith") == []
+    assert names.duplicates("John Smith") == []  # a name isn't its own duplicate
+
+
+def test_add_remove_rename_and_sync_keep_every_index_in_step():
+    names = NameIndex(["Ann Lee"])
+    names.add("Ben Ng")
+    names.rename("Ann Lee", "Anna Lee")
+    assert "Ann Lee" not in names and "Anna Lee" in names
+    assert names.search("lee") == ["Anna Lee"]
+    names.remove("Ben Ng")
+    assert names.search("ng") == [] and names.duplicates("Ben Ng") == []
+    assert names.sync(["Anna Lee", "Cal Cho"]) == 1
+    assert len(names) == 2 and names.search("c") == ["Cal Cho"]
+    assert names.sync(["Anna Lee", "Cal Cho"]) == 0
+
+
+def test_bench_runs(capsys):
+    assert main(["bench", "--names", "300", "--queries", "20"]) == 0
+    assert "search_mean_ms" in capsys.readouterr().out
+
+
+def test_web_search_and_similar_name_warning(web_app):
+    client = web_app.test_client()
+    for name in ("Ann Lee", "John Smith", "Mary Ann Cho"):
+        client.post("/add", data={"name": name})
+    client.get("/")  # shows (and clears) the "Added ..." messages
+    assert client.get("/players/search.json?q=ann").get_json()["players"] == ["Ann Lee", "Mary Ann Cho"]
+    page = client.get("/?q=smiht").get_data(as_text=True)
+    assert "John Smith" in page and "Ann Lee" not in page
+
+    warned = client.post("/add", data={"name": "Jon Smith"}, follow_redirects=True).get_data(as_text=True)
+    assert "looks like John Smith" in warned
+    assert "Jon Smith" not in client.get("/players/search.json?q=jon").get_json()["players"]
+    client.post("/add", data={"name": "Jon Smith", "allow_similar": "1"})
+    assert client.get("/players/search.json?q=jo").get_json()["players"] == ["John Smith", "Jon Smith"]
+
+
+def test_web_index_follows_roster_changes_from_other_workers(web_app):
+    import basketball_web
+    from basketball_model import Player
+
+    client = web_app.test_client()
+    client.post("/add", data={"name": "Ann Lee"})
+    assert client.get("/players/search.json?q=").get_json()["players"] == ["Ann Lee"]
+    before = basketball_web.team_aggregate().roster_version
+
+    # another worker adds a player; a restore rebuilds team_stats
+    record = basketball_web.PlayerRecord(name="Ben Ng")
+    record.update_from(Player("Ben Ng"))
+    basketball_web.db.session.add(record)
+    basketball_web.apply_team_change(None, Player("Ben Ng"))
+    basketball_web.db.session.commit()
+    assert client.get("/players/search.json?q=ng").get_json()["players"] == ["Ben Ng"]
+    basketball_web.db.session.delete(basketball_web.db.session.get(basketball_web.PlayerRecord, "Ann Lee"))
+    basketball_web.rebuild_team_aggregate()
+    basketball_web.db.session.commit()
+    assert basketball_web.team_aggregate().roster_version == before + 2
+    assert client.get("/players/search.json?q=").get_json()["players"] == ["Ben Ng"]
@@ -0,0 +1,99 @@
+import random
+
+from basketball_model import Player
+from play_by_play import PlayByPlay, parse_clock
+
+
+def record_random_game(log, players, game_id, rng, events=200):
+    """Record shuffled events; the clock is not monotonic, like late scorer entries."""
+    for _ in range(events):
+        player = rng.choice(players)
+        when = log.stamp(game_id, rng.randint(1, 5), rng.randint(0, 600) if rng.random() < 0.95 else "0:00")
+        pick = rng.random()
+        if pick < 0.5:
+            player.record_shot(rng.choice(["layup", "midrange", "3pt"]), rng.random() < 0.45,
+                               rng.random() < 0.3, when=when)
+        elif pick < 0.8:
+            player.record_stat(rng.choice(["assists", "rebounds", "turnovers"]), when=when)
+        else:
+            player.record_cut(rng.choice(["pass", "made", "missed"]), when=when)
+
+
+def naive_window(log, name, start, end, game_id=None):
+    totals = {}
+    for event in log.events:
+        if event.player != name or (game_id is not None and event.game_id != str(game_id)):
+            continue
+        if start <= log.position(event.period, event.clock) <= end:
+            for field, amount in event.delta.items():
+                totals[field] = totals.get(field, 0) + amount
+    return {k: v for k, v in totals.items() if v}
+
+
+def test_windows_match_a_full_rescan():
+    rng = random.Random(3)
+    log = PlayByPlay()
+    players = [Player(f"P{i}") for i in range(4)]
+    for game_id in ("g1", "g2", "g3"):
+        record_random_game(log, players, game_id, rng)
+
+    for player in players:
+        name = player.name
+        for period in range(1, 6):
+            start = log.position(period, log.period_length(period))
+            end = log.position(period, 0)
+            assert log.period_totals(name, period) == naive_window(log, name, start, end)
+            assert log.period_totals(name, period, "g2") == naive_window(log, name, start, end, "g2")
+        second_half = naive_window(log, name, log.position(3, 600), log.position(4, 0))
+        assert log.half_totals(name, 2) == second_half
+        clutch = naive_window(log, name, log.position(4, 300), log.position(4, 0), "g1")
+        assert log.clock_range(name, 4, "5:00", game_id="g1") == clutch
+
+        # Every event lands in exactly one period, so the periods add back up to the lifetime totals
+        whole = log.window(name, 0, log.position(5, 0))
+        window_player = log.as_player(name, whole)
+        assert window_player.points == player.points
+        assert window_player.total_shots() == player.total_shots()
+        assert window_player.calc_ts() == player.calc_ts()
+
+
+def test_buzzer_and_tipoff_stay_in_their_own_quarter():
+    log = PlayByPlay()
+    ann = Player("Ann")
+    ann.record_shot("3pt", True, when=log.stamp("g1", 1, "0:00"))
+    ann.record_shot("layup", True, when=log.stamp("g1", 2, "10:00"))
+    assert log.period_totals("Ann", 1)["points"] == 3
+    assert log.period_totals("Ann", 2)["points"] == 2
+
+
+def test_unstamped_calls_are_not_logged_and_undo_restores():
+    log = PlayByPlay()
+    ann = Player("Ann")
+    ann.record_stat("assists")
+    assert len(log) == 0 and ann.assists == 1
+
+    ann.record_stat("assists", when=log.stamp("g1", 1, 500))
+    saved = log.snapshot()
+    ann.record_stat("rebounds", when=log.stamp("g1", 1, 400))
+    log.rename_player("Ann", "Anna")
+    assert log.players() == ["Anna"]
+    log.restore(saved)
+    assert log.players() == ["Ann"]
+    assert log.period_totals("Ann", 1) == {"assists": 1}
+
+
+def test_round_trip_and_legacy_player_variant(tmp_path):
+    import basketball_app
+
+    log = PlayByPlay()
+    legacy = basketball_app.Player("Ben")
+    legacy.add_defense(True, False, when=log.stamp("g1", 3, "4:10"))
+    legacy.add_strike_zone_pass(True, when=log.stamp("g1", 4, 30))
+    assert legacy.event_history == []  # vars(player) must stay JSON-safe
+
+    path = tmp_path / "plays.json"
+    log.save(path)
+    loaded = PlayByPlay.load(path)
+    assert loaded.period_totals("Ben", 3) == {"defense.contested.missed": 1}
+    assert loaded.clock_range("Ben", 4, 60)["points"] == 2
+    assert parse_clock("7:32") == 452.0
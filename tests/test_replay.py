@@ -0,0 +1,76 @@
+import random
+
+from basketball_model import Player
+from play_by_play import PlayByPlay, flatten_counters
+from replay import Replay, set_counters
+
+
+def fold(events, base=None):
+    state = {name: dict(counters) for name, counters in (base or {}).items()}
+    for event in events:
+        if event.kind in ("sub_in", "sub_out", "opponent"):
+            continue
+        counters = state.setdefault(event.player, {})
+        for field, amount in event.delta.items():
+            counters[field] = counters.get(field, 0) + amount
+    return state
+
+
+def play_games(log, players, rng, games=3, events=40):
+    for game in range(games):
+        clock = 600.0
+        for _ in range(events):
+            clock = max(0.0, clock - rng.uniform(0, 60))
+            period = 1 + (600 - clock) // 150
+            when = log.stamp(f"G{game}", int(period), clock)
+            player = rng.choice(players)
+            pick = rng.random()
+            if pick < 0.6:
+                player.record_shot(rng.choice(["layup", "midrange", "3pt"]), rng.random() < 0.45, when=when)
+            elif pick < 0.9:
+                player.record_stat(rng.choice(["assists", "rebounds", "turnovers"]), when=when)
+            else:
+                log.opponent_possession(when, points=2)
+
+
+def test_state_at_every_index_matches_a_full_fold():
+    rng = random.Random(4)
+    log = PlayByPlay()
+    players = [Player(f"P{i}") for i in range(5)]
+    replay = Replay(log, every=16)
+    play_games(log, players, rng, games=2)
+    assert len(replay) == len(log.events) and len(replay.checkpoints) == 1 + len(log.events) // 16
+    for index in range(len(log.events) + 1):
+        assert replay.state_at(index) == fold(log.events[:index])
+    assert replay.state_at(len(log)) == {p.name: {k: v for k, v in flatten_counters(p).items() if v} for p in players}
+
+    # appended events are folded in; rewritten ones start over
+    play_games(log, players, rng, games=1)
+    assert replay.state_at(len(log)) == fold(log.events)
+    log.restore(log.events[:-5])
+    assert replay.state_at(len(log)) == fold(log.events) and len(replay) == len(log.events)
+
+
+def test_from_totals_and_clock_lookup():
+    log = PlayByPlay()
+    ann = Player.from_dict("Ann", {"points": 10, "assists": 3})  # recorded before the log existed
+    ann.record_shot("3pt", True, when=log.stamp("G1", 1, "9:00"))
+    ann.record_stat("assists", when=log.stamp("G1", 2, "5:00"))
+    ann.record_shot("layup", True, when=log.stamp("G1", 1, "2:00"))  # entered late
+    ann.record_shot("layup", False, when=log.stamp("G2", 1, "9:00"))
+    replay = Replay.from_totals(log, {"Ann": flatten_counters(ann)}, every=2)
+    assert replay.base == {"Ann": {"points": 10, "assists": 3}}
+    assert replay.state_at(0)["Ann"] == {"points": 10, "assists": 3}
+
+    assert replay.index_at("G1", 1, "10:00") == 0
+    assert replay.state_at_clock("G1", 1, "5:00")["Ann"]["points"] == 13
+    # the late layup counts from when it was entered, after the 2nd-period assist
+    assert replay.index_at("G1", 2, "6:00") == 1 and replay.index_at("G1", 2, "0:00") == 3
+    assert replay.index_at("G2", 1, "10:00") == 3 and replay.index_at("G9", 1, "1:00") == 4
+
+    fresh = Player("Ann")
+    set_counters(fresh, replay.state_at(2)["Ann"])
+    assert (fresh.points, fresh.assists, fresh.shots["3pt"]["made"]) == (13, 4, 1)
+    nested = {"strike_zone": {"balls": {"total": 5, "made": 2}}, "points": 4}
+    set_counters(nested, {"strike_zone.balls.made": 1})
+    assert nested == {"strike_zone": {"balls": {"total": 0, "made": 1}}, "points": 0}
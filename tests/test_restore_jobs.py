@@ -0,0 +1,143 @@
+import io
+import json
+import os
+
+import pytest
+
+import basketball_web
+import restore_jobs
+
+
+DATA_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data.json")
+
+
+def test_iter_json_object_matches_json_load():
+    with open(DATA_JSON, encoding="utf-8") as handle:
+        expected = json.load(handle)
+    with open(DATA_JSON, encoding="utf-8") as handle:
+        # Tiny chunks force members and numbers to straddle reads
+        parsed = dict(restore_jobs.iter_json_object(handle, chunk_size=7))
+    assert parsed == expected
+
+
+@pytest.mark.parametrize("text", ['{"a": 1', '[1, 2]', '{"a" 1}', '{"a": {"b": }'])
+def test_iter_json_object_rejects_bad_input(text):
+    with pytest.raises(ValueError):
+        list(restore_jobs.iter_json_object(io.StringIO(text), chunk_size=2))
+
+
+class _Reads(io.StringIO):
+    def __init__(self, text):
+        super().__init__(text)
+        self.chars = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.chars += len(chunk)
+        return chunk
+
+
+def test_iter_json_object_stops_reading_at_a_corrupt_member():
+    handle = _Reads('{"A": {"points": 4,, "rebounds": 1}, ' + '"B": {"points": 1}, ' * 5000 + '"C": {}}')
+    with pytest.raises(ValueError):
+        list(restore_jobs.iter_json_object(handle, chunk_size=16))
+    assert handle.chars < 200
+
+
+def test_iter_json_object_reads_a_long_member_in_few_decodes():
+    text = json.dumps({"A": {"shot_locations": "x" * 200_000}, "B": {"points": [1] * 20_000}})
+    handle = _Reads(text)
+    assert dict(restore_jobs.iter_json_object(handle, chunk_size=16)) == json.loads(text)
+
+
+def test_finished_jobs_are_pruned(monkeypatch):
+    monkeypatch.setattr(restore_jobs, "_JOBS", {})
+    monkeypatch.setattr(restore_jobs, "MAX_FINISHED_JOBS", 3)
+    jobs = [restore_jobs.new_job() for _ in range(5)]
+    for job in jobs[:4]:
+        job.finish("done")
+    restore_jobs.new_job()
+    # the running job stays, only the newest three finished ones are kept
+    assert restore_jobs.get_job(jobs[0].id) is None
+    assert [restore_jobs.get_job(job.id) is job for job in jobs[1:]] == [True] * 4
+    jobs[1].finished_at -= restore_jobs.JOB_TTL_SECONDS + 1
+    restore_jobs.new_job()
+    assert restore_jobs.get_job(jobs[1].id) is None
+    assert restore_jobs.get_job(jobs[4].id) is jobs[4]
+
+
+def test_validate_player():
+    assert restore_jobs.validate_player("A", {"points": 4, "shots": {"3pt": {"made": 1}}}) is None
+    assert restore_jobs.validate_player("A", {"points": "4"}) == "points must be a whole number"
+    assert restore_jobs.validate_player("A", {"cuts": {"total": -1}}) == "cuts.total must be a whole number"
+    assert restore_jobs.validate_player(" ", {}) == "empty name"
+
+
+def test_restore_upload_runs_as_job(web_app):
+    backup = {f"P{i}": {"points": i, "assists": 1, "shots": {"layup": {"made": i, "missed": 0}}} for i in range(1203)}
+    backup["Broken"] = {"assists": "lots"}
+    client = web_app.test_client()
+    client.post("/add", data={"name": "Old Player"})
+
+    response = client.post(
+        "/restore",
+        data={"file": (io.BytesIO(json.dumps(backup).encode()), "data.json")},
+        content_type="multipart/form-data",
+        headers={"Accept": "application/json"},
+    )
+    assert response.status_code == 202
+    job = restore_jobs.get_job(response.get_json()["id"])
+    assert job.wait(30)
+
+    status = client.get(f"/restore/{job.id}").get_json()
+    assert status["status"] == "done"
+    assert status["percent"] == 100.0
+    assert status["inserted"] == 1203 and status["skipped"] == 1
+    assert status["errors"] == ["Broken: assists must be a whole number"]
+    names = {p.name for p in basketball_web.load_players()}
+    assert "Old Player" not in names and len(names) == 1203
+    assert basketball_web.team_aggregate().players == 1203
+
+
+def test_failed_restore_keeps_existing_players(web_app):
+    client = web_app.test_client()
+    client.post("/add", data={"name": "Keeper"})
+    response = client.post(
+        "/restore",
+        data={"file": (io.BytesIO(b'{"A": {"points": 2}, "B": '), "data.json")},
+        content_type="multipart/form-data",
+        headers={"Accept": "application/json"},
+    )
+    job = restore_jobs.get_job(response.get_json()["id"])
+    assert job.wait(30)
+    assert job.status == "failed"
+    assert [p.name for p in basketball_web.load_players()] == ["Keeper"]
+
+
+def test_any_worker_can_answer_a_restore_poll(web_app, monkeypatch):
+    client = web_app.test_client()
+    response = client.post(
+        "/restore",
+        data={"file": (io.BytesIO(json.dumps({"A": {"points": 2}}).encode()), "data.json")},
+        content_type="multipart/form-data",
+        headers={"Accept": "application/json"},
+    )
+    job = restore_jobs.get_job(response.get_json()["id"])
+    assert job.wait(30)
+    mine = client.get(f"/restore/{job.id}").get_json()
+    assert mine["status"] == "done" and mine["inserted"] == 1
+
+    # another worker process has no RestoreJob object, only the table
+    monkeypatch.setattr(restore_jobs, "_JOBS", {})
+    assert client.get(f"/restore/{job.id}").get_json() == mine
+    assert f"/restore/{job.id}" in client.get(f"/restore?job={job.id}").get_data(as_text=True)
+    assert client.get("/restore/nope").status_code == 404
+
+
+def test_restore_reports_progress_per_batch(web_app, tmp_path):
+    path = tmp_path / "backup.json"
+    path.write_text(json.dumps({f"P{i}": {"points": i} for i in range(5)}), encoding="utf-8")
+    changes = []
+    job = restore_jobs.RestoreJob(on_change=lambda j: changes.append((j.status, j.inserted)))
+    restore_jobs.restore_players(job, str(path), basketball_web.db.session, basketball_web.PlayerRecord.__table__, batch_size=2)
+    assert changes == [("running", 0), ("running", 2), ("running", 4), ("done", 5)]
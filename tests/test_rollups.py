@@ -0,0 +1,128 @@
+import random
+
+import pytest
+
+from basketball_model import Player
+from play_by_play import flatten_counters
+from rollups import GAMES, TEAM_ROLLUP, RollupStore, rebuild_rollups, rollup_row
+
+
+def play(player, rng, events):
+    for _ in range(events):
+        pick = rng.random()
+        if pick < 0.6:
+            player.record_shot(rng.choice(["layup", "midrange", "3pt"]), rng.random() < 0.45, rng.random() < 0.3)
+        elif pick < 0.8:
+            player.record_stat(rng.choice(["assists", "rebounds", "turnovers"]))
+        else:
+            player.record_cut(rng.choice(["pass", "made", "missed"]))
+
+
+def play_seasons(rng, store):
+    players = [Player(f"P{i}") for i in range(6)]
+    history = []  # (season, game, name, counters) for the naive recompute
+    for season in ("2024", "2025", "2026"):
+        for game in range(8):
+            before = {p.name: flatten_counters(p) for p in players}
+            for player in rng.sample(players, rng.randint(0, 6)):  # some games a player sits out
+                play(player, rng, rng.randint(1, 12))
+            store.close_game(season, f"G{game}", players)
+            for p in players:
+                after = flatten_counters(p)
+                delta = {k: v - before[p.name].get(k, 0) for k, v in after.items() if v != before[p.name].get(k, 0)}
+                if delta:
+                    history.append((season, f"G{game}", p.name, delta))
+            store = RollupStore.from_dict(store.to_dict())  # saved and reloaded between games
+    return players, history, store
+
+
+def naive(history):
+    seasons, careers, team_games = {}, {}, {}
+    for season, game, name, delta in history:
+        for key, bucket in (((season, name), seasons), (name, careers),
+                            ((season, TEAM_ROLLUP), seasons), (TEAM_ROLLUP, careers)):
+            total = bucket.setdefault(key, {})
+            for field, amount in delta.items():
+                total[field] = total.get(field, 0) + amount
+        team_games.setdefault(season, set()).add(game)
+        for key, bucket in (((season, name), seasons), (name, careers)):
+            bucket[key][GAMES] = bucket[key].get(GAMES, 0) + 1
+    for season, games in team_games.items():
+        seasons[(season, TEAM_ROLLUP)][GAMES] = len(games)
+    careers[TEAM_ROLLUP][GAMES] = sum(len(g) for g in team_games.values())
+    return seasons, careers
+
+
+def strip_zeros(rollups):
+    return {key: {f: v for f, v in counters.items() if v} for key, counters in rollups.items()}
+
+
+def test_incremental_rollups_match_naive_and_parallel_rebuild():
+    players, history, store = play_seasons(random.Random(4), RollupStore())
+    seasons, careers = naive(history)
+    assert store.seasons == strip_zeros(seasons)
+    assert store.careers == strip_zeros(careers)
+
+    # a player's career is their totals at the last close
+    for player in players:
+        career = dict(store.careers.get(player.name, {}))
+        career.pop(GAMES, None)
+        assert career == {k: v for k, v in flatten_counters(player).items() if v}
+
+    for workers, mode in ((1, "process"), (3, "thread"), (2, "process")):
+        assert rebuild_rollups(store.games, workers, mode) == (store.seasons, store.careers)
+
+    report = store.report("season", "2025")
+    assert report[-1]["name"] == "TEAM" and report[-1]["games"] == seasons[("2025", TEAM_ROLLUP)][GAMES]
+    assert report[-1]["points"] == sum(r["points"] for r in report[:-1])
+    assert store.row("career", "P1") == rollup_row("P1", careers["P1"])
+    assert store.row("game", TEAM_ROLLUP, "2024", "G0")["games"] == 1
+
+
+def test_close_rename_and_remove():
+    store = RollupStore()
+    ann = Player("Ann")
+    ann.record_shot("3pt", True)
+    store.close_game("2026", "G1", [ann])
+    with pytest.raises(ValueError):
+        store.close_game("2026", "G1", [ann])
+    assert store.close_game("2026", "G2", [ann]) == []  # nothing new recorded
+    ann.record_shot("layup", True)
+    store.close_game("2026", "G2", [ann])
+    assert store.row("season", "Ann", "2026")["PPG"] == 2.5
+
+    store.rename_player("Ann", "Anne")
+    assert store.row("career", "Anne")["points"] == 5
+    store.remove_player("Anne")
+    assert store.report("career") == []
+
+
+def test_web_rollups(web_app):
+    import basketball_web
+
+    client = web_app.test_client()
+    for name in ("Ann", "Ben"):
+        client.post("/add", data={"name": name})
+    shot = {"event": "shot", "shot_type": "3pt", "made": "yes", "contested": "no"}
+    client.post("/player/Ann/event", data=shot)
+    client.post("/games/close", data={"game": "G1", "season": "2025"})
+    client.post("/player/Ann/event", data=shot)
+    client.post("/player/Ben/event", data=dict(shot, shot_type="layup"))
+    client.post("/games/close", data={"game": "G1", "season": "2026"})
+    client.post("/games/close", data={"game": "G1", "season": "2026"})  # already closed: ignored
+
+    body = client.get("/rollups.json?level=career").get_json()
+    rows = {row["name"]: row for row in body["rows"]}
+    assert body["seasons"] == ["2025", "2026"]
+    assert (rows["Ann"]["games"], rows["Ann"]["points"]) == (2, 6)
+    assert (rows["TEAM"]["games"], rows["TEAM"]["points"]) == (2, 8)
+    latest = client.get("/rollups.json").get_json()
+    assert latest["season"] == "2026" and [r["name"] for r in latest["rows"]] == ["Ann", "Ben", "TEAM"]
+    assert client.get("/rollups.json?player=Nobody").status_code == 404
+
+    before = client.get("/rollups.json?level=career").get_json()
+    assert basketball_web.rebuild_rollup_table(workers=2, mode="thread") == 3
+    basketball_web.db.session.commit()
+    assert client.get("/rollups.json?level=career").get_json() == before
+    assert b"Career" in client.get("/player/Ann").data
+    assert b"Seasons" in client.get("/report").data
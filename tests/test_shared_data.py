@@ -0,0 +1,96 @@
+import pytest
+
+import shared_data
+from basketball_model import Player
+from play_by_play import PlayByPlay, event_lines, parse_event_lines
+from shared_data import DataLock, SharedFiles, merge_appends, merge_by_name, merge_players, prefer_changed
+
+
+def test_players_merge_adds_up_both_sides():
+    base = {"Ann": Player.from_dict("Ann", {"points": 10, "assists": 2}), "Gone": Player("Gone")}
+    ours = {name: Player.from_dict(name, p.to_dict()) for name, p in base.items()}
+    theirs = {name: Player.from_dict(name, p.to_dict()) for name, p in base.items()}
+    ours["Ann"].record_shot("3pt", True, x=20, y=5)
+    ours["Ann"].assists -= 1  # an undo
+    del ours["Gone"]
+    ours["Cal"] = Player("Cal")
+    theirs["Ann"].record_shot("layup", True, x=0, y=3)
+    theirs["Ann"].record_stat("rebounds")
+    theirs["Dee"] = Player("Dee")
+
+    merged = merge_players(base, ours, theirs)
+    assert list(merged) == ["Ann", "Dee", "Cal"]
+    ann = merged["Ann"]
+    assert (ann.points, ann.assists, ann.rebounds) == (15, 1, 1)
+    assert ann.shots["3pt"]["made"] == ann.shots["layup"]["made"] == 1
+    assert list(ann.shot_locations) == list(theirs["Ann"].shot_locations) + list(ours["Ann"].shot_locations)
+
+
+def test_appends_merge_keeps_both_sides_and_undo():
+    base = ["a", "b"]
+    ours = ["a", "b", "c", "c"]
+    theirs = ["a", "b", "d"]
+    assert merge_appends(base, ours, theirs, str) == ["a", "b", "d", "c", "c"]
+    assert merge_appends(base, ["a"], theirs, str) == ["a", "d"]  # ours undid "b"
+    assert merge_by_name({"x": 1, "y": 1}, {"x": 2, "y": 1}, {"x": 1, "y": 3}, prefer_changed) == {"x": 2, "y": 3}
+
+
+def test_shared_files_only_see_other_writers(tmp_path):
+    path = str(tmp_path / "data.bin")
+    mine, other = SharedFiles(str(tmp_path), [path]), SharedFiles(str(tmp_path), [path])
+    assert mine.read(path) is None and mine.changed() == []
+    assert mine.write(path, b"one") and mine.changed() == []
+    assert not mine.write(path, b"one")  # unchanged bytes aren't rewritten
+    assert other.changed() == [path]  # never read it, and it exists
+    assert other.read(path) == b"one" and other.changed() == []
+    other.write(path, b"two!")
+    assert mine.changed() == [path] and mine.base[path] == b"one"
+    assert mine.read(path) == b"two!" and mine.changed() == []
+
+
+def test_logs_are_appended_to_and_read_from_the_tail(tmp_path):
+    path = str(tmp_path / "plays.jsonl")
+    mine, other = (SharedFiles(str(tmp_path), [path], logs=[path]) for _ in range(2))
+    log = PlayByPlay()
+    ann = Player("Ann")
+    for clock in ("9:00", "8:00", "7:00"):
+        ann.record_stat("assists", when=log.stamp("G1", 1, clock))
+    events = log.events
+
+    assert mine.read(path) is None and mine.append(path, event_lines(events[:2]))
+    assert other.read_tail(path) is None  # never read: read it whole
+    assert [e.to_dict() for e in parse_event_lines(other.read(path))] == [e.to_dict() for e in events[:2]]
+    assert other.sizes[path] == mine.sizes[path] and path not in other.base
+    mine.append(path, event_lines(events[2:]))
+    assert other.changed() == [path]
+    tail = other.read_tail(path)
+    assert [e.to_dict() for e in parse_event_lines(tail)] == [events[2].to_dict()] and other.changed() == []
+    assert other.read_tail(path) == b""
+
+    other.write(path, event_lines(events[:1]))  # an undo rewrites it
+    assert mine.read_tail(path) is None
+    assert [e.to_dict() for e in parse_event_lines(mine.read(path))] == [events[0].to_dict()]
+    assert [e.to_dict() for e in PlayByPlay.load(path).events] == [events[0].to_dict()]
+
+
+@pytest.mark.skipif(shared_data.fcntl is None, reason="needs fcntl")
+def test_lock_excludes_other_holders(tmp_path):
+    fcntl = shared_data.fcntl
+    lock = DataLock(str(tmp_path / ".lock"))
+
+    def try_lock(flag):
+        with open(lock.path, "a+b") as handle:
+            try:
+                fcntl.flock(handle.fileno(), flag | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            return True
+
+    with lock():
+        with lock(shared=True):  # re-entrant
+            assert not try_lock(fcntl.LOCK_SH)
+        assert not try_lock(fcntl.LOCK_SH)
+    with lock(shared=True):
+        assert try_lock(fcntl.LOCK_SH) and not try_lock(fcntl.LOCK_EX)
+    assert try_lock(fcntl.LOCK_EX)
@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from basketball_model import Player
+from shot_chart import (
+    BINNINGS,
+    ShotChart,
+    ShotCharts,
+    chart_svg,
+    classify_shot,
+    decode_locations,
+    encode_locations,
+    pack_shot,
+    unpack_shot,
+)
+
+
+def random_shots(rng, count):
+    return [(rng.uniform(-25, 25), rng.uniform(0, 30), rng.random() < 0.45, rng.random() < 0.3) for _ in range(count)]
+
+
+def test_packed_locations_round_trip():
+    rng = random.Random(3)
+    shots = random_shots(rng, 200)
+    codes = [pack_shot(*shot) for shot in shots]
+    for (x, y, made, contested), code in zip(shots, codes):
+        ux, uy, umade, ucontested = unpack_shot(code)
+        assert ux == pytest.approx(x, abs=0.05) and uy == pytest.approx(y, abs=0.05)
+        assert (umade, ucontested) == (made, contested)
+    assert list(decode_locations(encode_locations(codes))) == codes
+    assert unpack_shot(pack_shot(99, -3, True))[:2] == (25.0, 0.0)  # clamped to the court
+
+    player = Player("Ann")
+    player.record_shot("3pt", True, x=-23.0, y=2.0)
+    player.record_shot("layup", False)  # no location
+    again = Player.from_dict("Ann", player.to_dict())
+    assert list(again.shot_locations) == list(player.shot_locations)
+    assert len(again.shot_locations) == 1 and again.points == 3
+
+
+def test_classify_shot():
+    assert classify_shot(0, 6) == "layup"
+    assert classify_shot(0, 19) == "midrange"
+    assert classify_shot(0, 30) == "3pt"
+    assert classify_shot(-22.5, 3) == "3pt"  # corner
+
+
+@pytest.mark.parametrize("binning", sorted(BINNINGS))
+def test_incremental_charts_match_a_recompute(binning):
+    bins = BINNINGS[binning]
+    for key in [(0, 0), (3, -1), (-4, 5)]:
+        assert bins.key(*bins.center(key)) == key
+    rng = random.Random(8)
+    players = [Player(f"P{i}") for i in range(4)]
+    charts = ShotCharts(binning)
+    # a few clicks past the baseline and sidelines get clamped when stored
+    shots = random_shots(rng, 400) + [(-30.0, 52.0, True, False), (26.5, -1.0, False, False)]
+    for x, y, made, contested in shots:
+        player = rng.choice(players)
+        player.record_shot(classify_shot(x, y), made, contested, x=x, y=y)
+        charts.add(player.name, x, y, made)  # raw point, as the app passes it
+
+    def naive(shots):
+        counts = {}
+        for x, y, made, _ in map(unpack_shot, shots):
+            cell = counts.setdefault(bins.key(x, y), [0, 0])
+            cell[0] += made
+            cell[1] += 1
+        return counts
+
+    assert charts.team.counts == naive([c for p in players for c in p.shot_locations])
+    for player in players:
+        assert charts.chart(player.name).counts == naive(player.shot_locations)
+        made = sum(shot["made"] for shot in player.shots.values())
+        assert charts.chart(player.name).made == made
+
+    charts.remove("P0")
+    assert charts.team.counts == naive([c for p in players[1:] for c in p.shot_locations])
+    rebuilt = ShotCharts(binning)
+    rebuilt.rebuild(players[1:])
+    assert rebuilt.team.counts == charts.team.counts
+    assert "<polygon" in chart_svg(charts.team, "Team")
+    assert chart_svg(ShotChart(binning)).endswith("</svg>")
+
+
+def test_web_shot_charts(web_app):
+    import basketball_web
+
+    client = web_app.test_client()
+    client.post("/add", data={"name": "Ann"})
+    shot = {"event": "shot", "shot_type": "3pt", "made": "yes", "contested": "no"}
+    client.post("/player/Ann/event", data=dict(shot, x="0", y="30"))
+    client.post("/player/Ann/event", data=dict(shot, x="0.3", y="30.2", made="no"))
+    client.post("/player/Ann/event", data=dict(shot, shot_type="layup", x="", y=""))  # unlocated
+
+    body = client.get("/shot_chart.json?player=Ann").get_json()
+    assert (body["made"], body["attempts"]) == (1, 2)
+    assert [(c["made"], c["attempts"]) for c in body["cells"]] == [(1, 2)]
+    assert client.get("/shot_chart.json?binning=grid").get_json()["attempts"] == 2
+    assert client.get("/shot_chart.json?binning=nope").status_code == 400
+    assert client.get("/shot_chart.json?player=Nobody").status_code == 404
+    svg = client.get("/shot_chart.svg?player=Ann")
+    assert svg.mimetype == "image/svg+xml" and b"1/2 located shots" in svg.data
+
+    team = client.get("/shot_chart.json").get_json()
+    basketball_web.rebuild_shot_charts()
+    basketball_web.db.session.commit()
+    assert client.get("/shot_chart.json").get_json() == team
+    assert client.get("/backup").get_json()["Ann"]["shot_locations"]
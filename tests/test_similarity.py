@@ -0,0 +1,93 @@
+import math
+import random
+
+import pytest
+
+import similarity
+from similarity import MIN_PENDING, SimilarityIndex, stat_vector
+
+
+def random_counters(rng, style):
+    counters = {}
+    for kind, rate in zip(("layup", "midrange", "3pt"), style):
+        counters[f"shots.{kind}.made"] = rng.randint(0, rate)
+        counters[f"shots.{kind}.missed"] = rng.randint(0, rate)
+    for key in ("assists", "rebounds", "turnovers", "cuts.total", "paint_touches.total", "defense.contested_made"):
+        counters[key] = rng.randint(0, 12)
+    return counters
+
+
+def brute_force(index, name, season, k):
+    query = index.vectors[(season, name)]
+    found = sorted(
+        (sum((a - b) ** 2 for a, b in zip(query, vector)), key)
+        for key, vector in index.vectors.items() if key[1] != name
+    )
+    return [key for _, key in found[:k]]
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_nearest_matches_brute_force_through_incremental_updates(use_numpy):
+    if use_numpy and similarity.np is None:
+        pytest.skip("numpy not installed")
+    rng = random.Random(6)
+    styles = [tuple(rng.randint(1, 30) for _ in range(3)) for _ in range(60)]
+    entries = [((str(2020 + s), f"P{p}"), random_counters(rng, styles[p])) for p in range(60) for s in range(5)]
+    index = SimilarityIndex(use_numpy=use_numpy)
+    index.rebuild(entries)
+    assert index.rebuilds == 1
+
+    def check():
+        for season, name in rng.sample(sorted(index.vectors), 25):
+            found = [key for key, _ in index.similar(name, season, k=6)]
+            assert found == brute_force(index, name, season, 6)
+
+    check()
+    # a few closed games go to the pending set without a rebuild
+    for p in range(10):
+        index.update(("2025", f"P{p}"), random_counters(rng, styles[p]))
+    index.remove(("2020", "P11"))
+    check()
+    assert index.rebuilds == 1 and index.pending
+    for p in range(MIN_PENDING + 1):
+        index.update(("2026", f"P{p}"), random_counters(rng, styles[p]))
+    check()
+    assert index.rebuilds == 2 and not index.pending
+
+
+def test_vectors_are_per_possession():
+    low = {"shots.3pt.made": 2, "shots.3pt.missed": 3, "assists": 1, "cuts.total": 2}
+    high = {key: value * 7 for key, value in low.items()}
+    assert stat_vector(low) == pytest.approx(stat_vector(high))
+    assert stat_vector({}) is None
+
+    index = SimilarityIndex(use_numpy=False)
+    index.rebuild([(("2025", "Low"), low), (("2025", "High"), high), (("2025", "Big"), {"shots.layup.made": 9})])
+    (key, distance), _ = index.similar("Low", k=2)
+    assert key == ("2025", "High") and math.isclose(distance, 0, abs_tol=1e-4)
+    assert index.sync([(("2025", "Low"), low), (("2025", "High"), high)]) == 1  # Big dropped
+
+
+def test_web_similar(web_app):
+    client = web_app.test_client()
+    for name in ("Ann", "Ben", "Cat"):
+        client.post("/add", data={"name": name})
+    three = {"event": "shot", "shot_type": "3pt", "made": "yes", "contested": "no"}
+    layup = dict(three, shot_type="layup")
+    client.post("/player/Ann/event", data=three)
+    client.post("/player/Ben/event", data=dict(three, made="no"))
+    client.post("/player/Cat/event", data=layup)
+    body = client.get("/similar.json?player=Ann").get_json()
+    assert body["season"] is None and body["similar"] == []  # nothing closed yet
+
+    client.post("/games/close", data={"game": "G1", "season": "2025"})
+    body = client.get("/similar.json?player=Ann&k=1").get_json()
+    assert body["season"] == "2025"
+    assert [(s["name"], s["season"]) for s in body["similar"]] == [("Ben", "2025")]
+    client.post("/player/Ann/event", data=layup)
+    client.post("/games/close", data={"game": "G2", "season": "2026"})
+    body = client.get("/similar.json?player=Ann&k=1").get_json()
+    assert body["season"] == "2026" and body["similar"][0]["name"] == "Cat"
+    assert client.get("/similar.json?player=Ann&season=2025&k=1").get_json()["similar"][0]["name"] == "Ben"
+    assert client.get("/similar.json?player=Nobody").status_code == 404
+    assert b"Most Similar" in client.get("/player/Ann").data
@@ -0,0 +1,91 @@
+import pytest
+
+from basketball_model import Player
+import simulator
+from simulator import format_summary, outcome_table, simulate
+import web_stats
+
+
+def make_team():
+    ann = Player("Ann")
+    for _ in range(6):
+        ann.record_shot("3pt", True)
+    for _ in range(4):
+        ann.record_shot("3pt", False, contested=True)
+    ann.turnovers = 2
+    ann.assists = 9  # assists don't take possessions away from shooters
+    ben = Player("Ben")
+    for _ in range(10):
+        ben.record_shot("layup", True, contested=True)
+        ben.record_shot("layup", False)
+    bench = Player("Bench")  # nothing recorded: never gets the ball
+    return [ann, ben, bench]
+
+
+def expected_points(players, possessions):
+    _, rows = outcome_table(players)
+    total = sum(row[1] for row in rows)
+    return possessions * sum(weight * make * value for _, weight, make, value in rows) / total
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_simulated_means_match_the_model(use_numpy):
+    if use_numpy and simulator.np is None:
+        pytest.skip("numpy not installed")
+    team = make_team()
+    result = simulate(team, games=20_000, possessions=40, seed=5, use_numpy=use_numpy)
+    summary = result.summary()
+    expected = expected_points(team, 40)
+    assert summary["team"]["mean"] == pytest.approx(expected, rel=0.02)
+    players = summary["players"]
+    assert players["Bench"]["max"] == 0
+    assert players["Ann"]["mean"] + players["Ben"]["mean"] == pytest.approx(summary["team"]["mean"], abs=0.02)
+    assert summary["team"]["p5"] <= summary["team"]["p50"] <= summary["team"]["p95"]
+    assert sum(result.histogram().values()) == pytest.approx(1.0, abs=0.01)
+
+    season = result.season_summary(games_per_season=20)
+    assert season["seasons"] == 1000
+    assert season["team"]["mean"] == pytest.approx(20 * summary["team"]["mean"], rel=0.01)
+    assert "TEAM" in format_summary(summary)
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_seeded_runs_repeat_across_worker_counts(use_numpy):
+    if use_numpy and simulator.np is None:
+        pytest.skip("numpy not installed")
+    team = make_team()
+    kwargs = dict(games=3_000, possessions=30, seed=11, chunk_games=1_000, use_numpy=use_numpy)
+    serial = simulate(team, **kwargs).summary()
+    assert simulate(team, workers=3, mode="thread", **kwargs).summary() == serial
+    assert simulate(team, workers=2, mode="process", **kwargs).summary() == serial
+    assert simulate(team, **dict(kwargs, seed=12)).summary() != serial
+
+
+def test_nothing_recorded_is_an_error():
+    with pytest.raises(ValueError):
+        simulate([Player("Empty")], games=10)
+
+
+def test_web_simulate_json(web_app):
+    client = web_app.test_client()
+    assert client.get("/simulate.json").status_code == 400
+    client.post("/add", data={"name": "Ann"})
+    client.post("/player/Ann/event", data={"event": "shot", "shot_type": "3pt", "made": "yes", "contested": "no"})
+    body = client.get("/simulate.json?games=500&seed=1&season=10").get_json()
+    assert body["games"] == 500
+    assert body["season"]["seasons"] == 50
+    assert body["team"]["mean"] == body["players"]["Ann"]["mean"] > 0
+    assert client.get("/simulate.json?games=500&seed=1&season=10").get_json() == body
+    for season in (0, -1):
+        response = client.get(f"/simulate.json?games=500&season={season}")
+        assert response.status_code == 400 and "season" in response.get_json()["error"]
+
+
+def test_web_simulate_json_caps_the_python_fallback(web_app, monkeypatch):
+    client = web_app.test_client()
+    client.post("/add", data={"name": "Ann"})
+    client.post("/player/Ann/event", data={"event": "shot", "shot_type": "3pt", "made": "yes", "contested": "no"})
+    monkeypatch.setattr(web_stats, "MAX_SIMULATED_GAMES_PYTHON", 300)
+    monkeypatch.setattr(simulator, "np", None)
+    body = client.get("/simulate.json?games=100000&seed=1").get_json()
+    assert body["games"] == 300 and body["backend"] == "python"
@@ -0,0 +1,58 @@
+import random
+
+import basketball_web
+from basketball_model import calc_team_percentage, get_team_possessions
+
+
+EVENTS = [
+    {"event": "shot", "shot_type": "layup", "made": "yes", "contested": "no"},
+    {"event": "shot", "shot_type": "3pt", "made": "no", "contested": "yes"},
+    {"event": "shot", "shot_type": "midrange", "made": "yes", "contested": "yes"},
+    {"event": "assist"},
+    {"event": "turnover"},
+    {"event": "rebound"},
+    {"event": "cut", "result": "made"},
+    {"event": "defense", "contested": "yes", "made": "no"},
+]
+
+
+def test_incremental_aggregate_matches_full_recompute(web_app):
+    client = web_app.test_client()
+    names = [f"P{i}" for i in range(6)]
+    for name in names:
+        client.post("/add", data={"name": name})
+    rng = random.Random(7)
+    for _ in range(300):
+        # Skew usage towards one player so the 40% usage cap kicks in
+        name = "P0" if rng.random() < 0.5 else rng.choice(names)
+        client.post(f"/player/{name}/event", data=rng.choice(EVENTS))
+        players = basketball_web.load_players()
+        aggregate = basketball_web.team_aggregate()
+        assert aggregate.team_possessions() == get_team_possessions(players)
+        assert aggregate.team_percentage() == calc_team_percentage(players)
+
+
+def test_rebuild_command_repairs_the_row(web_app):
+    client = web_app.test_client()
+    client.post("/add", data={"name": "Ann"})
+    client.post("/player/Ann/event", data=EVENTS[0])
+    expected = basketball_web.team_aggregate().team_percentage()
+
+    aggregate = basketball_web.team_aggregate()
+    aggregate.players = 99
+    aggregate.base_score_units = 0
+    basketball_web.db.session.commit()
+
+    result = web_app.test_cli_runner().invoke(args=["rebuild-team-stats"])
+    assert result.exit_code == 0
+    assert f"team progress {expected}%" in result.output
+    assert basketball_web.team_aggregate().players == 1
+
+
+def test_index_reads_team_progress_from_aggregate(web_app):
+    client = web_app.test_client()
+    client.post("/add", data={"name": "Ann"})
+    client.post("/player/Ann/event", data=EVENTS[0])
+    pct = basketball_web.team_aggregate().team_percentage()
+    assert f"Team Progress: {pct}%" in client.get("/").get_data(as_text=True)
+    assert f"Team Progress: {pct}%" in client.get("/report").get_data(as_text=True)
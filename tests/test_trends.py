@@ -0,0 +1,58 @@
+import random
+
+from basketball_model import Player
+from trends import PlayerTrend, counter_vector, metrics, vector_player
+
+
+def play_game(player, rng, events=20):
+    for _ in range(events):
+        if rng.random() < 0.7:
+            player.record_shot(rng.choice(["layup", "midrange", "3pt"]), rng.random() < 0.5)
+        else:
+            player.record_stat(rng.choice(["assists", "turnovers", "rebounds"]))
+
+
+def test_ring_and_ewma_match_a_recompute_from_history():
+    rng = random.Random(5)
+    player = Player("Ann")
+    trend = PlayerTrend(size=4, alpha=0.5)
+    lines = []
+    for game in range(11):
+        before = counter_vector(player)
+        play_game(player, rng, rng.randint(5, 30))
+        lines.append([a - b for a, b in zip(counter_vector(player), before)])
+        trend.close_game(f"G{game}", player)
+        # JSON round trip between games, like the app and the web table do
+        trend = PlayerTrend.from_dict(trend.to_dict())
+
+    recent = lines[-4:]
+    window = [sum(col) for col in zip(*recent)]
+    assert trend.window == window
+    assert [line for _, line in trend.ordered_games()] == recent
+    ewma = [float(v) for v in lines[0]]
+    for line in lines[1:]:
+        ewma = [0.5 * v + 0.5 * e for v, e in zip(line, ewma)]
+    assert trend.ewma == ewma
+
+    summary = trend.summary("Ann")
+    assert summary["games_closed"] == 11
+    assert [g["game"] for g in summary["games"]] == ["G7", "G8", "G9", "G10"]
+    assert summary["rolling"] == metrics(vector_player("Ann", window))
+
+
+def test_web_close_game_and_trend_json(web_app):
+    client = web_app.test_client()
+    client.post("/add", data={"name": "Ann"})
+    client.post("/player/Ann/event", data={"event": "shot", "shot_type": "3pt", "made": "yes", "contested": "no"})
+    client.post("/games/close", data={"game": "Opener"})
+    client.post("/player/Ann/event", data={"event": "shot", "shot_type": "layup", "made": "no", "contested": "no"})
+    client.post("/games/close", data={})
+
+    trend = client.get("/player/Ann/trend.json").get_json()
+    assert [(g["game"], g["points"]) for g in trend["games"]] == [("Opener", 3), ("Game 2", 0)]
+    assert trend["rolling"]["points"] == 3
+    assert trend["rolling"]["TS%"] == 0.75
+
+    overview = client.get("/trends.json").get_json()
+    assert overview[0]["name"] == "Ann" and "games" not in overview[0]
+    assert client.get("/player/Nobody/trend.json").status_code == 404
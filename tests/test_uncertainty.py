@@ -0,0 +1,112 @@
+import csv
+import io
+
+import pytest
+
+import uncertainty
+from basketball_model import Player
+from uncertainty import INTERVAL_FIELDS, IntervalCache, bootstrap_intervals
+
+
+def shooter(name, makes, misses, turnovers=0, assists=0):
+    player = Player(name)
+    for _ in range(makes):
+        player.record_shot("midrange", True)
+    for _ in range(misses):
+        player.record_shot("3pt", False)
+    player.turnovers = turnovers
+    player.assists = assists
+    return player
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_intervals_cover_the_estimate_and_narrow_with_data(use_numpy):
+    if use_numpy and uncertainty.np is None:
+        pytest.skip("numpy not installed")
+    small = shooter("Small", 3, 1)
+    large = shooter("Large", 75, 25, turnovers=10, assists=12)
+    kwargs = dict(resamples=500, use_numpy=use_numpy)
+    small_ci = bootstrap_intervals(small, **kwargs)
+    large_ci = bootstrap_intervals(large, **kwargs)
+    for player, ci in ((small, small_ci), (large, large_ci)):
+        assert ci["TS%"][0] <= player.calc_ts() <= ci["TS%"][1]
+        assert ci["PER"][0] <= player.calc_per() <= ci["PER"][1]
+        assert ci["BPM"][0] <= player.calc_bpm() <= ci["BPM"][1]
+    width = lambda ci: ci["TS%"][1] - ci["TS%"][0]
+    assert width(large_ci) < width(small_ci)
+    assert bootstrap_intervals(large, **kwargs) == large_ci  # seeded from the counters
+    assert bootstrap_intervals(Player("Empty"), **kwargs) == {m: (0.0, 0.0) for m in ("PER", "TS%", "BPM")}
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_points_not_from_shots_stay_inside_the_interval(use_numpy):
+    if use_numpy and uncertainty.np is None:
+        pytest.skip("numpy not installed")
+    edited = Player("X")
+    edited.record_shot("layup", True)
+    edited.record_shot("layup", False)
+    edited.points = 30  # e.g. Edit Totals or free throws
+    totals_only = Player("Y")
+    totals_only.points, totals_only.rebounds = 12, 3
+    for player in (edited, shooter("Z", 10, 5, turnovers=2)):
+        ci = bootstrap_intervals(player, resamples=500, use_numpy=use_numpy)
+        assert ci["TS%"][0] <= player.calc_ts() <= ci["TS%"][1]
+        assert ci["PER"][0] <= player.calc_per() <= ci["PER"][1]
+        assert ci["BPM"][0] <= player.calc_bpm() <= ci["BPM"][1]
+    ci = bootstrap_intervals(totals_only, resamples=500, use_numpy=use_numpy)
+    assert ci["PER"] == (totals_only.calc_per(),) * 2 and ci["BPM"] == (totals_only.calc_bpm(),) * 2
+
+
+def test_cache_recomputes_only_when_counters_change():
+    cache = IntervalCache(resamples=200)
+    ann = shooter("Ann", 4, 4)
+    first = cache.intervals(ann)
+    assert cache.intervals(ann) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    ann.record_shot("layup", True)
+    assert cache.intervals(ann) is not first
+    assert cache.misses == 2
+    assert set(cache.row(ann)) == set(INTERVAL_FIELDS)
+
+
+def test_bounded_cache_drops_least_recently_used():
+    cache = IntervalCache(resamples=50, max_entries=2)
+    ann, ben, cal = shooter("Ann", 2, 1), shooter("Ben", 1, 2), shooter("Cal", 3, 3)
+    cache.intervals(ann)
+    cache.intervals(ben)
+    cache.intervals(ann)  # Ben is now the least recently used
+    cache.intervals(cal)
+    assert list(cache.entries) == ["Ann", "Cal"]
+    cache.intervals(ben, store=False)
+    assert list(cache.entries) == ["Ann", "Cal"] and cache.misses == 4
+
+
+def test_web_report_and_export_show_intervals(web_app):
+    client = web_app.test_client()
+    client.post("/add", data={"name": "Ann"})
+    for made in ("yes", "yes", "no"):
+        client.post("/player/Ann/event", data={"event": "shot", "shot_type": "layup", "made": made, "contested": "no"})
+    assert "&ndash;" in client.get("/report").get_data(as_text=True)
+
+    rows = list(csv.DictReader(io.StringIO(client.get("/export.csv?intervals=1").get_data(as_text=True))))
+    assert float(rows[0]["TS%_low"]) <= float(rows[0]["TS%"]) <= float(rows[0]["TS%_high"])
+    plain = client.get("/export.csv").get_data(as_text=True)
+    assert "TS%_low" not in plain.splitlines()[0]
+
+
+def test_web_export_does_not_cache_and_report_caps_intervals(web_app, monkeypatch):
+    import basketball_web
+    import web_players
+
+    client = web_app.test_client()
+    for name in ("Ann", "Ben", "Cal"):
+        client.post("/add", data={"name": name, "allow_similar": "1"})
+        client.post(f"/player/{name}/event", data={"event": "shot", "shot_type": "layup", "made": "yes", "contested": "no"})
+    basketball_web.INTERVALS.clear()
+    client.get("/export.csv?intervals=1")
+    assert not basketball_web.INTERVALS.entries
+
+    monkeypatch.setattr(web_players, "REPORT_INTERVAL_PLAYERS", 2)
+    page = client.get("/report").get_data(as_text=True)
+    assert list(basketball_web.INTERVALS.entries) == ["Ann", "Ben"]
+    assert "shown for the first 2 players" in page
@@ -0,0 +1,71 @@
+import csv
+import gzip
+import io
+import tracemalloc
+
+from sqlalchemy import insert
+
+import basketball_web
+from basketball_model import SUMMARY_FIELDS, TRACKING_FIELDS, Player
+
+SYNTHETIC_ROWS = 100_000
+# The summary CSV for 100k players is ~6 MB, the full one ~25 MB
+MEMORY_CEILING = 8 * 1024 * 1024
+
+
+def seed_players(count):
+    rows = []
+    for i in range(count):
+        player = Player(f"Player {i:06d}")
+        player.record_shot("layup", True, contested=bool(i % 2))
+        player.record_shot("3pt", i % 3 == 0)
+        player.assists = i % 7
+        player.turnovers = i % 5
+        player.record_cut("pass")
+        rows.append(player.to_dict())
+        if len(rows) == 10_000:
+            basketball_web.db.session.execute(insert(basketball_web.PlayerRecord.__table__), rows)
+            rows = []
+    if rows:
+        basketball_web.db.session.execute(insert(basketball_web.PlayerRecord.__table__), rows)
+    basketball_web.db.session.commit()
+
+
+def test_export_matches_player_metrics(web_app):
+    seed_players(3)
+    response = web_app.test_client().get("/export.csv?columns=full")
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert list(rows[0]) == SUMMARY_FIELDS + TRACKING_FIELDS
+    assert [r["name"] for r in rows] == ["Player 000000", "Player 000001", "Player 000002"]
+    assert rows[0]["layup_made"] == "1" and rows[0]["cuts_pass_to_cutter"] == "1"
+
+
+def test_export_gzip(web_app):
+    seed_players(5)
+    response = web_app.test_client().get("/export.csv?gzip=1")
+    assert response.mimetype == "application/gzip"
+    text = gzip.decompress(response.get_data()).decode("utf-8")
+    assert text.splitlines()[0] == ",".join(SUMMARY_FIELDS)
+    assert len(text.splitlines()) == 6
+
+
+def test_export_streams_in_constant_memory(web_app):
+    seed_players(SYNTHETIC_ROWS)
+    client = web_app.test_client()
+
+    tracemalloc.start()
+    try:
+        response = client.get("/export.csv?columns=full", buffered=False)
+        lines = 0
+        size = 0
+        for chunk in response.response:
+            lines += chunk.count(b"\n") if isinstance(chunk, bytes) else chunk.count("\n")
+            size += len(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert lines == SYNTHETIC_ROWS + 1
+    assert size > MEMORY_CEILING
+    assert peak < MEMORY_CEILING
@@ -0,0 +1,30 @@
+from sqlalchemy import inspect
+
+import basketball_web
+
+
+def test_create_app_leaves_the_database_alone_until_the_first_request(tmp_path):
+    path = tmp_path / "lazy.db"
+    app = basketball_web.create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+    assert not path.exists()
+    with app.app_context():
+        assert app.test_client().get("/").status_code == 200
+        assert "players" in inspect(basketball_web.db.engine).get_table_names()
+        assert basketball_web.team_aggregate().players == 0
+        basketball_web.db.session.remove()
+        basketball_web.db.engine.dispose()
+
+
+def test_init_db_command(tmp_path):
+    path = tmp_path / "cli.db"
+    app = basketball_web.create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "INIT_DB_ON_FIRST_REQUEST": False,
+    })
+    result = app.test_cli_runner().invoke(args=["init-db"])
+    assert result.exit_code == 0 and "Database ready" in result.output
+    with app.app_context():
+        tables = inspect(basketball_web.db.engine).get_table_names()
+        assert {"players", "team_stats", "leaderboard"} <= set(tables)
+        basketball_web.db.engine.dispose()
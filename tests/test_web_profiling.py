@@ -0,0 +1,60 @@
+import basketball_web
+
+
+def make_app(tmp_path, **config):
+    return basketball_web.create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'profiled.db'}",
+        "PROFILING": True,
+        "PROFILE_DIR": str(tmp_path / "profiles"),
+        **config,
+    })
+
+
+def get(client, url, **kwargs):
+    # buffered=True drains and closes the body like a real WSGI server would,
+    # which is when the middleware records the request
+    return client.open(url, buffered=True, **kwargs)
+
+
+def test_metrics_endpoint_reports_routes_sql_and_templates(tmp_path):
+    client = make_app(tmp_path).test_client()
+    get(client, "/add", method="POST", data={"name": "Ann"})
+    get(client, "/")
+    get(client, "/")
+    get(client, "/export.csv")
+
+    text = get(client, "/metrics").get_data(as_text=True)
+    assert "# TYPE basketball_request_duration_seconds histogram" in text
+    assert 'basketball_request_duration_seconds_count{route="/",method="GET"} 2' in text
+    assert 'basketball_requests_total{route="/add",method="POST",status="302"} 1' in text
+    assert 'basketball_template_render_seconds_count{route="/"} 2' in text
+    assert 'basketball_sql_queries_per_request_bucket{route="/",le="0"} 0' in text
+    assert 'basketball_sql_queries_per_request_count{route="/export.csv"} 1' in text
+
+
+def test_profile_query_dumps_cprofile_stats(tmp_path):
+    client = make_app(tmp_path, PROFILE_QUERY_ALLOWED=True).test_client()
+    get(client, "/report?profile=1")
+    get(client, "/report")
+    assert len(list((tmp_path / "profiles").glob("*-report.prof"))) == 1
+    assert 'basketball_profiles_captured_total{route="/report"} 1' in get(client, "/metrics").get_data(as_text=True)
+
+
+def test_profile_query_is_ignored_unless_allowed(tmp_path):
+    client = make_app(tmp_path).test_client()
+    get(client, "/report?profile=1")
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_only_the_newest_profiles_are_kept(tmp_path):
+    client = make_app(tmp_path, PROFILE_SAMPLE_RATE=1.0, PROFILE_MAX_FILES=2).test_client()
+    for _ in range(3):
+        get(client, "/report")
+    get(client, "/")
+    kept = sorted(path.name for path in (tmp_path / "profiles").glob("*.prof"))
+    assert len(kept) == 2 and kept[-1].endswith("-root.prof")
+
+
+def test_metrics_route_is_opt_in(web_app):
+    assert web_app.test_client().get("/metrics").status_code == 404
@@ -0,0 +1,124 @@
+"""Rolling (last N games) and exponentially weighted player metrics.
+
+Each player gets a ``PlayerTrend``: a fixed-size ring of per-game counter
+lines, the running sum of the lines in the ring, an EWMA of the same
+counters and the lifetime totals at the last close. Closing a game turns
+"lifetime totals now minus totals at the last close" into that game's
+line, pushes it into the ring (dropping the oldest), and updates the
+sum and the EWMA. Rolling PER/TS%/BPM are then the usual Player metrics
+applied to those sums, so reading a trend never touches older games.
+"""
+from basketball_model import SHOT_TYPES, Player
+
+ROLLING_GAMES = 5
+EWMA_ALPHA = 0.3  # weight of the newest game
+
+# Counters the metrics need, in vector order
+TREND_FIELDS = ["points", "assists", "turnovers", "rebounds"] + [
+    f"shots.{t}.{k}" for t in SHOT_TYPES for k in ("made", "missed")
+]
+
+TREND_METRICS = ("points", "PER", "TS%", "A/T", "BPM")
+
+
+def counter_vector(player):
+    vector = [player.points, player.assists, player.turnovers, player.rebounds]
+    for shot_type in SHOT_TYPES:
+        shot = player.shots.get(shot_type) or {}
+        vector.append(shot.get("made", 0))
+        vector.append(shot.get("missed", 0))
+    return vector
+
+
+def vector_player(name, vector):
+    """A Player holding ``vector`` (ints or EWMA floats) so calc_* work on it."""
+    player = Player(name)
+    player.points, player.assists, player.turnovers, player.rebounds = vector[:4]
+    for i, shot_type in enumerate(SHOT_TYPES):
+        player.shots[shot_type]["made"] = vector[4 + 2 * i]
+        player.shots[shot_type]["missed"] = vector[5 + 2 * i]
+    return player
+
+
+def metrics(player):
+    return {
+        "points": round(player.points, 1),
+        "PER": player.calc_per(),
+        "TS%": player.calc_ts(),
+        "A/T": player.calc_ast_to_tov(),
+        "BPM": player.calc_bpm(),
+    }
+
+
+class PlayerTrend:
+    def __init__(self, size=ROLLING_GAMES, alpha=EWMA_ALPHA):
+        self.size = size
+        self.alpha = alpha
+        self.games = []  # ring of [game_id, line]; oldest at ``head`` once full
+        self.head = 0
+        self.window = [0] * len(TREND_FIELDS)
+        self.ewma = None
+        self.baseline = [0] * len(TREND_FIELDS)
+        self.closed = 0
+
+    def close_game(self, game_id, player):
+        """Record everything ``player`` did since the last close as one game."""
+        totals = counter_vector(player)
+        line = [now - before for now, before in zip(totals, self.baseline)]
+        self.baseline = totals
+        self.push(game_id, line)
+        return line
+
+    def push(self, game_id, line):
+        if len(self.games) < self.size:
+            self.games.append([game_id, line])
+        else:
+            _, dropped = self.games[self.head]
+            self.window = [w - d for w, d in zip(self.window, dropped)]
+            self.games[self.head] = [game_id, line]
+            self.head = (self.head + 1) % self.size
+        self.window = [w + v for w, v in zip(self.window, line)]
+        if self.ewma is None:
+            self.ewma = [float(v) for v in line]
+        else:
+            a = self.alpha
+            self.ewma = [a * v + (1 - a) * e for v, e in zip(line, self.ewma)]
+        self.closed += 1
+
+    def ordered_games(self):
+        """Ring contents oldest first."""
+        return self.games[self.head:] + self.games[:self.head]
+
+    def summary(self, name):
+        games = self.ordered_games()
+        return {
+            "name": name,
+            "games_closed": self.closed,
+            "window": len(games),
+            "rolling": metrics(vector_player(name, self.window)) if games else None,
+            "ewma": metrics(vector_player(name, self.ewma)) if self.ewma else None,
+            "games": [dict(game=game_id, **metrics(vector_player(name, line))) for game_id, line in games],
+        }
+
+    def to_dict(self):
+        return {
+            "size": self.size,
+            "alpha": self.alpha,
+            "games": [list(game) for game in self.games],
+            "head": self.head,
+            "window": self.window,
+            "ewma": self.ewma,
+            "baseline": self.baseline,
+            "closed": self.closed,
+        }
+
+    @staticmethod
+    def from_dict(data):
+        trend = PlayerTrend(data.get("size", ROLLING_GAMES), data.get("alpha", EWMA_ALPHA))
+        trend.games = [list(game) for game in data.get("games") or []]
+        trend.head = data.get("head", 0)
+        trend.window = list(data.get("window") or trend.window)
+        trend.ewma = data.get("ewma")
+        trend.baseline = list(data.get("baseline") or trend.baseline)
+        trend.closed = data.get("closed", len(trend.games))
+        return trend
@@ -0,0 +1,202 @@
+"""Bootstrap confidence intervals for PER, TS% and BPM.
+
+A TS% of 0.75 on four shots says very little, so reports show an interval
+next to the point estimate. A player's record is treated as a bag of
+events: each make and miss by shot type, turnovers, assists and
+rebounds. Every resample draws the same number of events with replacement
+and recomputes the metrics from the resampled totals, so possessions
+(shots + turnovers) vary along with the makes and misses. Points the shots
+don't account for (free throws, Edit Totals, older data formats) are added
+to every resample unchanged, so the interval is around ``player.points``.
+
+With numpy installed all resamples for a player are one multinomial draw
+(``resamples x event kinds`` counts) followed by one matrix product into
+points / FGA / turnovers / assists / rebounds totals. Without numpy the
+same bootstrap runs on ``random.choices``; it is much slower, so it takes
+fewer resamples by default.
+
+    cache = IntervalCache()
+    cache.intervals(player)    # {"PER": (low, high), "TS%": (...), "BPM": (...)}
+    cache.row(player)          # {"PER_low": ..., "PER_high": ..., ...}
+
+Resamples are seeded from the player's counters, so the same record always
+gives the same interval and the cache only recomputes when a counter
+changes. ``IntervalCache(max_entries=N)`` keeps only the N most recently
+used players; ``intervals(player, store=False)`` uses a cached interval
+but doesn't add one, for one-off passes over every player (exports).
+"""
+import random
+import zlib
+from collections import Counter, OrderedDict
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python fallback
+    np = None
+
+INTERVAL_METRICS = ("PER", "TS%", "BPM")
+INTERVAL_FIELDS = [f"{metric}_{end}" for metric in INTERVAL_METRICS for end in ("low", "high")]
+DEFAULT_RESAMPLES = 2000
+FALLBACK_RESAMPLES = 500  # without numpy
+DEFAULT_LEVEL = 0.95
+
+# rounding used by the matching Player.calc_* method
+_DIGITS = {"PER": 2, "TS%": 3, "BPM": 2}
+
+
+def event_kinds(player):
+    """``[(label, count, contribution)]`` for every event kind the player has recorded."""
+    kinds = []  # contribution: (points, FGA, turnovers, assists, rebounds)
+    for shot_type, shot in sorted(player.shots.items()):
+        value = 3 if shot_type == "3pt" else 2
+        kinds.append((f"{shot_type}_made", shot.get("made", 0), (value, 1, 0, 0, 0)))
+        kinds.append((f"{shot_type}_missed", shot.get("missed", 0), (0, 1, 0, 0, 0)))
+    kinds.append(("turnovers", player.turnovers, (0, 0, 1, 0, 0)))
+    kinds.append(("assists", player.assists, (0, 0, 0, 1, 0)))
+    kinds.append(("rebounds", player.rebounds, (0, 0, 0, 0, 1)))
+    return [kind for kind in kinds if kind[1] > 0]
+
+
+def points_offset(player):
+    """Points not explained by made shots; a fixed part of every resample."""
+    shot_points = sum((3 if shot_type == "3pt" else 2) * shot.get("made", 0) for shot_type, shot in player.shots.items())
+    return player.points - shot_points
+
+
+def signature(kinds, offset=0):
+    return tuple((label, count) for label, count, _ in kinds) + ((("points_offset", offset),) if offset else ())
+
+
+def _seed(sig):
+    return zlib.crc32(repr(sig).encode("utf-8"))
+
+
+def _percentile(sorted_values, pct):
+    """Linear interpolation between closest ranks (numpy's default)."""
+    position = (len(sorted_values) - 1) * pct / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def _numpy_metrics(kinds, resamples, rng_seed, offset=0):
+    counts = np.array([count for _, count, _ in kinds], dtype=np.int64)
+    contributions = np.array([c for _, _, c in kinds], dtype=np.float64)
+    rng = np.random.default_rng(rng_seed)
+    draws = rng.multinomial(counts.sum(), counts / counts.sum(), size=resamples)
+    totals = draws @ contributions  # resamples x (points, FGA, TOV, AST, REB)
+    pts, fga, tov, ast, reb = totals.T
+    pts = pts + offset
+    possessions = np.maximum(1, fga + tov)
+    ts = np.divide(pts, 2 * fga, out=np.zeros_like(pts), where=fga > 0)
+    return {
+        "PER": (pts + reb + ast - tov) / possessions * 15,
+        "TS%": ts,
+        "BPM": (pts + reb + ast) / possessions * 10,
+    }
+
+
+def _python_metrics(kinds, resamples, rng_seed, offset=0):
+    rng = random.Random(rng_seed)
+    cum_weights = list(accumulate(count for _, count, _ in kinds))
+    contributions = [c for _, _, c in kinds]
+    n = cum_weights[-1]
+    indexes = range(len(kinds))
+    metrics = {metric: [] for metric in INTERVAL_METRICS}
+    for _ in range(resamples):
+        totals = [offset, 0, 0, 0, 0]
+        for index, count in Counter(rng.choices(indexes, cum_weights=cum_weights, k=n)).items():
+            for column, amount in enumerate(contributions[index]):
+                totals[column] += amount * count
+        pts, fga, tov, ast, reb = totals
+        possessions = max(1, fga + tov)
+        metrics["PER"].append((pts + reb + ast - tov) / possessions * 15)
+        metrics["TS%"].append(pts / (2 * fga) if fga else 0.0)
+        metrics["BPM"].append((pts + reb + ast) / possessions * 10)
+    return metrics
+
+
+def bootstrap_kinds(kinds, resamples=None, level=DEFAULT_LEVEL, seed=None, use_numpy=True, offset=0):
+    """``{metric: (low, high)}`` percentile intervals from ``event_kinds()`` output.
+
+    ``offset`` is added to the points of every resample (see ``points_offset()``).
+    """
+    if not kinds:
+        # nothing to resample, the metrics are fixed
+        per, bpm = round(offset * 15.0, _DIGITS["PER"]), round(offset * 10.0, _DIGITS["BPM"])
+        return {"PER": (per, per), "TS%": (0.0, 0.0), "BPM": (bpm, bpm)}
+    rng_seed = _seed(signature(kinds)) if seed is None else seed
+    tail = (1 - level) / 2 * 100
+    use_numpy = use_numpy and np is not None
+    if resamples is None:
+        resamples = DEFAULT_RESAMPLES if use_numpy else FALLBACK_RESAMPLES
+    if use_numpy:
+        metrics = _numpy_metrics(kinds, resamples, rng_seed, offset)
+        bounds = {metric: np.percentile(values, (tail, 100 - tail)) for metric, values in metrics.items()}
+    else:
+        metrics = _python_metrics(kinds, resamples, rng_seed, offset)
+        bounds = {}
+        for metric, values in metrics.items():
+            values.sort()
+            bounds[metric] = (_percentile(values, tail), _percentile(values, 100 - tail))
+    return {
+        metric: (round(float(low), _DIGITS[metric]), round(float(high), _DIGITS[metric]))
+        for metric, (low, high) in bounds.items()
+    }
+
+
+def bootstrap_intervals(player, resamples=None, level=DEFAULT_LEVEL, seed=None, use_numpy=True):
+    return bootstrap_kinds(event_kinds(player), resamples, level, seed, use_numpy, points_offset(player))
+
+
+def interval_row(intervals):
+    row = {}
+    for metric, (low, high) in intervals.items():
+        row[f"{metric}_low"] = low
+        row[f"{metric}_high"] = high
+    return row
+
+
+def format_interval(value, interval):
+    low, high = interval
+    return f"{value} [{low}, {high}]"
+
+
+class IntervalCache:
+    """Intervals per player name, recomputed only when that player's counters change."""
+
+    def __init__(self, resamples=None, level=DEFAULT_LEVEL, max_entries=None):
+        self.resamples = resamples
+        self.level = level
+        self.max_entries = max_entries  # None: no bound
+        self.entries = OrderedDict()  # name -> (signature, intervals), least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def intervals(self, player, store=True):
+        kinds = event_kinds(player)
+        offset = points_offset(player)
+        sig = signature(kinds, offset)
+        entry = self.entries.get(player.name)
+        if entry is not None and entry[0] == sig:
+            self.hits += 1
+            self.entries.move_to_end(player.name)
+            return entry[1]
+        self.misses += 1
+        intervals = bootstrap_kinds(kinds, self.resamples, self.level, offset=offset)
+        if store:
+            self.entries[player.name] = (sig, intervals)
+            self.entries.move_to_end(player.name)
+            if self.max_entries is not None and len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return intervals
+
+    def row(self, player, store=True):
+        return interval_row(self.intervals(player, store))
+
+    def discard(self, name):
+        self.entries.pop(name, None)
+
+    def clear(self):
+        self.entries.clear()
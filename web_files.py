@@ -0,0 +1,186 @@
+"""CSV export, backup and restore routes of the web app."""
+import csv
+import json
+import os
+import tempfile
+import threading
+import zlib
+from io import StringIO
+
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
+from sqlalchemy import func, select
+
+from basketball_model import SUMMARY_FIELDS, TRACKING_FIELDS, Player, summary_row, tracking_row
+from basketball_web import (
+    EXPORT_BATCH_SIZE,
+    INTERVALS,
+    LeaderboardEntry,
+    PlayerRecord,
+    db,
+    iter_players,
+    load_players,
+    publish_restore_job,
+    rebuild_derived_tables,
+    restore_job_state,
+    team_aggregate,
+)
+from leaderboards import RANK_FIELDS, RANKED_METRICS
+import restore_jobs
+from uncertainty import INTERVAL_FIELDS
+
+bp = Blueprint("files", __name__)
+
+
+def ranked_players_select(metrics=RANKED_METRICS):
+    """Players ordered by name with a rank column per metric, ranked by the database."""
+    players = PlayerRecord.__table__
+    stmt = select(players)
+    for i, metric in enumerate(metrics):
+        ranked = (
+            select(
+                LeaderboardEntry.name,
+                func.rank().over(order_by=LeaderboardEntry.value.desc()).label("rank"),
+            )
+            .where(LeaderboardEntry.metric == metric)
+            .subquery(f"rank_{i}")
+        )
+        stmt = stmt.add_columns(ranked.c.rank.label(f"rank_{i}")).outerjoin(ranked, ranked.c.name == players.c.name)
+    return stmt.order_by(players.c.name)
+
+
+def iter_ranked_players(batch_size=EXPORT_BATCH_SIZE):
+    """Like iter_players() but yields ``(player, rank_row)``."""
+    stmt = ranked_players_select().execution_options(stream_results=True, yield_per=batch_size)
+    for row in db.session.execute(stmt):
+        ranks = {field: getattr(row, f"rank_{i}") for i, field in enumerate(RANK_FIELDS)}
+        yield Player.from_dict(row.name, row._mapping), ranks
+
+
+def iter_csv(full=False, batch_size=EXPORT_BATCH_SIZE, ranks=False, intervals=False):
+    """Yield the team CSV a batch of rows at a time."""
+    fields = SUMMARY_FIELDS + TRACKING_FIELDS if full else list(SUMMARY_FIELDS)
+    if intervals:
+        fields += INTERVAL_FIELDS
+    if ranks:
+        fields += RANK_FIELDS
+        rows = iter_ranked_players(batch_size)
+    else:
+        rows = ((player, None) for player in iter_players(batch_size))
+    team_pos = team_aggregate().team_possessions()
+    buffer = StringIO()
+    # Rows are built from the field lists, skip DictWriter's per-row key check
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    for count, (player, rank_row) in enumerate(rows, 1):
+        row = summary_row(player, team_pos)
+        if full:
+            row.update(tracking_row(player))
+        if intervals:
+            # computed per row and not cached, so a full export stays constant-memory
+            row.update(INTERVALS.row(player, store=False))
+        if rank_row:
+            row.update(rank_row)
+        writer.writerow(row)
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # +16 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def start_restore(app, path):
+    """Restore the backup at ``path`` on a worker thread and return its job."""
+    job = restore_jobs.new_job(os.path.getsize(path), on_change=publish_restore_job)
+    publish_restore_job(job)
+
+    def run():
+        with app.app_context():
+            restore_jobs.restore_players(
+                job, path, db.session, PlayerRecord.__table__, after_insert=rebuild_derived_tables
+            )
+
+    threading.Thread(target=run, name=f"restore-{job.id}", daemon=True).start()
+    return job
+
+
+@bp.route("/export.csv")
+def export_csv():
+    """Stream the team CSV.
+
+    ``?columns=full`` adds every tracking counter, ``?ranks=1`` adds each
+    player's leaderboard rank, ``?intervals=1`` adds bootstrap intervals
+    for PER, TS% and BPM, ``?gzip=1`` compresses the download. Memory stays flat however many players are exported.
+    """
+    full = request.args.get("columns", "summary") == "full"
+    chunks = iter_csv(
+        full=full,
+        ranks=request.args.get("ranks") in ("1", "true", "yes"),
+        intervals=request.args.get("intervals") in ("1", "true", "yes"),
+    )
+    filename = "team_report.csv"
+    mimetype = "text/csv"
+    if request.args.get("gzip") in ("1", "true", "yes"):
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        mimetype = "application/gzip"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@bp.route("/backup")
+def backup():
+    data = {p.name: p.to_dict() for p in load_players()}
+    return Response(
+        json.dumps(data, indent=2),
+        mimetype="application/json",
+        headers={"Content-Disposition": "attachment; filename=data.json"},
+    )
+
+
+@bp.route("/restore", methods=["GET", "POST"])
+def restore():
+    if request.method == "GET":
+        return render_template("restore.html", job=restore_job_state(request.args.get("job", "")))
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        flash("Choose a data.json file to upload.", "danger")
+        return redirect(url_for("files.restore"))
+    # Spool the upload to disk so the worker thread can read it after the request ends
+    fd, path = tempfile.mkstemp(prefix="restore-", suffix=".json")
+    os.close(fd)
+    upload.save(path)
+    job = start_restore(current_app._get_current_object(), path)
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify(job.to_dict()), 202
+    return redirect(url_for("files.restore", job=job.id))
+
+
+@bp.route("/restore/<job_id>")
+def restore_status(job_id):
+    state = restore_job_state(job_id)
+    if state is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(state)
@@ -0,0 +1,190 @@
+"""Roster, player page, game closing and team report routes of the web app."""
+from flask import Blueprint, flash, jsonify, redirect, render_template, request, url_for
+from sqlalchemy import select
+
+from basketball_model import Player, summary_row
+from basketball_web import (
+    INTERVALS,
+    REPORT_INTERVAL_PLAYERS,
+    PlayerRecord,
+    PlayerTrendRecord,
+    apply_team_change,
+    close_game,
+    db,
+    game_closed,
+    leaderboard_position,
+    leaderboard_top,
+    load_players,
+    player_rollups,
+    search_players,
+    similar_names,
+    similar_players,
+    team_aggregate,
+    update_leaderboard,
+    update_shot_charts,
+)
+from leaderboards import RANKED_METRICS, display_value
+from name_index import SEARCH_LIMIT
+from rollups import TEAM_ROLLUP, default_season
+
+bp = Blueprint("players", __name__)
+
+
+def court_point(form):
+    """Optional ``x``/``y`` court location (feet) of a shot, ``(None, None)`` if missing."""
+    try:
+        return float(form["x"]), float(form["y"])
+    except (KeyError, ValueError):
+        return None, None
+
+
+def parse_event(player, form):
+    """Apply one submitted player.html form to ``player``.
+
+    Several event panels share field names (two ``result`` selects, two
+    ``made``/``contested`` pairs) and hidden panels are still submitted, so
+    the later panels read the last value of each name.
+    """
+    event = form.get("event")
+    if event == "shot":
+        x, y = court_point(form)
+        player.record_shot(
+            form.get("shot_type", "layup"), form.get("made") == "yes", form.get("contested") == "yes", x=x, y=y
+        )
+    elif event in ("assist", "turnover", "rebound"):
+        player.record_stat(event + "s")
+    elif event == "strike":
+        # form sends "balls"/"strikes", the model counts "ball"/"strike"
+        player.record_strike_pass(form.get("kind", "balls").rstrip("s"), None)
+    elif event == "cut":
+        player.record_cut(form.getlist("result")[0] if form.getlist("result") else "pass")
+    elif event == "paint":
+        player.record_paint_touch(form.getlist("result")[-1] if form.getlist("result") else "made")
+    elif event == "defense":
+        contested = form.getlist("contested")[-1:] == ["yes"]
+        made = form.getlist("made")[-1:] == ["yes"]
+        player.record_defense(contested, made)
+    else:
+        return False
+    return True
+
+
+@bp.route("/")
+def index():
+    query = (request.args.get("q") or "").strip()
+    return render_template(
+        "index.html", players=search_players(query), query=query, team_pct=team_aggregate().team_percentage()
+    )
+
+
+@bp.route("/players/search.json")
+def players_search():
+    """``?q=ann&limit=20``: type-to-filter over player names, prefix matches first."""
+    query = request.args.get("q") or ""
+    limit = request.args.get("limit", SEARCH_LIMIT, type=int)
+    return jsonify({"query": query, "players": search_players(query, max(1, limit))})
+
+
+@bp.route("/add", methods=["POST"])
+def add_player():
+    name = (request.form.get("name") or "").strip()
+    if not name:
+        flash("Name cannot be empty.", "danger")
+    elif db.session.get(PlayerRecord, name) is not None:
+        flash("Player already exists.", "warning")
+    elif not request.form.get("allow_similar") and (similar := similar_names(name)):
+        flash(f"{name} looks like {', '.join(similar[:3])}. Tick 'Allow a similar name' to add anyway.", "warning")
+    else:
+        player = Player(name)
+        record = PlayerRecord(name=name)
+        record.update_from(player)
+        db.session.add(record)
+        apply_team_change(None, player)
+        update_leaderboard(None, player)
+        db.session.commit()
+        flash(f"Added {name}.", "success")
+    return redirect(url_for("players.index"))
+
+
+@bp.route("/player/<name>")
+def player_page(name):
+    record = db.get_or_404(PlayerRecord, name)
+    player = record.to_player()
+    team_pos = team_aggregate().team_possessions()
+    ranks = {metric: leaderboard_position(metric, name) for metric in RANKED_METRICS}
+    seasons, career = player_rollups(name)
+    _, similar = similar_players(player)
+    metrics = {
+        "PER": player.calc_per(),
+        "TS%": player.calc_ts(),
+        "A/T": player.calc_ast_to_tov(),
+        "Usage%": player.calc_usage(team_pos),
+        "BPM": player.calc_bpm(),
+    }
+    return render_template(
+        "player.html", player=player, metrics=metrics, ranks=ranks, seasons=seasons, career=career,
+        similar=similar,
+    )
+
+
+@bp.route("/player/<name>/event", methods=["POST"])
+def player_event(name):
+    record = db.get_or_404(PlayerRecord, name)
+    before = record.to_player()
+    player = record.to_player()
+    if parse_event(player, request.form):
+        record.update_from(player)
+        apply_team_change(before, player)
+        update_leaderboard(before, player)
+        update_shot_charts(before, player)
+        db.session.commit()
+    else:
+        flash("Unknown event.", "danger")
+    return redirect(url_for("players.player_page", name=name))
+
+
+@bp.route("/games/close", methods=["POST"])
+def close_game_route():
+    game_id = (request.form.get("game") or "").strip()
+    if not game_id:
+        closed = db.session.scalar(select(db.func.max(PlayerTrendRecord.data["closed"].as_integer())))
+        game_id = f"Game {(closed or 0) + 1}"
+    season = (request.form.get("season") or "").strip() or default_season()
+    if game_closed(season, game_id):
+        flash(f"{game_id} is already closed for season {season}.", "warning")
+        return redirect(url_for("players.index"))
+    count = close_game(game_id, season)
+    db.session.commit()
+    flash(f"Closed {game_id} ({season}) for {count} players.", "success")
+    return redirect(url_for("players.index"))
+
+
+@bp.route("/report")
+def report():
+    players = load_players()
+    aggregate = team_aggregate()
+    team_pos = aggregate.team_possessions()
+    rows = []
+    for count, p in enumerate(players):
+        row = summary_row(p, team_pos)
+        row.update(shots_made=p.shots_made(), shots_missed=p.shots_missed())
+        if count < REPORT_INTERVAL_PLAYERS:
+            row.update(INTERVALS.row(p))
+        rows.append(row)
+    team = {
+        "players": len(players),
+        "points": sum(p.points for p in players),
+        "shots_made": sum(p.shots_made() for p in players),
+        "shots_missed": sum(p.shots_missed() for p in players),
+        "assists": sum(p.assists for p in players),
+        "turnovers": sum(p.turnovers for p in players),
+    }
+    leaders = {
+        metric: [(name, display_value(metric, value, team_pos)) for name, value in leaderboard_top(metric, 3)]
+        for metric in RANKED_METRICS
+    }
+    seasons, career = player_rollups(TEAM_ROLLUP)
+    return render_template(
+        "report.html", players=rows, team=team, team_pct=aggregate.team_percentage(), leaders=leaders,
+        seasons=seasons, career=career, interval_players=REPORT_INTERVAL_PLAYERS,
+    )
@@ -0,0 +1,300 @@
+"""Opt-in request profiling for the web app.
+
+Turn it on with BASKETBALL_PROFILING=1 (or PROFILING=True in the Flask
+config). Every request then records:
+
+- total latency per route, body streaming included
+- SQL query count and time, from SQLAlchemy cursor events
+- Jinja render time, from Flask's template signals
+- whatever is left over (metric math, Flask itself)
+
+and /metrics serves the lot in Prometheus text format. A sampled share of
+requests (BASKETBALL_PROFILE_SAMPLE) also runs under cProfile and the stats
+are dumped as .prof files to BASKETBALL_PROFILE_DIR for snakeviz / pstats.
+Only the newest BASKETBALL_PROFILE_KEEP files are kept. ``?profile=1``
+forces a profile only when BASKETBALL_PROFILE_QUERY=1 (or
+PROFILE_QUERY_ALLOWED), since any visitor can add it.
+"""
+import cProfile
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+
+from flask import Response, before_render_template, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from werkzeug.wsgi import ClosingIterator
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+DEFAULT_PROFILE_KEEP = 100
+
+ROUTE_KEY = "basketball.route"
+UNMATCHED_ROUTE = "<unmatched>"
+
+_local = threading.local()
+_sql_hooks_installed = False
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, labels, value):
+        row = self.series.get(labels)
+        if row is None:
+            row = self.series[labels] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                row[i] += 1
+        row[-2] += value
+        row[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, row in sorted(self.series.items()):
+            for bound, count in zip(self.buckets + (float("inf"),), row[:-2] + [row[-1]]):
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(row[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {row[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.series = {}
+
+    def inc(self, labels, amount=1):
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter("basketball_requests_total", "Requests handled.", ("route", "method", "status"))
+        self.latency = Histogram(
+            "basketball_request_duration_seconds", "Wall time per request, streamed body included.",
+            ("route", "method"), LATENCY_BUCKETS,
+        )
+        self.sql_queries = Histogram(
+            "basketball_sql_queries_per_request", "SQL statements executed per request.",
+            ("route",), QUERY_COUNT_BUCKETS,
+        )
+        self.sql_time = Histogram(
+            "basketball_sql_duration_seconds", "Time spent in SQL statements per request.",
+            ("route",), LATENCY_BUCKETS,
+        )
+        self.render_time = Histogram(
+            "basketball_template_render_seconds", "Time spent rendering Jinja templates per request.",
+            ("route",), LATENCY_BUCKETS,
+        )
+        self.python_time = Histogram(
+            "basketball_python_duration_seconds",
+            "Request time outside SQL and templates (metric math, Flask itself).",
+            ("route",), LATENCY_BUCKETS,
+        )
+        self.profiles = Counter("basketball_profiles_captured_total", "Requests captured under cProfile.", ("route",))
+
+    def record(self, stats):
+        route = stats.route
+        other = max(0.0, stats.elapsed - stats.sql_time - stats.render_time)
+        with self.lock:
+            self.requests.inc((route, stats.method, str(stats.status)))
+            self.latency.observe((route, stats.method), stats.elapsed)
+            self.sql_queries.observe((route,), stats.sql_count)
+            self.sql_time.observe((route,), stats.sql_time)
+            self.render_time.observe((route,), stats.render_time)
+            self.python_time.observe((route,), other)
+            if stats.profiled:
+                self.profiles.inc((route,))
+
+    def render(self):
+        with self.lock:
+            metrics = (
+                self.requests, self.latency, self.sql_queries, self.sql_time,
+                self.render_time, self.python_time, self.profiles,
+            )
+            lines = [line for metric in metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    def __init__(self, method):
+        self.method = method
+        self.route = UNMATCHED_ROUTE
+        self.status = 0
+        self.elapsed = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.render_starts = []
+        self.profiled = False
+
+
+def current_stats():
+    return getattr(_local, "stats", None)
+
+
+class ProfilingMiddleware:
+    """WSGI wrapper that times each request and hands the numbers to a registry."""
+
+    def __init__(self, wsgi_app, registry, sample_rate=0.0, profile_dir=None, allow_query=False,
+                 keep=DEFAULT_PROFILE_KEEP):
+        self.wsgi_app = wsgi_app
+        self.registry = registry
+        self.sample_rate = sample_rate
+        self.profile_dir = profile_dir or os.path.join(tempfile.gettempdir(), "basketball-profiles")
+        self.allow_query = allow_query
+        self.keep = keep
+        self._dump_lock = threading.Lock()
+
+    def should_profile(self, environ):
+        if self.allow_query and "profile=1" in environ.get("QUERY_STRING", "").split("&"):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, environ, start_response):
+        stats = RequestStats(environ.get("REQUEST_METHOD", "GET"))
+        _local.stats = stats
+        profiler = cProfile.Profile() if self.should_profile(environ) else None
+        start = time.perf_counter()
+
+        def capture_status(status, headers, exc_info=None):
+            stats.status = int(status.split(" ", 1)[0])
+            return start_response(status, headers, exc_info)
+
+        def finish():
+            if profiler is not None:
+                profiler.disable()
+            stats.elapsed = time.perf_counter() - start
+            stats.route = environ.get(ROUTE_KEY, UNMATCHED_ROUTE)
+            if profiler is not None:
+                stats.profiled = True
+                self.dump_profile(profiler, stats)
+            _local.stats = None
+            self.registry.record(stats)
+
+        if profiler is not None:
+            profiler.enable()
+        try:
+            body = self.wsgi_app(environ, capture_status)
+        except BaseException:
+            finish()
+            raise
+        # Streamed responses keep running after we return, time them until close()
+        return ClosingIterator(body, [finish])
+
+    def dump_profile(self, profiler, stats):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", stats.route).strip("_") or "root"
+        filename = f"{time.time_ns()}-{slug}.prof"
+        with self._dump_lock:
+            profiler.dump_stats(os.path.join(self.profile_dir, filename))
+            self.prune_profiles()
+
+    def prune_profiles(self):
+        """Delete all but the newest ``keep`` dumps; names start with the dump time."""
+        dumps = sorted(entry.name for entry in os.scandir(self.profile_dir) if entry.name.endswith(".prof"))
+        for name in dumps[:max(0, len(dumps) - self.keep)]:
+            try:
+                os.remove(os.path.join(self.profile_dir, name))
+            except FileNotFoundError:
+                pass  # another worker pruned it
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_stats() is not None:
+        conn.info.setdefault("basketball_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats()
+    starts = conn.info.get("basketball_query_start")
+    if stats is None or not starts:
+        return
+    stats.sql_count += 1
+    stats.sql_time += time.perf_counter() - starts.pop()
+
+
+def _install_sql_hooks():
+    global _sql_hooks_installed
+    if _sql_hooks_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _sql_hooks_installed = True
+
+
+def _template_started(sender, template, context, **extra):
+    stats = current_stats()
+    if stats is not None:
+        stats.render_starts.append(time.perf_counter())
+
+
+def _template_finished(sender, template, context, **extra):
+    stats = current_stats()
+    if stats is not None and stats.render_starts:
+        stats.render_time += time.perf_counter() - stats.render_starts.pop()
+
+
+def install_profiling(app):
+    """Wrap ``app`` with the profiling middleware and add the /metrics route."""
+    registry = MetricsRegistry()
+    app.wsgi_app = ProfilingMiddleware(
+        app.wsgi_app,
+        registry,
+        sample_rate=float(app.config.get("PROFILE_SAMPLE_RATE", 0.0)),
+        profile_dir=app.config.get("PROFILE_DIR"),
+        allow_query=bool(app.config.get("PROFILE_QUERY_ALLOWED", False)),
+        keep=int(app.config.get("PROFILE_MAX_FILES", DEFAULT_PROFILE_KEEP)),
+    )
+    app.extensions["basketball_metrics"] = registry
+
+    @app.before_request
+    def tag_route():
+        request.environ[ROUTE_KEY] = request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+
+    _install_sql_hooks()
+    before_render_template.connect(_template_started, app, weak=False)
+    template_rendered.connect(_template_finished, app, weak=False)
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+    return registry
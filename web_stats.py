@@ -0,0 +1,142 @@
+"""Read-only JSON and SVG routes of the web app: rollups, trends, leaderboards,
+shot charts, similar players and the points simulation.
+"""
+from flask import Blueprint, Response, jsonify, request
+
+from basketball_web import (
+    TEAM_CHART,
+    PlayerRecord,
+    PlayerTrendRecord,
+    db,
+    iter_players,
+    leaderboard_position,
+    leaderboard_top,
+    load_shot_chart,
+    rollup_rows,
+    season_names,
+    similar_players,
+    team_aggregate,
+)
+from leaderboards import LEADERBOARD_METRICS, display_value
+from shot_chart import BINNINGS, DEFAULT_BINNING, chart_svg
+import simulator
+from simulator import DEFAULT_POSSESSIONS, simulate
+from trends import PlayerTrend
+
+# /simulate.json runs in the request, so keep it to a few seconds; the
+# pure-Python fallback is roughly 30x slower than numpy and gets a lower cap
+MAX_SIMULATED_GAMES = 100_000
+MAX_SIMULATED_GAMES_PYTHON = 5_000
+
+bp = Blueprint("stats", __name__)
+
+
+@bp.route("/rollups.json")
+def rollups():
+    """``?level=season&season=2025`` (default: latest season) or ``?level=career``; ``&player=<name>`` for one row."""
+    level = request.args.get("level", "season")
+    if level not in ("season", "career"):
+        return jsonify({"error": "level must be season or career"}), 400
+    seasons = season_names()
+    season = request.args.get("season") or (seasons[-1] if seasons else "")
+    name = request.args.get("player")
+    rows = rollup_rows(level, season, name)
+    if name and not rows:
+        return jsonify({"error": "no closed games for that player"}), 404
+    return jsonify({"level": level, "season": season if level == "season" else None, "seasons": seasons, "rows": rows})
+
+
+@bp.route("/player/<name>/trend.json")
+def player_trend(name):
+    db.get_or_404(PlayerRecord, name)
+    record = db.session.get(PlayerTrendRecord, name)
+    trend = record.to_trend() if record else PlayerTrend()
+    return jsonify(trend.summary(name))
+
+
+@bp.route("/trends.json")
+def trends():
+    records = PlayerTrendRecord.query.order_by(PlayerTrendRecord.name)
+    summaries = []
+    for record in records:
+        summary = record.to_trend().summary(record.name)
+        del summary["games"]  # per-game lines are on /player/<name>/trend.json
+        summaries.append(summary)
+    return jsonify(summaries)
+
+
+@bp.route("/leaderboard.json")
+def leaderboard():
+    """``?metric=PER&k=10`` top-k; add ``&player=<name>`` for that player's rank and percentile."""
+    metric = request.args.get("metric", "PER")
+    if metric not in LEADERBOARD_METRICS:
+        return jsonify({"error": "unknown metric", "metrics": LEADERBOARD_METRICS}), 400
+    k = min(max(request.args.get("k", 10, type=int), 1), 1000)
+    team_pos = team_aggregate().team_possessions()
+    top = [{"name": name, "value": display_value(metric, value, team_pos)} for name, value in leaderboard_top(metric, k)]
+    body = {"metric": metric, "top": top}
+    name = request.args.get("player")
+    if name:
+        position = leaderboard_position(metric, name)
+        if position is None:
+            return jsonify({"error": "unknown player"}), 404
+        body["player"] = {"name": name, "rank": position[0], "percentile": position[1]}
+    return jsonify(body)
+
+
+def requested_chart():
+    """The chart named by ``?player=&binning=``, or an error response."""
+    binning = request.args.get("binning", DEFAULT_BINNING)
+    if binning not in BINNINGS:
+        return None, (jsonify({"error": "unknown binning", "binnings": sorted(BINNINGS)}), 400)
+    name = request.args.get("player")
+    if name:
+        db.get_or_404(PlayerRecord, name)
+    return load_shot_chart(name or TEAM_CHART, binning), None
+
+
+@bp.route("/shot_chart.json")
+def shot_chart():
+    """``?player=<name>`` (team if omitted) and ``&binning=hex|grid``."""
+    chart, error = requested_chart()
+    if error:
+        return error
+    return jsonify(dict(chart.to_dict(), player=request.args.get("player")))
+
+
+@bp.route("/shot_chart.svg")
+def shot_chart_svg():
+    chart, error = requested_chart()
+    if error:
+        return error
+    name = request.args.get("player") or "Team"
+    title = f"{name}: {chart.made}/{chart.attempts} located shots"
+    return Response(chart_svg(chart, title), mimetype="image/svg+xml")
+
+
+@bp.route("/similar.json")
+def similar():
+    """``?player=<name>&season=&k=5``: the player-seasons (any season, other players) most like one of theirs."""
+    record = db.get_or_404(PlayerRecord, request.args.get("player", ""))
+    k = min(max(request.args.get("k", 5, type=int), 1), 100)
+    season, found = similar_players(record.to_player(), request.args.get("season") or None, k)
+    return jsonify({"player": record.name, "season": season, "similar": found})
+
+
+@bp.route("/simulate.json")
+def simulate_games():
+    """Monte Carlo points projection; ``?games=&possessions=&seed=&season=``."""
+    cap = MAX_SIMULATED_GAMES if simulator.np is not None else MAX_SIMULATED_GAMES_PYTHON
+    games = min(max(request.args.get("games", 20_000, type=int), 1), cap)
+    possessions = min(max(request.args.get("possessions", DEFAULT_POSSESSIONS, type=int), 1), 200)
+    season = request.args.get("season", type=int)
+    if season is not None and season < 1:
+        return jsonify({"error": "season must be at least 1 game"}), 400
+    try:
+        result = simulate(iter_players(), games=games, possessions=possessions, seed=request.args.get("seed", type=int))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    body = result.summary()
+    if season and season <= games:
+        body["season"] = result.season_summary(season)
+    return jsonify(body)